@@ -1,16 +1,18 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from modules.text_processing import TextProcessor
-from modules.question_generator import QuestionGenerator
-from modules.assessment_engine import AssessmentEngine
-from modules.ai_detector import AIContentDetector
-from modules.text_rewriter import TextRewriter
-from utils.file_handlers import FileHandler
-from utils.visualization import Visualization
+import logging
+from contextlib import nullcontext
+from functools import cached_property
+from utils.lazy_import import timed_import, get_import_report
+from utils import tracing
 import tempfile
+import time
 import os
 
+logging.basicConfig(level=logging.INFO)
+
+# Seconds of PDF page extraction per rerun while an upload is still loading
+PDF_PAGE_TIME_BUDGET = 1.0
+
 # Page configuration
 st.set_page_config(
     page_title="AI-Powered Exam Preparation System",
@@ -46,15 +48,57 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 class ExamPreparationApp:
-    def __init__(self):
-        self.text_processor = TextProcessor()
-        self.question_generator = QuestionGenerator()
-        self.assessment_engine = AssessmentEngine()
-        self.ai_detector = AIContentDetector()
-        self.text_rewriter = TextRewriter()
-        self.file_handler = FileHandler()
-        self.visualizer = Visualization()
-        
+    # Components are built on first use so that pages only pay for what they render.
+    # The app itself is built once per process (see get_app); per-user state lives
+    # in st.session_state
+    
+    @cached_property
+    def embedding_service(self):
+        # One embedding model per process, shared across reruns and modules
+        return timed_import('modules.embedding_service').get_embedding_service()
+    
+    @cached_property
+    def text_processor(self):
+        return timed_import('modules.text_processing').TextProcessor()
+    
+    @cached_property
+    def question_generator(self):
+        return timed_import('modules.question_generator').QuestionGenerator(self.embedding_service)
+    
+    @cached_property
+    def assessment_engine(self):
+        return timed_import('modules.assessment_engine').AssessmentEngine(self.embedding_service)
+    
+    @cached_property
+    def ai_detector(self):
+        return timed_import('modules.ai_detector').AIContentDetector()
+    
+    @cached_property
+    def text_rewriter(self):
+        return timed_import('modules.text_rewriter').TextRewriter()
+    
+    @cached_property
+    def file_handler(self):
+        return timed_import('utils.file_handlers').FileHandler(pdf_workers=os.cpu_count() or 1)
+    
+    @cached_property
+    def visualizer(self):
+        return timed_import('utils.visualization').Visualization()
+    
+    @cached_property
+    def job_queue(self):
+        return timed_import('utils.job_queue').get_job_queue()
+    
+    @cached_property
+    def analysis_store(self):
+        return timed_import('utils.analysis_store').get_analysis_store()
+    
+    @cached_property
+    def corpus_index(self):
+        # None unless EXAM_PREP_CORPUS_INDEX_DIR is set
+        return timed_import('modules.corpus_index').get_corpus_index()
+    
+
     def render_sidebar(self):
         st.sidebar.title("🎓 AI Exam Preparation System")
         st.sidebar.markdown("---")
@@ -74,6 +118,17 @@ class ExamPreparationApp:
         - Muhammad Usama
         """)
         
+        with st.sidebar.expander("⏱️ Startup Timing"):
+            report = get_import_report()
+            if report:
+                for name, seconds in report:
+                    st.write(f"`{name}`: {seconds * 1000:.0f} ms")
+            else:
+                st.write("No deferred imports loaded yet.")
+        
+        # Per session: ticking the box traces this session's runs without touching the global flag
+        st.sidebar.checkbox("🐞 Pipeline Debug Panel", value=tracing.is_enabled(), key='debug_panel')
+        
         return module
     
     def render_dashboard(self):
@@ -126,6 +181,14 @@ class ExamPreparationApp:
     def render_exam_preparation(self):
         st.header("📚 Exam Preparation Module")
         
+        missing = timed_import('modules.text_processing').check_nltk_data()
+        if missing:
+            st.error(
+                f"❌ Missing NLTK data: {', '.join(missing)}. Run `exam-prep-setup` "
+                f"(or `python -m modules.text_processing`) once, then reload this page."
+            )
+            return
+        
         uploaded_file = st.file_uploader(
             "Upload Course Material", 
             type=['pdf', 'txt', 'docx'],
@@ -133,82 +196,263 @@ class ExamPreparationApp:
         )
         
         if uploaded_file:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                file_path = tmp_file.name
+            doc_key = self.analysis_store.hash_content(uploaded_file.getvalue())
+            analysis = self.analysis_store.get(doc_key)
+            error = None
             
-            try:
-                # Extract text
-                extracted_text = self.file_handler.extract_text(file_path)
+            if analysis is None:
+                text = None
+                if self._loads_by_page(uploaded_file):
+                    pages = self._load_pdf_pages(doc_key, uploaded_file)
+                    if not pages['complete']:
+                        # Show the first pages now and extract the rest on the next reruns
+                        self._render_pdf_preview(pages)
+                        st.rerun()
+                    text = "".join(pages['parts'])
                 
-                if extracted_text:
-                    st.success("✅ Text extracted successfully!")
-                    
-                    # Process text
-                    with st.spinner("Processing content..."):
-                        processed_data = self.text_processor.process_text(extracted_text)
-                    
-                    # Display key information
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.subheader("📊 Document Statistics")
-                        stats = self.text_processor.get_document_stats(extracted_text)
-                        st.write(f"**Word Count:** {stats['word_count']}")
-                        st.write(f"**Sentence Count:** {stats['sentence_count']}")
-                        st.write(f"**Key Topics:** {len(stats['key_topics'])}")
-                    
-                    with col2:
-                        st.subheader("🔑 Key Topics Identified")
-                        for i, topic in enumerate(stats['key_topics'][:10], 1):
-                            st.write(f"{i}. {topic}")
-                    
-                    # Generate content
-                    st.subheader("🎯 Generate Study Materials")
-                    
-                    gen_col1, gen_col2, gen_col3 = st.columns(3)
-                    
-                    with gen_col1:
-                        if st.button("📝 Generate Questions", use_container_width=True):
-                            with st.spinner("Generating questions..."):
-                                questions = self.question_generator.generate_questions(extracted_text)
-                                st.session_state.questions = questions
-                    
-                    with gen_col2:
-                        if st.button("❓ Generate MCQs", use_container_width=True):
-                            with st.spinner("Generating MCQs..."):
-                                mcqs = self.question_generator.generate_mcqs(extracted_text)
-                                st.session_state.mcqs = mcqs
-                    
-                    with gen_col3:
-                        if st.button("📋 Generate Summary", use_container_width=True):
-                            with st.spinner("Generating summary..."):
-                                summary = self.question_generator.generate_summary(extracted_text)
-                                st.session_state.summary = summary
-                    
-                    # Display generated content
-                    if 'questions' in st.session_state:
-                        st.subheader("📝 Generated Questions")
-                        for i, q in enumerate(st.session_state.questions, 1):
-                            st.write(f"**{i}. {q}**")
-                    
-                    if 'mcqs' in st.session_state:
-                        st.subheader("❓ Multiple Choice Questions")
-                        for i, mcq in enumerate(st.session_state.mcqs, 1):
-                            st.write(f"**{i}. {mcq['question']}**")
-                            for opt in ['a', 'b', 'c', 'd']:
-                                if opt in mcq:
-                                    st.write(f"   {opt.upper()}. {mcq[opt]}")
-                    
-                    if 'summary' in st.session_state:
-                        st.subheader("📋 Content Summary")
-                        st.write(st.session_state.summary)
+                handle = self._poll_analysis(doc_key, uploaded_file, text)
+                analysis, error = handle.result, handle.error
+            
+            if analysis:
+                document = analysis['document']
+                stats = analysis['stats']
+                st.success("✅ Text extracted successfully!")
+                self._index_upload(doc_key, uploaded_file.name, document)
                 
-                else:
-                    st.error("❌ Could not extract text from the file.")
+                # Display key information
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.subheader("📊 Document Statistics")
+                    st.write(f"**Word Count:** {stats['word_count']}")
+                    st.write(f"**Sentence Count:** {stats['sentence_count']}")
+                    st.write(f"**Key Topics:** {len(stats['key_topics'])}")
+                
+                with col2:
+                    st.subheader("🔑 Key Topics Identified")
+                    for i, topic in enumerate(stats['key_topics'][:10], 1):
+                        st.write(f"{i}. {topic}")
+                
+                # Generate content
+                st.subheader("🎯 Generate Study Materials")
+                seed = int(st.number_input(
+                    "Variation", min_value=0, value=0, step=1,
+                    help="The same document and variation always give the same questions"
+                ))
+                
+                gen_col1, gen_col2, gen_col3 = st.columns(3)
+                
+                with gen_col1:
+                    if st.button("📝 Generate Questions", use_container_width=True):
+                        self._submit_generation(doc_key, 'questions', self.question_generator.generate_questions, document, seed=seed)
+                
+                with gen_col2:
+                    if st.button("❓ Generate MCQs", use_container_width=True):
+                        self._submit_generation(doc_key, 'mcqs', self.question_generator.generate_mcqs, document, seed=seed)
+                
+                with gen_col3:
+                    if st.button("📋 Generate Summary", use_container_width=True):
+                        self._submit_generation(doc_key, 'summary', self.question_generator.generate_summary, document)
+                
+                running_jobs = self._collect_generation_jobs(doc_key)
+                
+                # Display generated content
+                if 'questions' in st.session_state:
+                    st.subheader("📝 Generated Questions")
+                    for i, q in enumerate(st.session_state.questions, 1):
+                        st.write(f"**{i}. {q}**")
+                
+                if 'mcqs' in st.session_state:
+                    st.subheader("❓ Multiple Choice Questions")
+                    for i, mcq in enumerate(st.session_state.mcqs, 1):
+                        st.write(f"**{i}. {mcq['question']}**")
+                        for opt in ['a', 'b', 'c', 'd']:
+                            if opt in mcq:
+                                st.write(f"   {opt.upper()}. {mcq[opt]}")
+                
+                if 'summary' in st.session_state:
+                    st.subheader("📋 Content Summary")
+                    st.write(st.session_state.summary)
+                
+                if running_jobs:
+                    # Poll background jobs without blocking widget interaction
+                    time.sleep(0.5)
+                    st.rerun()
             
-            finally:
-                os.unlink(file_path)
+            else:
+                st.error(f"❌ {error}" if error else "❌ Could not extract text from the file.")
+        
+        self.render_corpus_search()
+    
+    def _index_upload(self, doc_key, name, document):
+        """Add an upload's chunks to the course library in the background"""
+        if self.corpus_index is None or doc_key in self.corpus_index:
+            return
+        segments = self.text_processor.segment_text(document)
+        self.job_queue.submit(
+            self.job_queue.make_key(doc_key, 'corpus_index'),
+            self.corpus_index.add_document, doc_key, segments, source=name
+        )
+    
+    def render_corpus_search(self):
+        """Semantic search over every document added to the course library"""
+        if self.corpus_index is None:
+            return
+        
+        st.subheader("🔎 Search Course Library")
+        stats = self.corpus_index.get_stats()
+        st.caption(f"{stats['chunks']} passages from {stats['documents']} documents")
+        query = st.text_input("Find passages about:", key="corpus_query")
+        if query:
+            for result in self.corpus_index.search(query, k=5):
+                st.write(f"**{result['source']}** (relevance {result['score']:.2f})")
+                st.write(result['text'])
+    
+    def _submit_generation(self, doc_key, kind, fn, document, **options):
+        """Start a generation job in the background and remember it for this session
+        
+        Results already generated for this document with the same options, in
+        any session, are taken from the analysis store instead.
+        """
+        job_key = self.job_queue.make_key(doc_key, kind, **options)
+        stored = self.analysis_store.get_artifact(doc_key, job_key)
+        if stored is not None:
+            st.session_state[kind] = stored
+            return
+        self.job_queue.submit(job_key, fn, document, report_progress=True, **options)
+        st.session_state.setdefault('jobs', {})[kind] = job_key
+    
+    def _collect_generation_jobs(self, doc_key):
+        """Move finished job results into the session and show progress of the rest"""
+        jobs = st.session_state.get('jobs', {})
+        running = []
+        
+        for kind, job_key in list(jobs.items()):
+            handle = self.job_queue.get(job_key)
+            if handle is None:
+                del jobs[kind]
+            elif handle.status == 'done':
+                st.session_state[kind] = handle.result
+                self.analysis_store.set_artifact(doc_key, job_key, handle.result)
+                del jobs[kind]
+            elif handle.status == 'failed':
+                st.error(f"❌ Could not generate {kind}: {handle.error}")
+                del jobs[kind]
+            else:
+                running.append(handle)
+        
+        if running:
+            names = ", ".join(kind for kind in jobs)
+            st.info(f"⏳ Generating {names}... you can keep using the page.")
+            st.progress(sum(handle.progress for handle in running) / len(running))
+        
+        return running
+    
+    def _loads_by_page(self, uploaded_file):
+        """Whether an upload is a PDF small enough to extract into memory page range by page range"""
+        file_handlers = timed_import('utils.file_handlers')
+        return (
+            uploaded_file.name.lower().endswith('.pdf')
+            and uploaded_file.size <= file_handlers.IN_MEMORY_MAX_SIZE_MB * 1024 * 1024
+        )
+    
+    def _load_pdf_pages(self, doc_key, uploaded_file):
+        """Extract the next pages of an uploaded PDF within PDF_PAGE_TIME_BUDGET
+        
+        Progress is kept in the session, so each rerun resumes where the last
+        one stopped until ``complete`` is set.
+        """
+        pages = st.session_state.get('pdf_pages')
+        if pages is None or pages['doc_key'] != doc_key:
+            if pages is not None and not pages['complete']:
+                os.unlink(pages['path'])
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+                tmp_file.write(uploaded_file.getvalue())
+            pages = {'doc_key': doc_key, 'path': tmp_file.name, 'parts': [], 'next_page': 0, 'complete': False}
+            st.session_state['pdf_pages'] = pages
+        
+        if not pages['complete']:
+            chunk = self.file_handler.extract_pdf_pages(
+                pages['path'], pages['next_page'], time_budget=PDF_PAGE_TIME_BUDGET
+            )
+            pages['parts'].append(chunk['text'])
+            pages['next_page'] = chunk['next_page']
+            pages['total_pages'] = chunk['total_pages']
+            pages['complete'] = chunk['complete']
+            if pages['complete']:
+                os.unlink(pages['path'])
+        return pages
+    
+    def _render_pdf_preview(self, pages):
+        """Show the pages of a PDF extracted so far"""
+        st.progress(
+            pages['next_page'] / max(pages['total_pages'], 1),
+            text=f"📄 Loaded {pages['next_page']} of {pages['total_pages']} pages..."
+        )
+        with st.expander("👀 Preview of the first pages", expanded=True):
+            st.write("".join(pages['parts'])[:3000])
+    
+    def _poll_analysis(self, doc_key, uploaded_file, text=None):
+        """Run an upload's analysis as a background job and poll it on each rerun
+        
+        Shows the job's progress and reruns until it finishes, then returns its
+        handle. Concurrent sessions uploading the same file share one job; a
+        failed job is retried on the next rerun.
+        """
+        handle = self.job_queue.submit(
+            self.job_queue.make_key(doc_key, 'analysis'),
+            self._analyze_upload, doc_key, uploaded_file.name, uploaded_file.getvalue(), text,
+            report_progress=True
+        )
+        if not handle.done:
+            st.progress(handle.progress, text="⏳ Processing content...")
+            time.sleep(0.5)
+            st.rerun()
+        return handle
+    
+    def _analyze_upload(self, doc_key, name, data, text=None, progress_callback=None):
+        """Extract and analyze an upload and keep the result in the analysis store
+        
+        Runs as a queued job. ``text`` is the upload's already extracted text,
+        if any. Returns the store entry, or None when no text was found; an
+        invalid file raises ValueError with the reason.
+        """
+        stats = None
+        if text is None:
+            text, stats = self._extract_upload(name, data)
+        if progress_callback:
+            progress_callback(1, 3)
+        if not text:
+            return None
+        
+        # Tokenize once; stats and question generation reuse the document
+        document = self.text_processor.tokenize(text)
+        processed = self.text_processor.process_text(document)
+        if progress_callback:
+            progress_callback(2, 3)
+        stats = stats or self.text_processor.get_document_stats(document)
+        if progress_callback:
+            progress_callback(3, 3)
+        return self.analysis_store.put(doc_key, text, processed, stats, document=document)
+    
+    def _extract_upload(self, name, data):
+        """Extract an upload's text, returning ``(text, stats)``; stats are None unless it was streamed"""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(name)[1]) as tmp_file:
+            tmp_file.write(data)
+            file_path = tmp_file.name
+        
+        try:
+            valid, message = self.file_handler.validate_file(file_path, streaming=True)
+            if not valid:
+                raise ValueError(message)
+            
+            if self.file_handler.should_stream(file_path):
+                # Large uploads are counted segment by segment as they stream; only an
+                # evenly spread excerpt is kept for key phrases, topics and generation
+                return self.text_processor.read_stream(self.file_handler.iter_text_segments(file_path))
+            return self.file_handler.extract_text(file_path), None
+        finally:
+            os.unlink(file_path)
     
     def render_assessment(self):
         st.header("📝 Assessment & Evaluation Module")
@@ -224,19 +468,31 @@ class ExamPreparationApp:
         
         for i, question in enumerate(st.session_state.questions[:5]):  # Limit to 5 questions for demo
             st.write(f"**Q{i+1}: {question}**")
+            if self.corpus_index is not None and len(self.corpus_index):
+                with st.expander("📖 Related course passages"):
+                    for result in self.corpus_index.search(question, k=3):
+                        st.write(f"**{result['source']}:** {result['text']}")
             answer = st.text_area(f"Your answer for Q{i+1}:", key=f"answer_{i}", height=100)
+            with st.expander("📋 Model answer (optional, grades against its key points)"):
+                model_answer = st.text_area("Instructor's model answer:", key=f"model_answer_{i}", height=100)
             user_answers[i] = answer
             
             if st.button(f"Evaluate Q{i+1}", key=f"eval_{i}"):
                 if answer.strip():
                     with st.spinner("Evaluating..."):
-                        evaluation = self.assessment_engine.evaluate_answer(question, answer)
+                        evaluation = self.assessment_engine.evaluate_answer(question, answer, model_answer or None)
                         scores.append(evaluation['score'])
                         
                         st.success(f"**Score: {evaluation['score']}/10**")
                         st.write(f"**Feedback:** {evaluation['feedback']}")
                         st.write(f"**Strengths:** {', '.join(evaluation['strengths'])}")
                         st.write(f"**Improvements:** {', '.join(evaluation['improvements'])}")
+                        
+                        if 'rubric' in evaluation:
+                            st.write(f"**Key point coverage:** {evaluation['rubric']['coverage']:.0%}")
+                            for point in evaluation['rubric']['key_points']:
+                                mark = "✅" if point['covered'] else "❌"
+                                st.write(f"{mark} {point['key_point']} ({point['similarity']:.2f})")
                 else:
                     st.warning("Please provide an answer before evaluating.")
         
@@ -380,21 +636,60 @@ class ExamPreparationApp:
         for tip in tips:
             st.write(f"• {tip}")
 
+    def render_debug_panel(self):
+        st.markdown("---")
+        st.subheader("🐞 Pipeline Timings")
+        
+        stages = tracing.get_stage_stats()
+        if not stages:
+            st.write("No stages recorded yet. Use a module to collect timings.")
+            return
+        
+        st.dataframe([
+            {
+                'Stage': stage,
+                'Calls': stats['calls'],
+                'Total (s)': round(stats['seconds_total'], 4),
+                'Max (s)': round(stats['seconds_max'], 4),
+                'Input Size': stats['input_size_total']
+            }
+            for stage, stats in sorted(stages.items(), key=lambda item: -item[1]['seconds_total'])
+        ], use_container_width=True)
+        
+        counters = tracing.get_counters()
+        if counters:
+            st.write("**Counters:** " + ", ".join(f"{name}={value}" for name, value in sorted(counters.items())))
+        
+        with st.expander("Prometheus Export"):
+            st.code(tracing.prometheus_text(), language="text")
+        
+        if st.button("Reset Timings"):
+            tracing.reset()
+    
     def run(self):
         module = self.render_sidebar()
+        debug = st.session_state.get('debug_panel', False)
         
-        if module == "🏠 Dashboard":
-            self.render_dashboard()
-        elif module == "📚 Exam Preparation":
-            self.render_exam_preparation()
-        elif module == "📝 Assessment":
-            self.render_assessment()
-        elif module == "🔍 AI Content Detection":
-            self.render_ai_detection()
-        elif module == "✍️ Text Rewriting":
-            self.render_text_rewriting()
+        with tracing.thread_enabled() if debug else nullcontext():
+            if module == "🏠 Dashboard":
+                self.render_dashboard()
+            elif module == "📚 Exam Preparation":
+                self.render_exam_preparation()
+            elif module == "📝 Assessment":
+                self.render_assessment()
+            elif module == "🔍 AI Content Detection":
+                self.render_ai_detection()
+            elif module == "✍️ Text Rewriting":
+                self.render_text_rewriting()
+        
+        if debug:
+            self.render_debug_panel()
+
+@st.cache_resource
+def get_app():
+    """One app per process, so components and their caches survive reruns and are shared by sessions"""
+    return ExamPreparationApp()
 
 # Run the app
 if __name__ == "__main__":
-    app = ExamPreparationApp()
-    app.run()
+    get_app().run()
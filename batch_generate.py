@@ -0,0 +1,262 @@
+"""Headless bulk generation of question banks, MCQs and summaries
+
+Walks a directory of course files (PDF, DOCX, TXT), processes them in a process
+pool and streams one record per file to JSONL or Parquet. Finished files are
+recorded in a manifest keyed by file hash, so an interrupted run can be resumed
+by running the same command again.
+
+Parquet output needs pyarrow or fastparquet (``pip install .[parquet]``).
+
+Usage:
+    python batch_generate.py COURSE_DIR --output bank.jsonl --workers 8
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+PARQUET_ENGINES = ('pyarrow', 'fastparquet')
+
+_worker = {}
+
+
+def hash_file(path, block_size=1024 * 1024):
+    """SHA-256 of a file's bytes, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_course_files(directory):
+    """Supported course files under ``directory``, in a stable order"""
+    paths = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def _init_worker():
+    """Build the pipeline once per worker process"""
+    # Files are already spread over processes, so don't split documents again
+    os.environ.pop('EXAM_PREP_MAPREDUCE_WORKERS', None)
+
+    from modules.question_generator import QuestionGenerator
+    from modules.text_processing import TextProcessor
+    from utils.file_handlers import FileHandler
+
+    _worker['file_handler'] = FileHandler()
+    _worker['text_processor'] = TextProcessor()
+    _worker['question_generator'] = QuestionGenerator()
+
+
+def process_file(path, file_hash, options):
+    """Extract, analyze and generate study material for one file"""
+    started = time.perf_counter()
+    file_handler = _worker['file_handler']
+    text_processor = _worker['text_processor']
+    question_generator = _worker['question_generator']
+
+    valid, message = file_handler.validate_file(path, streaming=True)
+    if not valid:
+        return {'path': path, 'file_hash': file_hash, 'error': message}
+    if file_handler.should_stream(path):
+        # Statistics cover the whole file; generation works from a bounded excerpt
+        text, stats = text_processor.read_stream(file_handler.iter_text_segments(path))
+    else:
+        text = file_handler.extract_text(path)
+        stats = None
+    if not text:
+        return {'path': path, 'file_hash': file_hash, 'error': "Could not extract text"}
+
+    document = text_processor.tokenize(text)
+    processed = text_processor.process_text(document)
+    stats = stats or text_processor.get_document_stats(document)
+
+    return {
+        'path': path,
+        'file_hash': file_hash,
+        'word_count': stats['word_count'],
+        'sentence_count': stats['sentence_count'],
+        'key_phrases': processed['key_phrases'],
+        'topics': processed['topics'],
+        'questions': question_generator.generate_questions(document, options['num_questions'], seed=options['seed']),
+        'mcqs': question_generator.generate_mcqs(document, options['num_mcqs'], seed=options['seed']),
+        'summary': question_generator.generate_summary(document, options['summary_sentences']),
+        'seconds': time.perf_counter() - started
+    }
+
+
+class Manifest:
+    """Append-only record of file hashes that have been written to the output"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self.done.add(json.loads(line)['file_hash'])
+
+    def add(self, records):
+        with open(self.path, 'a') as f:
+            for record in records:
+                f.write(json.dumps({'file_hash': record['file_hash'], 'path': record['path']}) + "\n")
+                self.done.add(record['file_hash'])
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        return [record]
+
+    def close(self):
+        return []
+
+
+class ParquetWriter:
+    """Writes records as numbered Parquet part files of ``rows_per_part`` rows"""
+
+    def __init__(self, path, rows_per_part=100):
+        # Fail before any file is processed rather than at the first flush
+        if not any(importlib.util.find_spec(engine) for engine in PARQUET_ENGINES):
+            raise RuntimeError(
+                "Parquet output needs pyarrow or fastparquet; install one with "
+                "'pip install .[parquet]' or write to a .jsonl file instead"
+            )
+        self.base = path[:-len('.parquet')] if path.endswith('.parquet') else path
+        self.rows_per_part = rows_per_part
+        self.buffer = []
+        directory = os.path.dirname(os.path.abspath(self.base))
+        prefix = os.path.basename(self.base) + '-'
+        self.part = sum(1 for name in os.listdir(directory) if name.startswith(prefix))
+
+    def write(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.rows_per_part:
+            return self._flush()
+        return []
+
+    def _flush(self):
+        if not self.buffer:
+            return []
+        import pandas as pd
+
+        rows = [
+            {key: json.dumps(value) if isinstance(value, (list, dict)) else value for key, value in record.items()}
+            for record in self.buffer
+        ]
+        pd.DataFrame(rows).to_parquet(f"{self.base}-{self.part:05d}.parquet", index=False)
+        self.part += 1
+        written, self.buffer = self.buffer, []
+        return written
+
+    def close(self):
+        return self._flush()
+
+
+def run(directory, output, workers=None, num_questions=10, num_mcqs=5, summary_sentences=5, seed=0):
+    """Process every pending course file and return a throughput summary"""
+    manifest = Manifest(output + '.manifest')
+    writer = ParquetWriter(output) if output.endswith('.parquet') else JsonlWriter(output)
+    options = {
+        'num_questions': num_questions,
+        'num_mcqs': num_mcqs,
+        'summary_sentences': summary_sentences,
+        'seed': seed
+    }
+
+    pending = []
+    for path in find_course_files(directory):
+        file_hash = hash_file(path)
+        if file_hash not in manifest.done:
+            pending.append((path, file_hash))
+    logger.info(f"{len(pending)} files to process, {len(manifest.done)} already done")
+
+    started = time.perf_counter()
+    documents = tokens = failures = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(process_file, path, file_hash, options): path
+            for path, file_hash in pending
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                logger.error(f"Failed to process {futures[future]}: {e}")
+                failures += 1
+                continue
+            if record.get('error'):
+                logger.error(f"Failed to process {record['path']}: {record['error']}")
+                failures += 1
+                continue
+
+            manifest.add(writer.write(record))
+            documents += 1
+            tokens += record['word_count']
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"[{documents}/{len(pending)}] {record['path']} "
+                f"({documents / elapsed:.2f} docs/sec, {tokens / elapsed:.0f} tokens/sec)"
+            )
+    manifest.add(writer.close())
+
+    elapsed = time.perf_counter() - started
+    return {
+        'documents': documents,
+        'failures': failures,
+        'tokens': tokens,
+        'seconds': elapsed,
+        'docs_per_second': documents / elapsed if elapsed else 0.0,
+        'tokens_per_second': tokens / elapsed if elapsed else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help="directory of course files")
+    parser.add_argument('--output', default='question_bank.jsonl', help="output .jsonl or .parquet path")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--num-questions', type=int, default=10)
+    parser.add_argument('--num-mcqs', type=int, default=5)
+    parser.add_argument('--summary-sentences', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0, help="seed for question and option sampling")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        summary = run(
+            args.directory,
+            args.output,
+            workers=args.workers,
+            num_questions=args.num_questions,
+            num_mcqs=args.num_mcqs,
+            summary_sentences=args.summary_sentences,
+            seed=args.seed
+        )
+    except RuntimeError as e:
+        parser.error(str(e))
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Compare embedding backends on throughput, memory and cosine-score parity
+
+Each backend runs in its own subprocess so its resident memory is measured
+without the other runtimes loaded. The torch backend is always run as the
+parity reference.
+
+Usage:
+    python -m benchmarks.bench_backends --backends torch,onnx,int8 --texts 2000 --threads 4
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.corpus import generate_sentence
+
+
+def rss_bytes():
+    """Current resident set size, falling back to the peak where /proc is missing"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def make_texts(count, seed=0):
+    rng = random.Random(seed)
+    return [generate_sentence(rng) for _ in range(count)]
+
+
+def run_worker(backend, texts, threads, batch_size, output):
+    """Load one backend, encode the texts and save the embeddings to ``output``"""
+    from modules.embedding_service import EmbeddingService
+
+    baseline = rss_bytes()
+    service = EmbeddingService(batch_size=batch_size, backend=backend, num_threads=threads)
+    start = time.perf_counter()
+    service.model
+    load_seconds = time.perf_counter() - start
+    loaded = rss_bytes()
+
+    # Warm up kernels and allocator before timing
+    service.encode(texts[:batch_size])
+    start = time.perf_counter()
+    embeddings = service.encode(texts)
+    encode_seconds = time.perf_counter() - start
+    np.save(output, embeddings)
+
+    return {
+        'backend': backend,
+        'load_seconds': load_seconds,
+        'encode_seconds': encode_seconds,
+        'texts_per_second': len(texts) / encode_seconds,
+        'model_rss_bytes': loaded - baseline,
+        'rss_bytes': rss_bytes()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', default='torch,onnx,int8')
+    parser.add_argument('--texts', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--tolerance', type=float, default=0.02, help="max allowed cosine score error")
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--save', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    texts = make_texts(args.texts)
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, texts, args.threads, args.batch_size, args.save)))
+        return 0
+
+    from modules.embedding_service import score_parity
+
+    backends = [b for b in args.backends.split(',') if b]
+    if 'torch' not in backends:
+        backends.insert(0, 'torch')
+
+    results = {}
+    embeddings = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for backend in backends:
+            path = os.path.join(workdir, f'{backend}.npy')
+            command = [
+                sys.executable, '-m', 'benchmarks.bench_backends', '--worker', backend,
+                '--texts', str(args.texts), '--batch-size', str(args.batch_size), '--save', path
+            ]
+            if args.threads:
+                command += ['--threads', str(args.threads)]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"{backend}: failed\n{completed.stderr.strip()}", file=sys.stderr)
+                continue
+            results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+            embeddings[backend] = np.load(path)
+
+    if 'torch' not in embeddings:
+        print("The torch reference backend failed; no parity check possible", file=sys.stderr)
+        return 1
+
+    print(f"{'backend':<8} {'texts/s':>9} {'speedup':>8} {'model RSS':>10} {'max err':>8} {'parity':>7}")
+    reference = results['torch']
+    failed = False
+    for backend, result in results.items():
+        result['parity'] = score_parity(embeddings['torch'], embeddings[backend], args.tolerance)
+        failed |= not result['parity']['passed']
+        print(
+            f"{backend:<8} {result['texts_per_second']:9.1f} "
+            f"{result['texts_per_second'] / reference['texts_per_second']:7.2f}x "
+            f"{result['model_rss_bytes'] / 1024 ** 2:8.0f}MB "
+            f"{result['parity']['max_score_error']:8.4f} "
+            f"{'ok' if result['parity']['passed'] else 'FAIL':>7}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'texts': args.texts, 'threads': args.threads, 'results': results}, f, indent=2)
+    return 1 if failed or len(results) < len(backends) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
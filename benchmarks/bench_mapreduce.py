@@ -0,0 +1,80 @@
+"""Compare single-process analysis of a large document with chunked map-reduce
+
+Runs key phrase extraction and segmentation (``process_text`` without topic
+modeling), AI detection and important sentence selection on one document,
+first in-process and then over process pools of several sizes, and checks
+that every pool gives the single-process result.
+
+Usage:
+    python -m benchmarks.bench_mapreduce --size 16MB --workers 2,4,8
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.corpus import generate_text
+from benchmarks.run import parse_size
+from benchmarks.stub_encoder import StubEncoder, stub_embedding_service
+from modules.ai_detector import AIContentDetector
+from modules.embedding_service import EmbeddingService
+from modules.keyphrases import KeyphraseExtractor
+from modules.mapreduce import MapReduce
+from modules.question_generator import QuestionGenerator
+from modules.text_processing import TextProcessor
+
+
+def run_cases(text, map_reduce):
+    """Time each analysis on a fresh copy of the pipeline"""
+    processor = TextProcessor(keyphrase_extractor=KeyphraseExtractor(map_reduce=map_reduce), map_reduce=map_reduce)
+    detector = AIContentDetector(map_reduce=map_reduce)
+    generator = QuestionGenerator(EmbeddingService(model=StubEncoder()), map_reduce=map_reduce)
+
+    def process():
+        document = processor.tokenize(processor.clean_text(text))
+        return processor.extract_key_phrases(document), processor.segment_text(document)
+
+    cases = {
+        'process_text': process,
+        'analyze_text': lambda: detector.analyze_text(text),
+        'important_sentences': lambda: generator._extract_important_sentences(text)
+    }
+    times = {}
+    results = {}
+    for name, fn in cases.items():
+        start = time.perf_counter()
+        results[name] = fn()
+        times[name] = time.perf_counter() - start
+    return times, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='16MB')
+    parser.add_argument('--workers', default='2,4,8')
+    args = parser.parse_args(argv)
+
+    text = generate_text(parse_size(args.size), seed=1)
+    baseline_times, expected = run_cases(text, None)
+    print(f"{'workers':>7} " + " ".join(f"{name:>20}" for name in baseline_times))
+    print(f"{1:>7} " + " ".join(f"{seconds:19.2f}s" for seconds in baseline_times.values()))
+
+    for workers in [int(value) for value in args.workers.split(',')]:
+        map_reduce = MapReduce(workers, min_size=0, embedding_factory=stub_embedding_service)
+        try:
+            # Start the workers before timing
+            map_reduce.map(len, ["warm-up"] * workers)
+            times, actual = run_cases(text, map_reduce)
+        finally:
+            map_reduce.shutdown()
+        for name in expected:
+            if actual[name] != expected[name]:
+                print(f"{workers} workers: {name} differs from the single-process result", file=sys.stderr)
+                return 1
+        print(f"{workers:>7} " + " ".join(
+            f"{seconds:11.2f}s ({baseline_times[name] / seconds:4.1f}x)" for name, seconds in times.items()
+        ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
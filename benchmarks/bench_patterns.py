@@ -0,0 +1,109 @@
+"""Micro-benchmarks for the shared precompiled patterns
+
+Compares the per-call regex code the text modules used before against the
+scanners in ``modules.patterns`` on a 10k-sentence input, checking that both
+produce the same results.
+
+Usage:
+    python -m benchmarks.bench_patterns --sentences 10000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from benchmarks.corpus import generate_sentence
+from modules import patterns
+
+
+def legacy_structure(answer):
+    return [
+        len(re.findall(r'\b(first|second|third|finally)\b', answer.lower())) > 0,
+        len(re.findall(r'\b(therefore|however|moreover)\b', answer.lower())) > 0,
+        answer.count('.') >= 2,
+        len(answer.split('\n')) > 1 or answer.count(',') >= 3,
+        any(word in answer.lower() for word in ['example', 'for instance', 'such as'])
+    ]
+
+
+def scanned_structure(answer):
+    structure = patterns.scan_structure(answer)
+    return [
+        structure['sequence'] > 0,
+        structure['connective'] > 0,
+        structure['period'] >= 2,
+        structure['newline'] > 0 or structure['comma'] >= 3,
+        structure['example'] > 0
+    ]
+
+
+def legacy_simplify(sentence):
+    for complex_word, simple_word in patterns.SIMPLE_REPLACEMENTS.items():
+        sentence = re.sub(r'\b' + complex_word + r'\b', simple_word, sentence, flags=re.IGNORECASE)
+    return sentence
+
+
+def legacy_clean(text):
+    text = re.sub(r'\s+', ' ', text)
+    return re.sub(r'[^\w\s.,!?;:]', '', text).strip()
+
+
+def compiled_clean(text):
+    text = patterns.WHITESPACE.sub(' ', text)
+    return patterns.NON_BASIC_CHARS.sub('', text).strip()
+
+
+def timed(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sentences', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    words = ['utilize', 'facilitate', 'implement', 'numerous', 'terminate', 'Utilize']
+    sentences = [
+        generate_sentence(rng).replace('explains', rng.choice(words)) for _ in range(args.sentences)
+    ]
+    text = " ".join(sentences)
+    answers = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+
+    cases = [
+        ('structure scan (per answer)',
+         lambda: [legacy_structure(a) for a in answers],
+         lambda: [scanned_structure(a) for a in answers]),
+        ('simplify (per sentence)',
+         lambda: [legacy_simplify(s) for s in sentences],
+         lambda: [patterns.simplify_words(s)[0] for s in sentences]),
+        ('sentence split',
+         lambda: re.split(r'[.!?]+', text),
+         lambda: patterns.split_sentences(text)),
+        ('clean text',
+         lambda: legacy_clean(text),
+         lambda: compiled_clean(text))
+    ]
+
+    print(f"{'case':<30} {'legacy':>10} {'compiled':>10} {'speedup':>8}")
+    for name, legacy, compiled in cases:
+        legacy_time, legacy_result = timed(legacy, args.repeat)
+        compiled_time, compiled_result = timed(compiled, args.repeat)
+        if legacy_result != compiled_result:
+            print(f"{name}: results differ", file=sys.stderr)
+            return 1
+        print(f"{name:<30} {legacy_time:10.4f} {compiled_time:10.4f} {legacy_time / compiled_time:7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
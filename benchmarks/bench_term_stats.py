@@ -0,0 +1,71 @@
+"""Compare Counter-based key-term extraction with interned TermStats arrays
+
+Measures wall time and peak traced memory of the top-20 key terms and the
+most repeated word at several document sizes, checking both give the same
+terms.
+
+Usage:
+    python -m benchmarks.bench_term_stats --sizes 1MB,4MB,16MB
+"""
+import argparse
+import gc
+import re
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from benchmarks.corpus import generate_text
+from benchmarks.run import format_size, parse_size
+from modules.term_stats import TermStats
+
+KEY_TERM_WORD = re.compile(r'\b[a-zA-Z]{4,}\b')
+COMMON_WORDS = {'which', 'what', 'when', 'where', 'why', 'how', 'this', 'that', 'with', 'from'}
+
+
+def counter_terms(text):
+    words = KEY_TERM_WORD.findall(text.lower())
+    filtered = [word for word in words if word not in COMMON_WORDS]
+    terms = [term for term, _ in Counter(filtered).most_common(20)]
+    return terms, max(Counter(text.lower().split()).values())
+
+
+def array_terms(text):
+    lower = text.lower()
+    stats = TermStats.from_tokens(match.group() for match in KEY_TERM_WORD.finditer(lower))
+    return stats.top_terms(20, exclude=COMMON_WORDS), TermStats.from_tokens(lower.split()).max_count()
+
+
+def measure(fn, text):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(text)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1MB,4MB,16MB')
+    args = parser.parse_args(argv)
+
+    print(f"{'size':>6} {'counter s':>10} {'arrays s':>9} {'counter peak':>13} {'arrays peak':>12}")
+    for size in [parse_size(value) for value in args.sizes.split(',')]:
+        text = generate_text(size, seed=size)
+        counter_time, counter_peak, expected = measure(counter_terms, text)
+        array_time, array_peak, actual = measure(array_terms, text)
+        if expected != actual:
+            print(f"{format_size(size)}: results differ", file=sys.stderr)
+            return 1
+        print(
+            f"{format_size(size):>6} {counter_time:10.3f} {array_time:9.3f} "
+            f"{counter_peak / 1024 ** 2:11.1f}MB {array_peak / 1024 ** 2:10.1f}MB"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import random
+
+SUBJECTS = [
+    'photosynthesis', 'cellular respiration', 'the mitochondria', 'enzyme kinetics',
+    'natural selection', 'plate tectonics', 'the water cycle', 'supply and demand',
+    'market equilibrium', 'thermodynamics', 'electromagnetic induction', 'the French Revolution',
+    'binary search', 'dynamic programming', 'operating systems', 'memory management',
+    'protein synthesis', 'gene expression', 'climate change', 'monetary policy'
+]
+
+VERBS = [
+    'explains', 'determines', 'influences', 'describes', 'regulates', 'transforms',
+    'depends on', 'contributes to', 'is closely related to', 'can be measured by'
+]
+
+OBJECTS = [
+    'the rate of energy transfer', 'the behaviour of complex systems', 'long-term stability',
+    'the distribution of resources', 'the structure of the model', 'observable outcomes',
+    'the efficiency of the process', 'key experimental results', 'the underlying mechanism',
+    'real-world applications'
+]
+
+CONNECTORS = [
+    'In addition,', 'For example,', 'However,', 'As a result,', 'Moreover,',
+    'In practice,', 'Historically,', 'First,', 'Finally,', 'Therefore,'
+]
+
+
+def generate_sentence(rng):
+    """Build one course-material style sentence"""
+    sentence = f"{rng.choice(SUBJECTS).capitalize()} {rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+    if rng.random() < 0.4:
+        sentence = f"{rng.choice(CONNECTORS)} {sentence[0].lower()}{sentence[1:]}"
+    if rng.random() < 0.3:
+        sentence += f", such as {rng.choice(OBJECTS)}"
+    return sentence + rng.choice(['.', '.', '.', '?', '!'])
+
+
+def generate_text(size_bytes, seed=0):
+    """Generate deterministic synthetic course material of about ``size_bytes``"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size_bytes:
+        paragraph = " ".join(generate_sentence(rng) for _ in range(rng.randint(3, 8)))
+        parts.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(parts)[:max(size_bytes, 1)]
+
+
+def generate_answers(count, size_bytes=600, seed=0):
+    """Generate deterministic (question, answer) pairs"""
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        question = f"Explain the concept of {rng.choice(SUBJECTS)} in your own words."
+        pairs.append((question, generate_text(size_bytes, seed=seed * 100003 + i)))
+    return pairs
+
+
+def write_txt(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def write_docx(path, text):
+    import docx
+
+    document = docx.Document()
+    for paragraph in text.split("\n\n"):
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+
+def write_pdf(path, text, lines_per_page=50, chars_per_line=90):
+    """Write text as a minimal multi-page PDF using the built-in Helvetica font"""
+    words = text.split()
+    lines = []
+    current = ""
+    for word in words:
+        if current and len(current) + 1 + len(word) > chars_per_line:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    page_refs = []
+    for page_lines in pages:
+        content = ["BT /F1 10 Tf 14 TL 50 760 Td"]
+        for line in page_lines:
+            escaped = line.encode('latin-1', errors='replace').decode('latin-1')
+            escaped = escaped.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            content.append(f"({escaped}) Tj T*")
+        content.append("ET")
+        stream = "\n".join(content).encode('latin-1')
+
+        page_id = len(objects) + 1
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_refs.append(f"{page_id} 0 R")
+
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(pages)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, 'wb') as f:
+        f.write(output)
@@ -0,0 +1,195 @@
+"""Benchmark the hot path of every module on synthetic course material
+
+Usage:
+    python -m benchmarks.run --sizes 1KB,100KB,1MB --output bench.json
+    python -m benchmarks.run --sizes 1MB --compare bench.json --threshold 0.25
+
+By default the embedding model is replaced with a deterministic local stub so
+the suite runs offline; pass ``--real-model`` to benchmark SentenceTransformer.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import generate_answers, generate_text, write_docx, write_pdf, write_txt
+from benchmarks.stub_encoder import StubEncoder
+
+UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def parse_size(value):
+    """Parse sizes such as ``512``, ``10KB`` or ``50MB`` into bytes"""
+    value = value.strip().upper()
+    for unit in ('GB', 'MB', 'KB', 'B'):
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * UNITS[unit])
+    return int(value)
+
+
+def format_size(size):
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def measure(fn, repeat=1, setup=None):
+    """Run ``fn`` and return its best wall time and peak traced memory
+
+    ``setup`` runs untimed before every run, e.g. to clear caches.
+    """
+    best = None
+    peak = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def build_components(real_model=False):
+    """Create the modules under test, sharing one (stub or real) encoder"""
+    from modules.ai_detector import AIContentDetector
+    from modules.assessment_engine import AssessmentEngine
+    from modules.embedding_service import EmbeddingService
+    from modules.question_generator import QuestionGenerator
+    from modules.text_processing import TextProcessor
+    from modules.text_rewriter import TextRewriter
+    from modules.topic_model import CourseTopicModel
+    from utils.file_handlers import FileHandler
+
+    # No embedding cache, so repeated runs measure the model path
+    embedder = EmbeddingService(model=None if real_model else StubEncoder())
+    return {
+        'file_handler': FileHandler(),
+        # A private in-memory topic model, so that resetting it leaves no trace
+        'text_processor': TextProcessor(topic_model=CourseTopicModel()),
+        'question_generator': QuestionGenerator(embedder),
+        'assessment_engine': AssessmentEngine(embedder),
+        'ai_detector': AIContentDetector(),
+        'text_rewriter': TextRewriter()
+    }
+
+
+def reset_caches(components):
+    """Drop results memoized by earlier runs so that every run is timed cold"""
+    components['question_generator'].clear_cache()
+    components['text_processor'].keyphrases.clear_cache()
+    components['text_processor'].topic_model.reset()
+    components['text_rewriter'].clear_cache()
+
+
+def benchmark_size(components, size, workdir, repeat=1, answers=20, verbose=True, seed=None):
+    """Run every benchmark for one corpus size"""
+    seed = size if seed is None else seed
+    text = generate_text(size, seed=seed)
+    files = {}
+    for extension, writer in (('txt', write_txt), ('docx', write_docx), ('pdf', write_pdf)):
+        path = os.path.join(workdir, f"corpus_{size}.{extension}")
+        writer(path, text)
+        files[extension] = path
+
+    file_handler = components['file_handler']
+    text_processor = components['text_processor']
+    question_generator = components['question_generator']
+    assessment_engine = components['assessment_engine']
+    answer_pairs = generate_answers(answers, size_bytes=min(size, 2000), seed=seed)
+
+    cases = {
+        'extract_text.txt': lambda: file_handler.extract_text(files['txt']),
+        'extract_text.docx': lambda: file_handler.extract_text(files['docx']),
+        'extract_text.pdf': lambda: file_handler.extract_text(files['pdf']),
+        'process_text': lambda: text_processor.process_text(text),
+        'generate_questions': lambda: question_generator.generate_questions(text),
+        'generate_mcqs': lambda: question_generator.generate_mcqs(text),
+        'generate_summary': lambda: question_generator.generate_summary(text),
+        'evaluate_answer': lambda: [assessment_engine.evaluate_answer(q, a) for q, a in answer_pairs],
+        'analyze_text': lambda: components['ai_detector'].analyze_text(text),
+        'rewrite_text': lambda: components['text_rewriter'].rewrite_text(text)
+    }
+
+    results = {}
+    for name, fn in cases.items():
+        key = f"{name}@{format_size(size)}"
+        results[key] = measure(fn, repeat, setup=lambda: reset_caches(components))
+        if verbose:
+            print(f"{name:<22} {format_size(size):>6} {results[key]['seconds']:9.4f}s", file=sys.stderr)
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Return benchmarks whose time grew by more than ``threshold`` (a fraction)"""
+    regressions = []
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or previous['seconds'] <= 0:
+            continue
+        change = result['seconds'] / previous['seconds'] - 1
+        if change > threshold:
+            regressions.append((name, previous['seconds'], result['seconds'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1KB,100KB,1MB', help="comma-separated corpus sizes (1KB to 50MB)")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per benchmark; the best time is kept")
+    parser.add_argument('--answers', type=int, default=20, help="answers graded per evaluate_answer run")
+    parser.add_argument('--output', help="write results JSON to this path")
+    parser.add_argument('--compare', help="baseline results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument('--real-model', action='store_true', help="use SentenceTransformer instead of the stub")
+    args = parser.parse_args(argv)
+
+    components = build_components(args.real_model)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        # Warm up on a tiny corpus so first-use imports and model loads are not timed; its own
+        # seed keeps it from matching the 1KB case
+        benchmark_size(components, 1024, workdir, answers=1, verbose=False, seed=0)
+        for size in [parse_size(s) for s in args.sizes.split(',') if s.strip()]:
+            results.update(benchmark_size(components, size, workdir, args.repeat, args.answers))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'encoder': 'sentence-transformers' if args.real_model else 'stub',
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: {before:.4f}s -> {after:.4f}s (+{change:.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,33 @@
+import hashlib
+import numpy as np
+
+
+class StubEncoder:
+    """Offline stand-in for SentenceTransformer with deterministic embeddings
+
+    Each text maps to a bag of hashed word vectors, so related texts still get
+    related embeddings while no model download or torch import is needed.
+    """
+
+    def __init__(self, dimension=384):
+        self.dimension = dimension
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split()[:256]:
+                digest = hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], 'little') % self.dimension
+                sign = 1.0 if digest[4] & 1 else -1.0
+                embeddings[row, index] += sign
+        return embeddings
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+
+def stub_embedding_service():
+    """Embedding service backed by the stub, e.g. as a map-reduce worker ``embedding_factory``"""
+    from modules.embedding_service import EmbeddingService
+
+    return EmbeddingService(model=StubEncoder())
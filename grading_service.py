@@ -0,0 +1,361 @@
+"""HTTP grading and AI-detection service for programmatic (LMS) access
+
+A dependency-free ASGI application exposing:
+
+    POST /grade    {"question": ..., "answer": ..., "model_answer": ...}
+    POST /detect   {"text": ...}
+    GET  /health   readiness and queue depths
+    GET  /metrics  Prometheus latency and batch-size histograms
+
+Each worker process loads and warms one embedding model at startup. Concurrent
+requests are grouped by a micro-batcher so that they share a single
+``evaluate_answers`` / ``analyze_batch`` call. When a queue holds
+``EXAM_PREP_SERVICE_MAX_QUEUE`` waiting requests, new ones get ``503`` with
+``Retry-After`` instead of queueing without bound.
+
+Usage (requires an ASGI server such as uvicorn):
+    python grading_service.py --host 0.0.0.0 --port 8000 --workers 2
+
+Without a server, ``LocalClient`` drives the app in-process:
+    with LocalClient(create_app()) as client:
+        client.post('/grade', {'question': ..., 'answer': ...}).json()
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from utils import tracing
+from utils.micro_batcher import Histogram, MicroBatcher, QueueFullError
+
+logger = logging.getLogger(__name__)
+
+ROUTES = ('/grade', '/detect', '/health', '/metrics')
+
+
+class GradingService:
+    """ASGI app wrapping AssessmentEngine and AIContentDetector behind micro-batchers"""
+
+    def __init__(self, engine=None, detector=None, max_batch_size=64, max_wait_ms=5,
+                 max_queue=256, max_body_bytes=1024 * 1024):
+        self._engine = engine
+        self._detector = detector
+        self.max_body_bytes = max_body_bytes
+        self.ready = False
+        self.grader = MicroBatcher(self._grade_batch, max_batch_size, max_wait_ms, max_queue, name='grade')
+        self.detector_batcher = MicroBatcher(self._detect_batch, max_batch_size, max_wait_ms, max_queue, name='detect')
+        self.latency = {route: Histogram() for route in ROUTES}
+        self.responses = {}
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from modules.assessment_engine import AssessmentEngine
+            self._engine = AssessmentEngine()
+        return self._engine
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            from modules.ai_detector import AIContentDetector
+            self._detector = AIContentDetector()
+        return self._detector
+
+    def warm_up(self):
+        """Load the model and run one tiny request through each pipeline"""
+        try:
+            self.engine.evaluate_answer("Warm-up question?", "A short warm-up answer.")
+            self.detector.analyze_text("A short warm-up text. It has two sentences.")
+            self.ready = True
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}")
+
+    def _grade_batch(self, items):
+        return self.engine.evaluate_answers(items)
+
+    def _detect_batch(self, texts):
+        return self.detector.analyze_batch(texts)
+
+    async def startup(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.warm_up)
+        self.grader.start()
+        self.detector_batcher.start()
+
+    async def shutdown(self):
+        await self.grader.stop()
+        await self.detector_batcher.stop()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._handle_http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _handle_http(self, scope, receive, send):
+        started = time.perf_counter()
+        path = scope['path']
+        status, body, headers = await self._dispatch(scope['method'], path, receive)
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+        if path in self.latency:
+            self.latency[path].observe(time.perf_counter() - started)
+            key = (path, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    async def _dispatch(self, method, path, receive):
+        """Route a request and return (status, body bytes, headers)"""
+        if path == '/metrics' and method == 'GET':
+            return 200, self.metrics_text().encode('utf-8'), [('content-type', 'text/plain; version=0.0.4')]
+        if path == '/health' and method == 'GET':
+            return _json_response(200 if self.ready else 503, self.health())
+        if path not in ('/grade', '/detect'):
+            return _json_response(404, {'error': f"Unknown path {path}"})
+        if method != 'POST':
+            return _json_response(405, {'error': "Use POST"})
+
+        try:
+            payload = await self._read_json(receive)
+            if path == '/grade':
+                item = _require_fields(payload, ('question', 'answer'), ('model_answer',))
+                result = await self.grader.submit((item['question'], item['answer'], item.get('model_answer')))
+            else:
+                item = _require_fields(payload, ('text',), ())
+                result = await self.detector_batcher.submit(item['text'])
+        except ValueError as e:
+            return _json_response(400, {'error': str(e)})
+        except QueueFullError as e:
+            status, body, headers = _json_response(503, {'error': str(e)})
+            return status, body, headers + [('retry-after', '1')]
+        except Exception as e:
+            logger.error(f"Request to {path} failed: {e}")
+            return _json_response(500, {'error': "Internal error"})
+        return _json_response(200, result)
+
+    async def _read_json(self, receive):
+        """Read the request body, enforcing ``max_body_bytes``"""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise ValueError("Client disconnected")
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise ValueError(f"Request body larger than {self.max_body_bytes} bytes")
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+        try:
+            return json.loads(b''.join(chunks) or b'null')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+
+    def health(self):
+        return {
+            'ready': self.ready,
+            'grade': self.grader.get_stats(),
+            'detect': self.detector_batcher.get_stats()
+        }
+
+    def metrics_text(self, prefix='exam_prep'):
+        """Service histograms in the Prometheus text format, followed by pipeline tracing"""
+        lines = [
+            f"# HELP {prefix}_request_seconds Request latency by route",
+            f"# TYPE {prefix}_request_seconds histogram"
+        ]
+        for route, histogram in self.latency.items():
+            lines.extend(histogram.prometheus_lines(f"{prefix}_request_seconds", f'route="{route}"'))
+
+        lines.append(f"# HELP {prefix}_responses_total Responses by route and status")
+        lines.append(f"# TYPE {prefix}_responses_total counter")
+        for (route, status), value in sorted(self.responses.items()):
+            lines.append(f'{prefix}_responses_total{{route="{route}",status="{status}"}} {value}')
+
+        batchers = (self.grader, self.detector_batcher)
+        histograms = [
+            ('batch_size', 'Requests per model batch', 'batch_sizes'),
+            ('queue_wait_seconds', 'Time requests wait before their batch starts', 'queue_wait'),
+            ('batch_seconds', 'Time to process one batch', 'batch_seconds')
+        ]
+        for name, help_text, attribute in histograms:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for batcher in batchers:
+                lines.extend(getattr(batcher, attribute).prometheus_lines(
+                    f"{prefix}_{name}", f'batcher="{batcher.name}"'
+                ))
+
+        lines.append(f"# HELP {prefix}_queue_depth Requests waiting for a batch")
+        lines.append(f"# TYPE {prefix}_queue_depth gauge")
+        for batcher in batchers:
+            lines.append(f'{prefix}_queue_depth{{batcher="{batcher.name}"}} {batcher.depth}')
+        lines.append(f"# HELP {prefix}_rejected_total Requests refused because the queue was full")
+        lines.append(f"# TYPE {prefix}_rejected_total counter")
+        for batcher in batchers:
+            lines.append(f'{prefix}_rejected_total{{batcher="{batcher.name}"}} {batcher.rejected}')
+
+        return "\n".join(lines) + "\n" + tracing.prometheus_text(prefix)
+
+
+def _json_response(status, payload):
+    return status, json.dumps(payload).encode('utf-8'), [('content-type', 'application/json')]
+
+
+def _require_fields(payload, required, optional):
+    """Validate a JSON object of string fields"""
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object")
+    for field in required:
+        if not isinstance(payload.get(field), str):
+            raise ValueError(f"'{field}' must be a string")
+    for field in optional:
+        if payload.get(field) is not None and not isinstance(payload[field], str):
+            raise ValueError(f"'{field}' must be a string")
+    return payload
+
+
+def create_app(**kwargs):
+    """Build the service, taking batching limits from ``EXAM_PREP_SERVICE_*`` variables"""
+    options = {
+        'max_batch_size': int(os.environ.get('EXAM_PREP_SERVICE_MAX_BATCH', 64)),
+        'max_wait_ms': float(os.environ.get('EXAM_PREP_SERVICE_MAX_WAIT_MS', 5)),
+        'max_queue': int(os.environ.get('EXAM_PREP_SERVICE_MAX_QUEUE', 256))
+    }
+    options.update(kwargs)
+    return GradingService(**options)
+
+
+app = create_app()
+
+
+class LocalResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8')
+
+
+class LocalClient:
+    """Call an ASGI app in-process on a private event loop
+
+    Used as a context manager it also runs the lifespan startup and shutdown,
+    so requests hit a warmed-up service exactly as they would under a server.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+        self._lifespan_task = None
+        self._lifespan_inbox = None
+        self._lifespan_outbox = None
+
+    def __enter__(self):
+        self.loop.run_until_complete(self._lifespan('startup'))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.loop.run_until_complete(self._lifespan('shutdown'))
+        self.loop.close()
+        return False
+
+    async def _lifespan(self, phase):
+        if self._lifespan_task is None:
+            self._lifespan_inbox = asyncio.Queue()
+            self._lifespan_outbox = asyncio.Queue()
+            self._lifespan_task = asyncio.get_running_loop().create_task(
+                self.app({'type': 'lifespan'}, self._lifespan_inbox.get, self._lifespan_outbox.put)
+            )
+        await self._lifespan_inbox.put({'type': f'lifespan.{phase}'})
+        message = await self._lifespan_outbox.get()
+        if message['type'] != f'lifespan.{phase}.complete':
+            raise RuntimeError(f"Lifespan {phase} failed: {message}")
+
+    async def request(self, method, path, payload=None):
+        """Send one request and collect the response"""
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'headers': [(b'content-type', b'application/json')],
+            'query_string': b''
+        }
+        sent = False
+        messages = []
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {'type': 'http.disconnect'}
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app(scope, receive, send)
+        start = next(m for m in messages if m['type'] == 'http.response.start')
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in start['headers']}
+        body = b''.join(m.get('body', b'') for m in messages if m['type'] == 'http.response.body')
+        return LocalResponse(start['status'], headers, body)
+
+    def get(self, path):
+        return self.loop.run_until_complete(self.request('GET', path))
+
+    def post(self, path, payload):
+        return self.loop.run_until_complete(self.request('POST', path, payload))
+
+    def post_many(self, path, payloads):
+        """Send requests concurrently, as simultaneous clients would"""
+        async def send_all():
+            return await asyncio.gather(*(self.request('POST', path, payload) for payload in payloads))
+        return self.loop.run_until_complete(send_all())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help="worker processes, each with its own model")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        import uvicorn
+    except ImportError:
+        logger.error("An ASGI server is needed to serve HTTP: pip install uvicorn")
+        return 1
+    uvicorn.run('grading_service:app', host=args.host, port=args.port, workers=args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,85 +1,258 @@
+import functools
+import math
 import re
+import string
 import numpy as np
-from textstat import flesch_reading_ease, syllable_count
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from modules.mapreduce import get_map_reduce
+from modules.term_stats import Vocabulary
+from modules.tokenized_document import TokenizedDocument
+from utils.lazy_import import lazy_import
+from utils import tracing
+
+textstat = lazy_import('textstat')
+
+# textstat's sentence pattern for Flesch reading ease
+READABILITY_SENTENCE = re.compile(r'\b[^.!?]+[.!?]*')
+
+
+class PhraseMatcher:
+    """Word-level trie for counting indicator phrases in a token list"""
+
+    def __init__(self, phrases):
+        self.trie = {}
+        for phrase in phrases:
+            node = self.trie
+            for word in phrase.lower().split():
+                node = node.setdefault(word, {})
+            node[None] = True
+
+    def count(self, words):
+        """Count non-overlapping longest phrase matches in ``words``"""
+        words = [word.strip(string.punctuation) for word in words]
+        matches = 0
+        i = 0
+        n = len(words)
+        while i < n:
+            node = self.trie.get(words[i])
+            if node is None:
+                i += 1
+                continue
+
+            match_end = i + 1 if None in node else 0
+            j = i + 1
+            while j < n:
+                node = node.get(words[j])
+                if node is None:
+                    break
+                j += 1
+                if None in node:
+                    match_end = j
+
+            if match_end:
+                matches += 1
+                i = match_end
+            else:
+                i += 1
+        return matches
+
+
+def readability_counts(text):
+    """Words, sentences and syllables of a text as textstat counts them
+
+    Unlike ``textstat.sentence_count`` the sentence count is not clamped to
+    at least 1, so counts of consecutive chunks of a text can be summed.
+    """
+    sentences = READABILITY_SENTENCE.findall(text)
+    sentence_count = sum(1 for sentence in sentences if textstat.lexicon_count(sentence) > 2)
+    return textstat.lexicon_count(text), sentence_count, textstat.syllable_count(text)
+
+
+def pooled_reading_ease(words, sentences, syllables):
+    """Flesch reading ease from summed ``readability_counts``, rounded like textstat's English formula"""
+    sentence_length = _round(words / max(1, sentences), 1)
+    syllables_per_word = _round(syllables / words, 1) if words else 0.0
+    return _round(206.835 - 1.015 * sentence_length - 84.6 * syllables_per_word, 2)
+
+
+def _round(number, points):
+    scale = 10 ** points
+    return math.floor(number * scale + math.copysign(0.5, number)) / scale
+
+
+def chunk_counts(text, matcher):
+    """Additive detector counts of one chunk of a larger text"""
+    document = TokenizedDocument(text)
+    stats = document.whitespace_stats
+    return {
+        'word_count': len(document.whitespace_words),
+        'sentence_lengths': [len(s.split()) for s in document.split_sentences if s.strip()],
+        'ai_word_count': matcher.count(document.whitespace_words),
+        'terms': stats.vocabulary.terms,
+        'term_counts': stats.counts,
+        'readability': readability_counts(text)
+    }
+
 
 class AIContentDetector:
-    def __init__(self):
+    def __init__(self, map_reduce=None):
+        self.map_reduce = (map_reduce if map_reduce is not None else get_map_reduce()) or None
         self.ai_indicators = [
             'highly', 'delve', 'tapestry', 'realm', 'testament',
             'moreover', 'furthermore', 'additionally', 'however',
             'it is important to note', 'in conclusion'
         ]
-        
+        self.indicator_matcher = PhraseMatcher(self.ai_indicators)
+
     def analyze_text(self, text):
         """Analyze text for AI-generated patterns"""
-        features = self._extract_features(text)
-        ai_probability = self._calculate_ai_probability(features)
-        
-        return {
-            'ai_probability': ai_probability,
-            'features': features,
-            'verdict': 'AI-generated' if ai_probability > 0.7 else 
-                      'Mixed' if ai_probability > 0.4 else 
-                      'Human-written'
-        }
-    
+        return self.analyze_batch([text])[0]
+
+    @tracing.traced('ai_detector.analyze_batch')
+    def analyze_batch(self, texts, workers=None):
+        """Analyze many texts, computing features and scores as arrays
+
+        ``workers`` > 1 computes readability in a process pool. Each result is
+        identical to ``analyze_text`` on the same text.
+        """
+        documents = [TokenizedDocument.of(text) for text in texts]
+        if not documents:
+            return []
+
+        features = self._extract_batch_features(documents, workers)
+        probabilities = self._calculate_ai_probabilities(features)
+
+        results = []
+        for i, ai_probability in enumerate(probabilities.tolist()):
+            results.append({
+                'ai_probability': ai_probability,
+                'features': {name: values[i].item() for name, values in features.items()},
+                'verdict': 'AI-generated' if ai_probability > 0.7 else
+                          'Mixed' if ai_probability > 0.4 else
+                          'Human-written'
+            })
+        return results
+
     def _extract_features(self, text):
         """Extract linguistic features for detection"""
-        words = text.lower().split()
-        sentences = re.split(r'[.!?]+', text)
-        
-        # Basic statistics
-        word_count = len(words)
-        sentence_count = len([s for s in sentences if s.strip()])
-        avg_sentence_length = word_count / max(1, sentence_count)
-        
-        # Readability score
-        readability = flesch_reading_ease(text)
-        
-        # AI indicator words
-        ai_word_count = sum(1 for word in words if word in self.ai_indicators)
-        ai_word_ratio = ai_word_count / max(1, word_count)
-        
-        # Repetition analysis
-        word_freq = Counter(words)
-        most_common_count = word_freq.most_common(1)[0][1] if word_freq else 0
-        repetition_ratio = most_common_count / max(1, word_count)
-        
-        # Sentence structure variation
-        sentence_lengths = [len(s.split()) for s in sentences if s.strip()]
-        sentence_variation = np.std(sentence_lengths) if sentence_lengths else 0
-        
+        features = self._extract_batch_features([TokenizedDocument.of(text)])
+        return {name: values[0].item() for name, values in features.items()}
+
+    def _extract_batch_features(self, documents, workers=None):
+        """Extract linguistic features for a batch of documents as arrays
+
+        With a map-reduce pool, each large document is counted chunk by chunk
+        in the pool: word, indicator and term counts are summed, sentence
+        lengths concatenated and readability pooled from summed counts.
+        """
+        word_counts = []
+        sentence_counts = []
+        ai_word_counts = []
+        most_common_counts = []
+        sentence_variations = []
+        pooled_readability = {}
+
+        for i, document in enumerate(documents):
+            if self.map_reduce is not None and self.map_reduce.should_split(len(document.text)):
+                counts = self._map_reduce_counts(document.text)
+                pooled_readability[i] = pooled_reading_ease(*counts['readability'])
+            else:
+                counts = self._document_counts(document)
+
+            # Sentence structure variation
+            sentence_lengths = counts['sentence_lengths']
+            sentence_variations.append(np.std(sentence_lengths) if sentence_lengths else 0.0)
+
+            word_counts.append(counts['word_count'])
+            sentence_counts.append(len(sentence_lengths))
+            ai_word_counts.append(counts['ai_word_count'])
+            most_common_counts.append(counts['most_common_count'])
+
+        word_count = np.array(word_counts, dtype=np.int64)
+        denominator = np.maximum(1, word_count)
+
+        local_scores = iter(self._readability_scores(
+            [document for i, document in enumerate(documents) if i not in pooled_readability], workers
+        ))
+        readability = [
+            pooled_readability[i] if i in pooled_readability else next(local_scores)
+            for i in range(len(documents))
+        ]
+
         return {
-            'avg_sentence_length': avg_sentence_length,
-            'readability_score': readability,
-            'ai_word_ratio': ai_word_ratio,
-            'repetition_ratio': repetition_ratio,
-            'sentence_variation': sentence_variation,
+            'avg_sentence_length': word_count / np.maximum(1, np.array(sentence_counts)),
+            'readability_score': np.array(readability, dtype=np.float64),
+            'ai_word_ratio': np.array(ai_word_counts) / denominator,
+            'repetition_ratio': np.array(most_common_counts) / denominator,
+            'sentence_variation': np.array(sentence_variations, dtype=np.float64),
             'word_count': word_count
         }
-    
+
+    def _document_counts(self, document):
+        words = document.whitespace_words
+        return {
+            'word_count': len(words),
+            'sentence_lengths': [len(s.split()) for s in document.split_sentences if s.strip()],
+            # AI indicator words and phrases
+            'ai_word_count': self.indicator_matcher.count(words),
+            # Repetition analysis
+            'most_common_count': document.whitespace_stats.max_count()
+        }
+
+    @tracing.traced('ai_detector.map_reduce')
+    def _map_reduce_counts(self, text):
+        """``_document_counts`` of a large text, merged from per-chunk counts"""
+        chunks = self.map_reduce.split(text)
+        parts = self.map_reduce.map(functools.partial(chunk_counts, matcher=self.indicator_matcher), chunks)
+
+        vocabulary = Vocabulary()
+        term_counts = np.zeros(0, dtype=np.int64)
+        for part in parts:
+            ids = vocabulary.encode(part['terms'])
+            term_counts = np.pad(term_counts, (0, len(vocabulary) - len(term_counts)))
+            term_counts[ids] += part['term_counts']
+
+        return {
+            'word_count': sum(part['word_count'] for part in parts),
+            'sentence_lengths': [length for part in parts for length in part['sentence_lengths']],
+            'ai_word_count': sum(part['ai_word_count'] for part in parts),
+            'most_common_count': int(term_counts.max()) if len(term_counts) else 0,
+            'readability': np.sum([part['readability'] for part in parts], axis=0).tolist()
+        }
+
+    @tracing.traced('ai_detector.readability')
+    def _readability_scores(self, documents, workers=None):
+        """Flesch reading ease per document, optionally in a process pool"""
+        texts = [document.text for document in documents]
+        if workers and workers > 1 and len(texts) > 1:
+            chunksize = max(1, len(texts) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(textstat.flesch_reading_ease, texts, chunksize=chunksize))
+        return [textstat.flesch_reading_ease(text) for text in texts]
+
     def _calculate_ai_probability(self, features):
         """Calculate probability of AI generation"""
-        probability = 0.0
-        
+        arrays = {name: np.array([value]) for name, value in features.items()}
+        return self._calculate_ai_probabilities(arrays)[0].item()
+
+    def _calculate_ai_probabilities(self, features):
+        """Calculate probability of AI generation for arrays of features"""
+        probability = np.zeros(len(features['word_count']))
+
         # Sentence length heuristic (AI tends to have more uniform length)
-        if 15 <= features['avg_sentence_length'] <= 25:
-            probability += 0.2
-        
+        avg_sentence_length = features['avg_sentence_length']
+        probability += np.where((avg_sentence_length >= 15) & (avg_sentence_length <= 25), 0.2, 0.0)
+
         # Readability heuristic (AI often has very high readability)
-        if features['readability_score'] > 60:
-            probability += 0.2
-        
+        probability += np.where(features['readability_score'] > 60, 0.2, 0.0)
+
         # AI word indicators
-        probability += min(features['ai_word_ratio'] * 10, 0.3)
-        
+        probability += np.minimum(features['ai_word_ratio'] * 10, 0.3)
+
         # Repetition (AI might repeat certain phrases)
-        if features['repetition_ratio'] > 0.05:
-            probability += 0.1
-        
+        probability += np.where(features['repetition_ratio'] > 0.05, 0.1, 0.0)
+
         # Sentence variation (Human writing has more variation)
-        if features['sentence_variation'] < 5:
-            probability += 0.2
-        
-        return min(probability, 1.0)
\ No newline at end of file
+        probability += np.where(features['sentence_variation'] < 5, 0.2, 0.0)
+
+        return np.minimum(probability, 1.0)
@@ -1,27 +1,166 @@
-from sentence_transformers import SentenceTransformer, util
+import threading
+from collections import OrderedDict
 import numpy as np
-import re
+from modules.embedding_service import get_embedding_service
+from modules.patterns import scan_structure, split_points, split_sentences
+from modules.rubric import Rubric
+from utils import tracing
 
 class AssessmentEngine:
-    def __init__(self):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, embedding_service=None, coverage_threshold=0.55, max_rubrics=256):
+        self.embedder = embedding_service or get_embedding_service()
+        self.coverage_threshold = coverage_threshold
+        self.max_rubrics = max_rubrics
+        self._rubrics = OrderedDict()
+        self._rubric_lock = threading.Lock()
         
     def evaluate_answer(self, question, student_answer, model_answer=None):
-        """Evaluate student answer against question"""
-        if not student_answer.strip():
-            return {
-                'score': 0,
-                'feedback': "No answer provided.",
-                'strengths': [],
-                'improvements': ["Please provide a complete answer."]
-            }
+        """Evaluate student answer against question
+        
+        With a ``model_answer`` the answer is graded in rubric mode: coverage
+        of the model answer's key points replaces question relevance.
+        """
+        return self.evaluate_answers([(question, student_answer, model_answer)])[0]
+    
+    def get_rubric(self, question, model_answer):
+        """Rubric for a question's model answer, embedded once and kept in an LRU"""
+        key = (question, model_answer)
+        with self._rubric_lock:
+            rubric = self._rubrics.get(key)
+            if rubric is not None:
+                self._rubrics.move_to_end(key)
+                return rubric
+        
+        rubric = Rubric.build(model_answer, self.embedder, self.coverage_threshold)
+        with self._rubric_lock:
+            self._rubrics[key] = rubric
+            while len(self._rubrics) > self.max_rubrics:
+                self._rubrics.popitem(last=False)
+        return rubric
+    
+    @tracing.traced('assessment_engine.evaluate_answers')
+    def evaluate_answers(self, batch, batch_size=256, progress_callback=None):
+        """Evaluate many (question, student_answer[, model_answer]) items at once
+        
+        Distinct questions are encoded once, answers are encoded in chunks of
+        ``batch_size`` and relevance is computed for a whole chunk with one
+        product of normalized embeddings. Items with a model answer are graded
+        against its rubric instead (see ``_score_rubric_chunk``).
+        ``progress_callback(done, total)`` is called after each chunk.
+        """
+        items = [(item[0], item[1], item[2] if len(item) > 2 else None) for item in batch]
+        results = [None] * len(items)
+        pending = []
+        
+        for i, (question, student_answer, _) in enumerate(items):
+            if not student_answer.strip():
+                results[i] = {
+                    'score': 0,
+                    'feedback': "No answer provided.",
+                    'strengths': [],
+                    'improvements': ["Please provide a complete answer."]
+                }
+            else:
+                pending.append(i)
+        
+        graded = [i for i in pending if items[i][2] and items[i][2].strip()]
+        pending = [i for i in pending if not (items[i][2] and items[i][2].strip())]
+        total = len(pending) + len(graded)
+        done = 0
+        
+        for start in range(0, len(graded), batch_size):
+            chunk = graded[start:start + batch_size]
+            with tracing.span('assessment_engine.score_rubric_chunk', batch_size=len(chunk)):
+                self._score_rubric_chunk(items, chunk, results, batch_size)
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, total)
+        
+        if not pending:
+            return results
         
         # Calculate similarity with question (to check relevance)
-        question_embedding = self.model.encode([question])
-        answer_embedding = self.model.encode([student_answer])
+        questions = list(dict.fromkeys(items[i][0] for i in pending))
+        question_positions = {question: pos for pos, question in enumerate(questions)}
+        question_embeddings = self._normalize(self.embedder.encode(questions, batch_size=batch_size))
+        
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            with tracing.span('assessment_engine.score_chunk', batch_size=len(chunk)):
+                answer_embeddings = self._normalize(
+                    self.embedder.encode([items[i][1] for i in chunk], batch_size=batch_size)
+                )
+            rows = question_embeddings[[question_positions[items[i][0]] for i in chunk]]
+            relevance_scores = np.einsum('ij,ij->i', rows, answer_embeddings)
+            
+            for i, relevance_score in zip(chunk, relevance_scores):
+                results[i] = self._score_answer(items[i][1], float(relevance_score))
+            
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, total)
+        
+        return results
+    
+    def _score_rubric_chunk(self, items, chunk, results, batch_size):
+        """Grade a chunk of answers against their rubrics
         
-        relevance_score = util.cos_sim(question_embedding, answer_embedding).item()
+        The sentences of every answer in the chunk are encoded in one call;
+        answers sharing a rubric are then compared to its key points with a
+        single sentence-by-key-point product. Rubric embeddings come from the
+        cache, so repeated questions cost nothing beyond the answer encode.
+        """
+        sentences = []
+        bounds = [0]
+        for i in chunk:
+            sentences.extend(split_points(items[i][1]) or [items[i][1].strip()])
+            bounds.append(len(sentences))
+        embeddings = self._normalize(self.embedder.encode(sentences, batch_size=batch_size))
         
+        by_rubric = OrderedDict()
+        for pos, i in enumerate(chunk):
+            by_rubric.setdefault(self.get_rubric(items[i][0], items[i][2]), []).append(pos)
+        
+        for rubric, positions in by_rubric.items():
+            rows = np.concatenate([np.arange(bounds[pos], bounds[pos + 1]) for pos in positions])
+            similarity = embeddings[rows] @ rubric.embeddings.T
+            
+            offset = 0
+            for pos in positions:
+                count = bounds[pos + 1] - bounds[pos]
+                i = chunk[pos]
+                key_points, credit = rubric.coverage(
+                    similarity[offset:offset + count], sentences[bounds[pos]:bounds[pos + 1]]
+                )
+                results[i] = self._score_rubric_answer(items[i][1], key_points, credit)
+                offset += count
+    
+    def _score_rubric_answer(self, student_answer, key_points, credit):
+        """Combine key point coverage and answer quality into the evaluation result"""
+        quality_metrics = self._analyze_answer_quality(student_answer)
+        
+        # Content carries most of the score; completeness adds up to 2 points
+        final_score = min(8 * credit + 2 * min(quality_metrics['completeness'], 1.0), 10)
+        feedback = self._generate_feedback(quality_metrics, credit, final_score)
+        
+        covered = [point for point in key_points if point['covered']]
+        missed = [point for point in key_points if not point['covered']]
+        strengths = [f"Covers {len(covered)} of {len(key_points)} key points"] if covered else []
+        improvements = [f"Address the key point: {point['key_point']}" for point in missed[:3]]
+        
+        return {
+            'score': round(final_score, 1),
+            'feedback': feedback,
+            'strengths': strengths + quality_metrics['strengths'],
+            'improvements': improvements + quality_metrics['improvements'],
+            'rubric': {
+                'coverage': len(covered) / len(key_points),
+                'key_points': key_points
+            }
+        }
+    
+    def _score_answer(self, student_answer, relevance_score):
+        """Combine answer quality and relevance into the evaluation result"""
         # Analyze answer quality
         quality_metrics = self._analyze_answer_quality(student_answer)
         
@@ -41,18 +180,25 @@ class AssessmentEngine:
             'improvements': quality_metrics['improvements']
         }
     
+    @staticmethod
+    def _normalize(embeddings):
+        """Scale rows to unit length"""
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+    
     def _analyze_answer_quality(self, answer):
         """Analyze various quality aspects of the answer"""
         words = answer.split()
-        sentences = re.split(r'[.!?]+', answer)
+        sentences = split_sentences(answer)
+        structure = scan_structure(answer)
         
         metrics = {
             'word_count': len(words),
             'sentence_count': len([s for s in sentences if len(s.strip()) > 0]),
             'avg_sentence_length': len(words) / max(1, len(sentences)),
             'has_technical_terms': len([w for w in words if w.istitle() and len(w) > 3]) > 2,
-            'has_examples': any(word in answer.lower() for word in ['example', 'for instance', 'such as']),
-            'structure_score': self._assess_structure(answer)
+            'has_examples': structure['example'] > 0,
+            'structure_score': self._assess_structure(answer, structure)
         }
         
         # Determine strengths and improvements
@@ -85,13 +231,14 @@ class AssessmentEngine:
         
         return metrics
     
-    def _assess_structure(self, answer):
+    def _assess_structure(self, answer, structure=None):
         """Assess the structure of the answer"""
+        structure = structure or scan_structure(answer)
         structure_indicators = [
-            len(re.findall(r'\b(first|second|third|finally)\b', answer.lower())) > 0,
-            len(re.findall(r'\b(therefore|however|moreover)\b', answer.lower())) > 0,
-            answer.count('.') >= 2,
-            len(answer.split('\n')) > 1 or answer.count(',') >= 3
+            structure['sequence'] > 0,
+            structure['connective'] > 0,
+            structure['period'] >= 2,
+            structure['newline'] > 0 or structure['comma'] >= 3
         ]
         
         return sum(structure_indicators) / len(structure_indicators)
@@ -0,0 +1,310 @@
+import json
+import logging
+import os
+import threading
+import numpy as np
+from modules.embedding_service import get_embedding_service
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusIndex:
+    """Persistent semantic index over the chunks of every uploaded document
+
+    Files in ``index_dir``:
+
+    - ``vectors.f16``: unit-length float16 embeddings, one row per chunk id,
+      memory-mapped for search
+    - ``chunks.jsonl``: the id -> chunk metadata table (document id, source,
+      position, text), one line per id
+    - ``meta.json``: committed row count, dimension and embedding model; rows
+      written past the committed count by an interrupted append are dropped
+    - ``ivf_centroids.npy`` / ``ivf_assign.i32``: optional IVF partitioning
+
+    Search is a blocked brute-force matmul, or with an IVF partitioning built,
+    a scan of the ``nprobe`` lists whose centroids are closest to the query.
+    Appends are incremental: new chunks are added to the existing files and
+    assigned to their nearest IVF list without rebuilding anything.
+    """
+
+    BLOCK_ROWS = 65536
+
+    def __init__(self, index_dir, embedding_service=None, nprobe=8):
+        self.index_dir = index_dir
+        self.embedder = embedding_service or get_embedding_service()
+        self.nprobe = nprobe
+        self.count = 0
+        self.dim = None
+        self.model = None
+        self._vectors = None
+        self._offsets = []
+        self._documents = set()
+        self._centroids = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._list_rows = None
+        self._lock = threading.RLock()
+
+        os.makedirs(index_dir, exist_ok=True)
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, doc_id):
+        return doc_id in self._documents
+
+    def _load(self):
+        """Open the committed part of the index, discarding any partial append"""
+        try:
+            with open(self._path('meta.json')) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Could not read corpus index metadata, starting empty: {e}")
+            return
+
+        self.count = meta['count']
+        self.dim = meta['dim']
+        self.model = meta['model']
+        self._truncate('vectors.f16', self.count * self.dim * 2)
+
+        with open(self._path('chunks.jsonl'), 'rb+') as f:
+            for _ in range(self.count):
+                offset = f.tell()
+                line = f.readline()
+                self._offsets.append(offset)
+                self._documents.add(json.loads(line)['doc_id'])
+            f.truncate()
+
+        if os.path.exists(self._path('ivf_centroids.npy')):
+            self._centroids = np.load(self._path('ivf_centroids.npy'))
+            self._truncate('ivf_assign.i32', self.count * 4)
+            self._assign = np.fromfile(self._path('ivf_assign.i32'), dtype=np.int32)
+            self._index_lists()
+        self._remap()
+
+    def _truncate(self, name, size):
+        with open(self._path(name), 'ab') as f:
+            if f.tell() > size:
+                f.truncate(size)
+
+    def _remap(self):
+        if self.count:
+            self._vectors = np.memmap(self._path('vectors.f16'), dtype=np.float16, mode='r',
+                                      shape=(self.count, self.dim))
+        else:
+            self._vectors = np.zeros((0, self.dim or 0), dtype=np.float16)
+
+    def _write_meta(self):
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'count': self.count, 'dim': self.dim, 'model': self.model}, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    def _embed(self, texts):
+        """Unit-length float32 embeddings, refusing a model the index was not built with"""
+        model = getattr(self.embedder, 'cache_namespace', self.embedder.model_name)
+        if self.model is not None and model != self.model:
+            raise ValueError(f"Corpus index was built with {self.model}, not {model}")
+        embeddings = np.asarray(self.embedder.encode(texts), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12), model
+
+    @tracing.traced('corpus_index.add_document', size=False)
+    def add_document(self, doc_id, segments, source=None):
+        """Append the chunks of a document and return how many were added
+
+        Documents already in the index (by ``doc_id``, e.g. a content hash)
+        are skipped.
+        """
+        segments = [segment for segment in segments if segment and segment.strip()]
+        with self._lock:
+            if doc_id in self._documents or not segments:
+                return 0
+
+            embeddings, model = self._embed(segments)
+            if self.dim is not None and embeddings.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match index ({self.dim})")
+
+            with open(self._path('vectors.f16'), 'ab') as f:
+                f.write(embeddings.astype(np.float16).tobytes())
+
+            offsets = []
+            with open(self._path('chunks.jsonl'), 'ab') as f:
+                for position, segment in enumerate(segments):
+                    offsets.append(f.tell())
+                    row = {
+                        'id': self.count + position,
+                        'doc_id': doc_id,
+                        'source': source,
+                        'position': position,
+                        'text': segment
+                    }
+                    f.write((json.dumps(row) + "\n").encode('utf-8'))
+
+            if self._centroids is not None:
+                assign = self._nearest_lists(embeddings)
+                with open(self._path('ivf_assign.i32'), 'ab') as f:
+                    f.write(assign.tobytes())
+                self._assign = np.concatenate([self._assign, assign])
+
+            # Bumping the committed count is what makes the append visible
+            self.dim = embeddings.shape[1]
+            self.model = model
+            self.count += len(segments)
+            self._write_meta()
+
+            self._offsets.extend(offsets)
+            self._documents.add(doc_id)
+            if self._centroids is not None:
+                self._index_lists()
+            self._remap()
+            return len(segments)
+
+    def build_ivf(self, n_lists=None, iterations=10, sample_size=20000, seed=0):
+        """Partition the index into ``n_lists`` clusters with spherical k-means
+
+        Centroids are trained on a sample of at most ``sample_size`` rows; every
+        row is then assigned to its nearest centroid.
+        """
+        with self._lock:
+            if self.count == 0:
+                return
+            n_lists = min(n_lists or max(1, int(np.sqrt(self.count))), self.count)
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(self.count, min(sample_size, self.count), replace=False))
+            sample = np.asarray(self._vectors[sample_rows], dtype=np.float32)
+
+            centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = ~np.bincount(labels, minlength=n_lists).astype(bool)
+                sums[empty] = centroids[empty]
+                centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+            self._centroids = centroids.astype(np.float32)
+
+            assign = np.concatenate([
+                self._nearest_lists(np.asarray(self._vectors[start:start + self.BLOCK_ROWS], dtype=np.float32))
+                for start in range(0, self.count, self.BLOCK_ROWS)
+            ])
+            tmp_path = self._path('ivf_assign.i32.tmp')
+            assign.tofile(tmp_path)
+            os.replace(tmp_path, self._path('ivf_assign.i32'))
+            np.save(self._path('ivf_centroids.npy'), self._centroids)
+            self._assign = assign
+            self._index_lists()
+            logger.info(f"Built IVF partitioning with {n_lists} lists over {self.count} chunks")
+
+    def _nearest_lists(self, embeddings):
+        return np.argmax(embeddings @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _index_lists(self):
+        """Row ids grouped by IVF list, as (sorted rows, start offset per list)"""
+        order = np.argsort(self._assign, kind='stable')
+        bounds = np.searchsorted(self._assign[order], np.arange(len(self._centroids) + 1))
+        self._list_rows = (order, bounds)
+
+    @tracing.traced('corpus_index.search', size=False)
+    def search(self, query, k=5, nprobe=None):
+        """Top ``k`` chunks for a query string, best first, with their metadata
+
+        ``nprobe=0`` forces a brute-force scan even when an IVF partitioning
+        exists.
+        """
+        if self.count == 0 or not query.strip():
+            return []
+        embeddings, _ = self._embed([query])
+        matches = self.search_vectors(embeddings, k, nprobe)[0]
+        chunks = self.get_chunks([chunk_id for chunk_id, _ in matches])
+        for chunk, (_, score) in zip(chunks, matches):
+            chunk['score'] = score
+        return chunks
+
+    def search_vectors(self, queries, k=5, nprobe=None):
+        """(id, score) lists for unit-length query vectors, best first"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = self.nprobe if nprobe is None else nprobe
+        with self._lock:
+            if self.count == 0:
+                return [[] for _ in queries]
+            if self._centroids is not None and nprobe:
+                return [self._search_ivf(query, k, nprobe) for query in queries]
+            return self._search_brute(queries, k)
+
+    def _search_brute(self, queries, k):
+        """Blocked matmul keeping a running top-k per query"""
+        best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+
+        for start in range(0, self.count, self.BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+            ids = np.concatenate([best_ids, np.broadcast_to(
+                np.arange(start, start + len(block)), (len(queries), len(block))
+            )], axis=1)
+            keep = min(k, scores.shape[1])
+            top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_ids = np.take_along_axis(ids, top, axis=1)
+
+        return [_ranked(ids, scores) for ids, scores in zip(best_ids, best_scores)]
+
+    def _search_ivf(self, query, k, nprobe):
+        """Score only the rows in the ``nprobe`` closest lists"""
+        order, bounds = self._list_rows
+        probes = np.argsort(-(self._centroids @ query))[:nprobe]
+        rows = np.sort(np.concatenate([order[bounds[p]:bounds[p + 1]] for p in probes]))
+        if len(rows) == 0:
+            return []
+        scores = np.asarray(self._vectors[rows], dtype=np.float32) @ query
+        keep = min(k, len(rows))
+        top = np.argpartition(-scores, keep - 1)[:keep]
+        return _ranked(rows[top], scores[top])
+
+    def get_chunks(self, chunk_ids):
+        """Metadata rows for chunk ids, read from the table by offset"""
+        chunks = []
+        with open(self._path('chunks.jsonl'), 'rb') as f:
+            for chunk_id in chunk_ids:
+                f.seek(self._offsets[chunk_id])
+                chunks.append(json.loads(f.readline()))
+        return chunks
+
+    def get_stats(self):
+        return {
+            'chunks': self.count,
+            'documents': len(self._documents),
+            'dimension': self.dim,
+            'model': self.model,
+            'ivf_lists': len(self._centroids) if self._centroids is not None else 0,
+            'vector_bytes': self.count * (self.dim or 0) * 2
+        }
+
+
+def _ranked(ids, scores):
+    order = np.argsort(-scores, kind='stable')
+    return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_corpus_index():
+    """Get the process-wide corpus index, or None unless EXAM_PREP_CORPUS_INDEX_DIR is set"""
+    global _default_index
+    index_dir = os.environ.get('EXAM_PREP_CORPUS_INDEX_DIR')
+    if not index_dir:
+        return None
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = CorpusIndex(index_dir)
+    return _default_index
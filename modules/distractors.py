@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class TermIndex:
+    """Precomputed similarity index over a document's key terms
+
+    Distractors for a term are the terms whose cosine similarity to it falls
+    inside ``band``: related enough to be plausible, but not so close that
+    they are synonyms of the correct answer.
+    """
+
+    def __init__(self, terms, embeddings, band=(0.2, 0.85)):
+        self.terms = list(terms)
+        self.positions = {term: i for i, term in enumerate(self.terms)}
+        self.band = band
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        normalized = embeddings / np.maximum(norms, 1e-12)
+        self.similarity = normalized @ normalized.T
+        np.fill_diagonal(self.similarity, -np.inf)
+
+    @classmethod
+    def build(cls, terms, embedding_service, band=(0.2, 0.85)):
+        """Embed the terms once and index them"""
+        terms = list(terms)
+        embeddings = embedding_service.encode(terms) if terms else np.zeros((0, 1), dtype=np.float32)
+        return cls(terms, embeddings, band)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def distractors(self, term, k=3):
+        """``k`` distractor terms for ``term``, closest in-band first"""
+        return self.all_distractors(k, [term])[0]
+
+    def all_distractors(self, k=3, terms=None):
+        """Distractors for many terms at once using row-wise top-k
+
+        Terms in the band are preferred; when a row has fewer than ``k`` of
+        them, the remaining slots are filled with the most similar terms below
+        the band. Terms above the band are never used.
+        """
+        rows = np.arange(len(self.terms)) if terms is None else np.array(
+            [self.positions[term] for term in terms], dtype=np.int64
+        )
+        if len(self.terms) < 2 or len(rows) == 0:
+            return [[] for _ in rows]
+
+        low, high = self.band
+        similarity = self.similarity[rows]
+        # In-band terms rank above below-band terms; too-close terms are excluded
+        ranked = np.where(similarity >= low, similarity + 2.0, similarity)
+        ranked[similarity > high] = -np.inf
+
+        k = min(k, len(self.terms) - 1)
+        top = np.argpartition(-ranked, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(ranked, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [self.terms[j] for j, score in zip(row, scores) if np.isfinite(score)]
+            for row, scores in zip(top, top_scores)
+        ]
@@ -0,0 +1,170 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache with an in-memory LRU and optional disk tier
+
+    Entries are keyed by a hash of the model name and the text. The memory tier
+    is bounded by ``max_bytes``; when ``cache_dir`` is given, new entries are
+    also appended to ``.npy`` segment files that are memory-mapped on load.
+    Several processes may share ``cache_dir``: each segment gets a unique name
+    and is written to a temporary file and renamed, and its key list is
+    written last, so a segment is only loaded once it is complete.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, cache_dir=None, flush_every=256):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.flush_every = flush_every
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_index = {}
+        self._segments = []
+        self._pending = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_segments()
+
+    @staticmethod
+    def make_key(text, model_name):
+        """Build the cache key for a text encoded by a given model"""
+        digest = hashlib.sha1()
+        digest.update(model_name.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8', errors='surrogatepass'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached vector for a key or None"""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            location = self._disk_index.get(key)
+            if location is not None:
+                segment, row = location
+                vector = np.array(self._segments[segment][row], dtype=np.float32)
+                self._remember(key, vector)
+                self.hits += 1
+                self.disk_hits += 1
+                return vector
+
+            vector = self._pending.get(key)
+            if vector is not None:
+                self.hits += 1
+                return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, key, vector):
+        """Store a vector in the memory tier and queue it for the disk tier"""
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self.cache_dir and key not in self._disk_index:
+                self._pending[key] = vector
+                if len(self._pending) >= self.flush_every:
+                    self.flush()
+
+    def _remember(self, key, vector):
+        """Insert into the memory LRU, evicting until under the byte budget"""
+        if vector.nbytes > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+
+        while self._memory_bytes > self.max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def flush(self):
+        """Write pending entries to a new on-disk segment"""
+        with self._lock:
+            if not self.cache_dir or not self._pending:
+                return
+
+            keys = list(self._pending.keys())
+            matrix = np.stack(list(self._pending.values())).astype(np.float32)
+            segment_id = len(self._segments)
+            base = os.path.join(self.cache_dir, f"segment_{os.getpid()}_{uuid.uuid4().hex}")
+
+            try:
+                tmp_path = base + '.npy.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, matrix)
+                os.replace(tmp_path, base + '.npy')
+                tmp_path = base + '.keys.json.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(keys, f)
+                os.replace(tmp_path, base + '.keys.json')
+            except Exception as e:
+                logger.error(f"Error writing embedding cache segment: {e}")
+                return
+
+            self._segments.append(np.load(base + '.npy', mmap_mode='r'))
+            for row, key in enumerate(keys):
+                self._disk_index[key] = (segment_id, row)
+            self._pending.clear()
+
+    def _load_segments(self):
+        """Memory-map every complete segment found in the cache directory"""
+        for keys_path in sorted(glob.glob(os.path.join(self.cache_dir, 'segment_*.keys.json'))):
+            base = keys_path[:-len('.keys.json')]
+            try:
+                with open(keys_path) as f:
+                    keys = json.load(f)
+                segment = np.load(base + '.npy', mmap_mode='r')
+            except Exception as e:
+                logger.warning(f"Skipping unreadable embedding cache segment {base}: {e}")
+                continue
+            segment_id = len(self._segments)
+            self._segments.append(segment)
+            for row, key in enumerate(keys):
+                self._disk_index[key] = (segment_id, row)
+
+    def clear(self):
+        """Drop the memory tier and reset counters"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+
+    def get_stats(self):
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk_index),
+                'pending_entries': len(self._pending)
+            }
+
+    def __len__(self):
+        return len(self._memory)
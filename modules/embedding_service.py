@@ -0,0 +1,250 @@
+import atexit
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+import numpy as np
+from modules.embedding_cache import EmbeddingCache
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+BACKENDS = ('torch', 'onnx', 'int8')
+
+
+class EmbeddingService:
+    """Lazily loaded sentence embedding model shared by the analysis modules
+
+    ``backend`` selects how the encoder runs on CPU: ``torch`` (full precision),
+    ``onnx`` (exported ONNX graph on onnxruntime) or ``int8`` (PyTorch dynamic
+    quantization of the linear layers). ``num_threads`` sets the intra-op
+    thread count of the chosen runtime. Vectors from non-torch backends are
+    cached under their own key so they never mix with full-precision ones.
+    The ONNX backend needs sentence-transformers 3.2+ with optimum[onnxruntime]
+    (``pip install .[onnx]``); ``int8`` only needs torch.
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, batch_size=64, model=None, cache=None,
+                 backend='torch', num_threads=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache = cache
+        self.backend = backend
+        self.num_threads = num_threads
+        self.cache_namespace = model_name if backend == 'torch' else f"{model_name}:{backend}"
+        self._model = model
+        self._lock = threading.Lock()
+        self._load_time = 0.0
+        self._encode_calls = 0
+        self._encoded_texts = 0
+
+    @property
+    def model(self):
+        """Return the underlying model, loading it on first use"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    @property
+    def is_loaded(self):
+        return self._model is not None
+
+    def _load_model(self):
+        """Load the SentenceTransformer model for the configured backend"""
+        from sentence_transformers import SentenceTransformer
+
+        start = time.perf_counter()
+        if self.backend == 'onnx':
+            model = SentenceTransformer(
+                self.model_name, device='cpu', backend='onnx', model_kwargs=self._onnx_model_kwargs()
+            )
+        else:
+            import torch
+
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            model = SentenceTransformer(self.model_name, device='cpu')
+            if self.backend == 'int8':
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self._load_time = time.perf_counter() - start
+        logger.info(
+            f"Loaded embedding model {self.model_name} ({self.backend} backend) in {self._load_time:.2f}s"
+        )
+        return model
+
+    def _onnx_model_kwargs(self):
+        """onnxruntime session settings for the ONNX backend"""
+        kwargs = {'provider': 'CPUExecutionProvider'}
+        if self.num_threads:
+            import onnxruntime
+
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = self.num_threads
+            kwargs['session_options'] = session_options
+        return kwargs
+
+    def encode(self, texts, batch_size=None):
+        """Encode a list of texts into a 2D float32 array, reusing cached vectors"""
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        with tracing.span('embedding.encode', input_size=len(texts)) as trace:
+            if self.cache is None:
+                trace.set(batch_size=len(texts))
+                return self._encode_uncached(texts, batch_size)
+
+            keys = [EmbeddingCache.make_key(text, self.cache_namespace) for text in texts]
+            vectors = [self.cache.get(key) for key in keys]
+
+            # Encode each distinct missing text once
+            missing = OrderedDict()
+            for i, vector in enumerate(vectors):
+                if vector is None:
+                    missing.setdefault(keys[i], []).append(i)
+
+            if tracing.is_enabled():
+                miss_count = sum(len(rows) for rows in missing.values())
+                trace.set(batch_size=len(missing), cache_hits=len(texts) - miss_count)
+                tracing.count('embedding_cache.hits', len(texts) - miss_count)
+                tracing.count('embedding_cache.misses', miss_count)
+            return self._fill_missing(texts, vectors, missing, batch_size)
+
+    def _fill_missing(self, texts, vectors, missing, batch_size):
+        """Encode cache misses, store them and assemble the full matrix"""
+        if missing:
+            miss_texts = [texts[rows[0]] for rows in missing.values()]
+            encoded = self._encode_uncached(miss_texts, batch_size)
+            for (key, rows), vector in zip(missing.items(), encoded):
+                self.cache.put(key, vector)
+                for i in rows:
+                    vectors[i] = vector
+
+        return np.stack(vectors).astype(np.float32, copy=False)
+
+    def _encode_uncached(self, texts, batch_size=None):
+        """Run the model over texts in batches"""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size or self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        self._encode_calls += 1
+        self._encoded_texts += len(texts)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    @property
+    def dimension(self):
+        """Embedding dimension of the loaded model"""
+        return self.model.get_sentence_embedding_dimension()
+
+    def get_stats(self):
+        """Get load time, memory footprint and usage counters"""
+        return {
+            'model_name': self.model_name,
+            'backend': self.backend,
+            'num_threads': self.num_threads,
+            'loaded': self.is_loaded,
+            'load_time_seconds': self._load_time,
+            'memory_bytes': self._model_memory_bytes() if self.is_loaded else 0,
+            'encode_calls': self._encode_calls,
+            'encoded_texts': self._encoded_texts,
+            'cache': self.cache.get_stats() if self.cache is not None else None
+        }
+
+    def _model_memory_bytes(self):
+        """Approximate model footprint: weight bytes, or the graph's file size for ONNX"""
+        try:
+            if self.backend == 'onnx':
+                return _onnx_model_bytes(self._model)
+            # The state dict includes the packed int8 weights that parameters() misses
+            return _tensor_bytes(list(self._model.state_dict().values()))
+        except Exception as e:
+            logger.warning(f"Could not measure model memory: {e}")
+            return 0
+
+
+def _tensor_bytes(value):
+    """Bytes held by a tensor or a (nested) list or tuple of tensors"""
+    if isinstance(value, (list, tuple)):
+        return sum(_tensor_bytes(item) for item in value)
+    if hasattr(value, 'numel') and hasattr(value, 'element_size'):
+        return value.numel() * value.element_size()
+    return 0
+
+
+def _onnx_model_bytes(model):
+    """Size of the ONNX graph files an onnxruntime-backed SentenceTransformer loaded"""
+    auto_model = model[0].auto_model
+    path = getattr(auto_model, 'model_path', None)
+    if path is None:
+        return 0
+    directory, graph = os.path.split(os.fspath(path))
+    # External weight data, if any, sits next to the graph as <graph>_data
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for name in os.listdir(directory)
+        if name.startswith(graph)
+    )
+
+
+def compare_backends(reference, candidate, texts, tolerance=0.02):
+    """Check that ``candidate`` service embeddings reproduce ``reference`` cosine scores"""
+    return score_parity(reference.encode(texts), candidate.encode(texts), tolerance)
+
+
+def score_parity(expected, actual, tolerance=0.02):
+    """Compare two embeddings of the same texts by the cosine scores they produce
+
+    The pairwise cosine similarity matrices are what grading and summarization
+    consume, so parity passes when no pair's score moves by more than
+    ``tolerance``. How close each vector is to its reference is reported too.
+    """
+    def normalized(embeddings):
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    expected = normalized(np.asarray(expected, dtype=np.float32))
+    actual = normalized(np.asarray(actual, dtype=np.float32))
+    score_error = np.abs(expected @ expected.T - actual @ actual.T)
+    vector_cosine = np.einsum('ij,ij->i', expected, actual)
+
+    return {
+        'texts': len(expected),
+        'max_score_error': float(score_error.max()),
+        'mean_score_error': float(score_error.mean()),
+        'min_vector_cosine': float(vector_cosine.min()),
+        'passed': bool(score_error.max() <= tolerance)
+    }
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_embedding_service():
+    """Get the process-wide embedding service"""
+    global _default_service
+    if _default_service is None:
+        with _default_lock:
+            if _default_service is None:
+                cache = EmbeddingCache(
+                    cache_dir=os.environ.get('EXAM_PREP_EMBEDDING_CACHE_DIR') or None
+                )
+                if cache.cache_dir:
+                    atexit.register(cache.flush)
+                threads = os.environ.get('EXAM_PREP_EMBEDDING_THREADS')
+                _default_service = EmbeddingService(
+                    cache=cache,
+                    backend=os.environ.get('EXAM_PREP_EMBEDDING_BACKEND', 'torch'),
+                    num_threads=int(threads) if threads else None
+                )
+    return _default_service
@@ -0,0 +1,245 @@
+import functools
+import logging
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+from modules.summarizer import top_k
+from modules.mapreduce import get_map_reduce
+from modules.term_stats import TermStats
+from modules.tokenized_document import TokenizedDocument
+from utils.lazy_import import lazy_import
+from utils import tracing
+
+sklearn_text = lazy_import('sklearn.feature_extraction.text')
+scipy_sparse = lazy_import('scipy.sparse')
+
+logger = logging.getLogger(__name__)
+
+# Words, plus punctuation that ends a phrase
+PHRASE_TOKEN = re.compile(r"[a-z][a-z0-9]*(?:['-][a-z0-9]+)*|[.,;:!?()\[\]\"]")
+BOUNDARY = '|'
+# Subject nouns that sklearn's English stoplist includes but course material needs
+CONTENT_WORDS = frozenset({
+    'system', 'computer', 'interest', 'amount', 'detail', 'fire', 'bill', 'part',
+    'side', 'front', 'top', 'bottom', 'name', 'mill'
+})
+
+
+class DocumentPhrases:
+    """Candidate phrases of one document with their segment-by-phrase TF-IDF matrix"""
+
+    def __init__(self, phrases, lengths, matrix, scores):
+        self.phrases = phrases
+        self.lengths = lengths
+        self.matrix = matrix
+        self.scores = scores
+
+    def top(self, n):
+        """The ``n`` best phrases, skipping ones that overlap a better phrase
+
+        A phrase overlaps when it contains a selected phrase or a selected
+        phrase contains it, as whole words. Every word run of the selected
+        phrases is kept in a set, so each candidate costs a few lookups
+        instead of a comparison with every selected phrase.
+        """
+        selected = []
+        selected_set = set()
+        covered = set()
+        for i in top_k(self.scores, min(len(self.scores), n * 10)):
+            phrase = self.phrases[i]
+            runs = word_runs(phrase)
+            if phrase in covered or not selected_set.isdisjoint(runs):
+                continue
+            selected.append(phrase)
+            selected_set.add(phrase)
+            covered.update(runs)
+            if len(selected) == n:
+                break
+        return selected
+
+
+class KeyphraseExtractor:
+    """Score 1-3 word phrases with a sparse TF-IDF over document segments
+
+    Candidates are runs of up to ``max_ngram`` words between stopwords,
+    punctuation and segment boundaries (as in RAKE). Each segment is a
+    TF-IDF row (sublinear tf, smoothed idf, l2 norm) and a phrase scores the
+    sum of its column, boosted by ``length_boost`` per extra word. Multi-word
+    phrases must occur at least ``min_phrase_count`` times. The analysis of a
+    document is cached by its digest, so every caller shares one matrix.
+    With a ``map_reduce`` pool, large documents are counted batch by batch of
+    segments in the pool and the merged counts are scored as one matrix.
+    """
+
+    def __init__(self, max_ngram=3, segment_length=500, min_phrase_count=2,
+                 length_boost=0.5, min_word_length=3, max_documents=32, map_reduce=None):
+        self.max_ngram = max_ngram
+        self.segment_length = segment_length
+        self.min_phrase_count = min_phrase_count
+        self.length_boost = length_boost
+        self.min_word_length = min_word_length
+        self.max_documents = max_documents
+        self.map_reduce = (map_reduce if map_reduce is not None else get_map_reduce()) or None
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def extract(self, text, top_n=15):
+        """Top key phrases of a text, best first"""
+        return self.analyze(text).top(top_n)
+
+    def analyze(self, text):
+        """Candidate phrases and TF-IDF matrix for a document, computed once"""
+        document = TokenizedDocument.of(text)
+        key = document.digest
+        with self._lock:
+            phrases = self._documents.get(key)
+            if phrases is not None:
+                self._documents.move_to_end(key)
+                return phrases
+
+        phrases = self._analyze(document)
+        with self._lock:
+            self._documents[key] = phrases
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return phrases
+
+    def clear_cache(self):
+        """Forget the analyzed documents"""
+        with self._lock:
+            self._documents.clear()
+
+    @tracing.traced('keyphrases.analyze')
+    def _analyze(self, document):
+        try:
+            if self.map_reduce is not None:
+                document = self.map_reduce.tokenize(document)
+            segments = document.segments(self.segment_length) or [document.text]
+        except LookupError as e:
+            logger.warning(f"Sentence tokenizer unavailable, scoring phrases over the whole text: {e}")
+            segments = [document.text]
+
+        if self.map_reduce is not None and self.map_reduce.should_split(len(document.text)):
+            count = functools.partial(count_phrases, max_ngram=self.max_ngram, min_word_length=self.min_word_length)
+            parts = self.map_reduce.map(count, self.map_reduce.batches(segments))
+            return self.score(*merge_phrase_counts(parts))
+        return self.score(*count_phrases(segments, self.max_ngram, self.min_word_length))
+
+    def score(self, phrases, lengths, counts):
+        """Drop rare multi-word phrases and score the rest by TF-IDF"""
+        if not phrases:
+            return DocumentPhrases([], np.zeros(0, dtype=np.int64), None, np.zeros(0))
+
+        totals = np.asarray(counts.sum(axis=0)).ravel()
+        keep = (lengths == 1) | (totals >= self.min_phrase_count)
+        phrases = [phrase for phrase, kept in zip(phrases, keep) if kept]
+        lengths = lengths[keep]
+        counts = counts[:, keep]
+        counts.sort_indices()
+        matrix = sklearn_text.TfidfTransformer(sublinear_tf=True).fit_transform(counts)
+
+        scores = np.asarray(matrix.sum(axis=0)).ravel() * (1 + self.length_boost * (lengths - 1))
+        return DocumentPhrases(phrases, lengths, matrix, scores)
+
+
+def word_runs(phrase):
+    """Every contiguous run of whole words in a phrase, the phrase included"""
+    words = phrase.split(" ")
+    return [
+        " ".join(words[start:end])
+        for start in range(len(words))
+        for end in range(start + 1, len(words) + 1)
+    ]
+
+
+def count_phrases(segments, max_ngram=3, min_word_length=3):
+    """Occurrences of every candidate phrase in consecutive segments
+
+    Returns the phrases, their word counts and a CSR segment-by-phrase count
+    matrix. Phrases are ordered by length, then by the first appearance of
+    each of their words, and none are filtered by frequency yet, so counts of
+    consecutive batches of segments can be merged with ``merge_phrase_counts``.
+    """
+    # One token stream for all segments, with a boundary between segments
+    tokens = []
+    segment_of_token = []
+    for index, segment in enumerate(segments):
+        segment_tokens = PHRASE_TOKEN.findall(segment.lower())
+        tokens.extend(segment_tokens)
+        tokens.append(BOUNDARY)
+        segment_of_token.extend([index] * (len(segment_tokens) + 1))
+    stats = TermStats.from_tokens(tokens)
+    segment_of_token = np.array(segment_of_token, dtype=np.int64)
+
+    vocabulary = stats.vocabulary.terms
+    exclude = {
+        term for term in vocabulary
+        if (term in sklearn_text.ENGLISH_STOP_WORDS and term not in CONTENT_WORDS)
+        or len(term) < min_word_length
+        or not term[0].isalpha()
+    }
+
+    phrases = []
+    lengths = []
+    rows = []
+    columns = []
+    for n in range(1, max_ngram + 1):
+        grams, _, _, inverse, positions = stats.ngram_occurrences(n, exclude)
+        rows.append(segment_of_token[positions])
+        columns.append(inverse + len(phrases))
+        phrases.extend(" ".join(vocabulary[i] for i in gram) for gram in grams)
+        lengths.extend([n] * len(grams))
+
+    rows = np.concatenate(rows)
+    counts = scipy_sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, np.concatenate(columns))),
+        shape=(len(segments), len(phrases))
+    )
+    return phrases, np.array(lengths, dtype=np.int64), counts
+
+
+def merge_phrase_counts(parts):
+    """Stack ``count_phrases`` results of consecutive batches of segments
+
+    Columns are put in the order ``count_phrases`` gives all the segments at
+    once: every word of a batch is one of its single-word phrases, listed in
+    order of first appearance, which fixes the global first appearance rank.
+    """
+    rank = {}
+    for phrases, lengths, _ in parts:
+        for phrase, length in zip(phrases, lengths):
+            if length == 1:
+                rank.setdefault(phrase, len(rank))
+
+    keys = {}
+    for phrases, lengths, _ in parts:
+        for phrase, length in zip(phrases, lengths):
+            if phrase not in keys:
+                keys[phrase] = (int(length), tuple(rank[word] for word in phrase.split(" ")))
+    merged = sorted(keys, key=keys.get)
+    column_of = {phrase: column for column, phrase in enumerate(merged)}
+
+    blocks = []
+    for phrases, _, counts in parts:
+        columns = np.array([column_of[phrase] for phrase in phrases], dtype=np.int64)
+        counts = counts.tocoo()
+        blocks.append(scipy_sparse.csr_matrix(
+            (counts.data, (counts.row, columns[counts.col])), shape=(counts.shape[0], len(merged))
+        ))
+    lengths = np.array([keys[phrase][0] for phrase in merged], dtype=np.int64)
+    return merged, lengths, scipy_sparse.vstack(blocks, format='csr')
+
+
+_default_extractor = None
+_default_lock = threading.Lock()
+
+
+def get_keyphrase_extractor():
+    """Get the process-wide key phrase extractor"""
+    global _default_extractor
+    if _default_extractor is None:
+        with _default_lock:
+            if _default_extractor is None:
+                _default_extractor = KeyphraseExtractor()
+    return _default_extractor
@@ -0,0 +1,205 @@
+import atexit
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from modules.embedding_service import EmbeddingService
+from modules.tokenized_document import TokenizedDocument
+from utils.lazy_import import lazy_import
+from utils import tracing
+
+nltk_tokenize = lazy_import('nltk.tokenize')
+
+logger = logging.getLogger(__name__)
+
+# A chunk ends after a run of sentence punctuation and the whitespace after it
+CHUNK_BREAK = re.compile(r'[.!?]+\s+')
+
+_worker = {}
+
+
+def worker_embedding_service():
+    """Uncached single-threaded encoder with the process-wide service's backend"""
+    return EmbeddingService(backend=os.environ.get('EXAM_PREP_EMBEDDING_BACKEND', 'torch'), num_threads=1)
+
+
+def _init_worker(embedding_factory):
+    _worker['embedding_factory'] = embedding_factory
+
+
+def _sentence_spans(text):
+    """(start, end) offsets of the NLTK sentences of a text, which are slices of it"""
+    spans = []
+    position = 0
+    for sentence in nltk_tokenize.sent_tokenize(text):
+        start = text.find(sentence, position)
+        position = start + len(sentence)
+        spans.append((start, position))
+    return spans
+
+
+def _encode_texts(texts):
+    """Encode with this worker's model, loading it on the first batch"""
+    if 'embedder' not in _worker:
+        _worker['embedder'] = _worker['embedding_factory']()
+    return _worker['embedder'].encode(texts)
+
+
+class MapReduce:
+    """Process pool that analyzes one large document chunk by chunk
+
+    Texts of at least ``min_size`` characters are cut into about
+    ``chunks_per_worker`` chunks per worker, each ending after sentence
+    punctuation and the whitespace that follows it. Callers map a
+    module-level function over the chunks and merge the partial results
+    (summed counts, pooled moments, global rankings) so the outcome matches
+    analyzing the whole text in one process. Workers encode with their own
+    ``embedding_factory()`` model, one thread each. The pool is started on
+    first use and reused.
+    """
+
+    def __init__(self, workers=None, min_size=1024 ** 2, chunks_per_worker=4, min_chunk_size=64 * 1024,
+                 embedding_factory=worker_embedding_service):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_size = min_size
+        self.chunks_per_worker = chunks_per_worker
+        self.min_chunk_size = min_chunk_size
+        self.embedding_factory = embedding_factory
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        initializer=_init_worker,
+                        initargs=(self.embedding_factory,)
+                    )
+        return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def should_split(self, size):
+        """Whether input of ``size`` characters is worth spreading over the pool"""
+        return self.workers > 1 and size >= self.min_size
+
+    def map(self, fn, chunks):
+        """``fn`` applied to every chunk in the pool, in chunk order"""
+        with tracing.span('map_reduce.map', input_size=len(chunks)):
+            return list(self.executor.map(fn, chunks))
+
+    def split(self, text):
+        """Cut text into consecutive chunks that each end at a sentence break"""
+        n_chunks = max(1, min(self.workers * self.chunks_per_worker, len(text) // self.min_chunk_size))
+        target = len(text) / n_chunks
+        chunks = []
+        start = 0
+        for i in range(1, n_chunks):
+            match = CHUNK_BREAK.search(text, max(start, int(i * target)))
+            if match is None or match.end() >= len(text):
+                break
+            chunks.append(text[start:match.end()])
+            start = match.end()
+        chunks.append(text[start:])
+        return chunks
+
+    def batches(self, items):
+        """Consecutive groups of a list, about ``chunks_per_worker`` per worker"""
+        n_batches = max(1, min(len(items), self.workers * self.chunks_per_worker))
+        bounds = np.linspace(0, len(items), n_batches + 1).astype(np.int64)
+        return [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    @tracing.traced('map_reduce.sentences')
+    def sentences(self, text):
+        """NLTK sentences of a text, tokenized chunk by chunk in the pool
+
+        Punkt decides each break from the tokens around it, so tokenizing a
+        chunk can only differ from tokenizing the whole text near the chunk's
+        start and end. Around each cut, a window of sentences is tokenized
+        again, widening until the window's first and last sentences agree with
+        the chunk results (or it spans both sides entirely), and replaces them.
+        """
+        chunks = self.split(text)
+        spans = []
+        chunk_start = 0
+        for chunk, part in zip(chunks, self.map(_sentence_spans, chunks)):
+            part = [(start + chunk_start, end + chunk_start) for start, end in part]
+            if spans and part:
+                part = self._stitch(text, spans, part)
+            spans.extend(part)
+            chunk_start += len(chunk)
+        return [text[start:end] for start, end in spans]
+
+    def _stitch(self, text, spans, part):
+        """Re-tokenize sentences around the cut between ``spans`` and ``part``; returns the rest of ``part``"""
+        width = 2
+        while True:
+            left = spans[-width:]
+            right = part[:width]
+            window_start = left[0][0]
+            window = [
+                (start + window_start, end + window_start)
+                for start, end in _sentence_spans(text[window_start:right[-1][1]])
+            ]
+            if not window:
+                # Punkt found no sentence to replace them with, so keep the chunk results
+                return part
+            settled_left = window[0] == left[0] or len(left) == len(spans)
+            settled_right = window[-1] == right[-1] or len(right) == len(part)
+            if (settled_left and settled_right) or width >= max(len(spans), len(part)):
+                break
+            width *= 2
+        spans[-len(left):] = window
+        return part[len(right):]
+
+    def tokenize(self, text, stop_words=None):
+        """TokenizedDocument of ``text``, with its sentences split in the pool if it is large"""
+        document = TokenizedDocument.of(text, stop_words)
+        if self.should_split(len(document.text)):
+            document.ensure_sentences(self.sentences)
+        return document
+
+    @tracing.traced('map_reduce.encode')
+    def encode(self, texts):
+        """Embeddings of many texts, encoded batch by batch by the workers"""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(self.map(_encode_texts, self.batches(texts)))
+
+
+_default_map_reduce = None
+_default_lock = threading.Lock()
+
+
+def get_map_reduce():
+    """Get the process-wide map-reduce pool, or None unless EXAM_PREP_MAPREDUCE_WORKERS is set
+
+    ``EXAM_PREP_MAPREDUCE_WORKERS=0`` uses one worker per CPU, and
+    ``EXAM_PREP_MAPREDUCE_MIN_SIZE`` sets the text length in characters from
+    which documents are split (default 1 MiB).
+    """
+    global _default_map_reduce
+    workers = os.environ.get('EXAM_PREP_MAPREDUCE_WORKERS')
+    if not workers:
+        return None
+    if _default_map_reduce is None:
+        with _default_lock:
+            if _default_map_reduce is None:
+                min_size = os.environ.get('EXAM_PREP_MAPREDUCE_MIN_SIZE')
+                _default_map_reduce = MapReduce(
+                    workers=int(workers) or None,
+                    min_size=int(min_size) if min_size else 1024 ** 2
+                )
+                atexit.register(_default_map_reduce.shutdown)
+                logger.info(f"Splitting large documents over {_default_map_reduce.workers} worker processes")
+    return _default_map_reduce
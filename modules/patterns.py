@@ -0,0 +1,86 @@
+"""Precompiled regular expressions and scanners shared by the text modules"""
+import re
+
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+WHITESPACE = re.compile(r'\s+')
+NON_BASIC_CHARS = re.compile(r'[^\w\s.,!?;:]')
+# Line breaks and semicolons separate points; sentence punctuation is handled per line
+POINT_SPLIT = re.compile(r'[\n;]+')
+BULLET_PREFIX = re.compile(r'^\s*(?:(?:[-*\u2022]|\(?\d+[.)]|\(?[a-z][.)])\s+)+', re.IGNORECASE)
+
+# One group per indicator family, so a single scan finds both; matched on
+# lowercased text, which is cheaper than re.IGNORECASE
+STRUCTURE_WORDS = re.compile(
+    r'\b(first|second|third|finally)\b'
+    r'|\b(therefore|however|moreover)\b'
+)
+EXAMPLE_PHRASES = ('example', 'for instance', 'such as')
+
+SIMPLE_REPLACEMENTS = {
+    'utilize': 'use',
+    'facilitate': 'help',
+    'implement': 'use',
+    'numerous': 'many',
+    'terminate': 'end'
+}
+SIMPLIFY_WORDS = re.compile(
+    r'\b(' + '|'.join(map(re.escape, SIMPLE_REPLACEMENTS)) + r')\b',
+    re.IGNORECASE
+)
+
+
+def split_sentences(text):
+    """Split on runs of sentence punctuation (pieces may be empty)"""
+    return SENTENCE_SPLIT.split(text)
+
+
+def split_points(text):
+    """Split text into stripped points: lines, bullets and sentences
+
+    Lines ending in a colon are treated as headings and skipped.
+    """
+    points = []
+    for line in POINT_SPLIT.split(text):
+        if line.rstrip().endswith(':'):
+            continue
+        for piece in SENTENCE_SPLIT.split(BULLET_PREFIX.sub('', line)):
+            piece = piece.strip()
+            if piece:
+                points.append(piece)
+    return points
+
+
+def scan_structure(text):
+    """Count the structure indicators of a text
+
+    Sequence words and connectives are counted in one regex pass over the
+    lowercased text; example phrases, periods, commas and newlines are plain
+    ``str.count`` scans. Returns the six counts.
+    """
+    lowered = text.lower()
+    sequence = connective = 0
+    for seq, _ in STRUCTURE_WORDS.findall(lowered):
+        if seq:
+            sequence += 1
+        else:
+            connective += 1
+    # Plain substring counts, as the phrases need no word boundaries
+    example = sum(lowered.count(phrase) for phrase in EXAMPLE_PHRASES)
+
+    return {
+        'sequence': sequence,
+        'connective': connective,
+        'example': example,
+        'period': text.count('.'),
+        'comma': text.count(','),
+        'newline': text.count('\n')
+    }
+
+
+def _replace_simple_word(match):
+    return SIMPLE_REPLACEMENTS[match.group(1).lower()]
+
+
+def simplify_words(text):
+    """Replace complex words with simpler ones, returning (text, replacements made)"""
+    return SIMPLIFY_WORDS.subn(_replace_simple_word, text)
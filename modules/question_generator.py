@@ -1,64 +1,131 @@
-import random
 import re
-from sentence_transformers import SentenceTransformer
-import numpy as np
+from collections import OrderedDict
+from modules.distractors import TermIndex
+from modules.embedding_service import get_embedding_service
+from modules.keyphrases import KeyphraseExtractor, get_keyphrase_extractor
+from modules.mapreduce import get_map_reduce
+from modules.tokenized_document import TokenizedDocument
+from modules.summarizer import ExtractiveSummarizer
+from utils import tracing
+from utils.memo import MemoCache, make_rng, sample_unique
+
+WORD = re.compile(r'\w+')
+
+QUESTION_TEMPLATES = [
+    "Explain the concept of {key_term} in your own words.",
+    "What is the significance of {key_term}?",
+    "How does {key_term} relate to other concepts in the text?",
+    "Describe the process of {key_term}.",
+    "What are the main characteristics of {key_term}?",
+    "Compare and contrast {key_term} with similar concepts.",
+    "What would happen if {key_term} was absent?",
+    "How is {key_term} applied in real-world scenarios?"
+]
 
 class QuestionGenerator:
-    def __init__(self):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-    def generate_questions(self, text, num_questions=10):
-        """Generate various types of questions from text"""
-        sentences = self._extract_important_sentences(text)
-        questions = []
-        
-        question_templates = [
-            "Explain the concept of {key_term} in your own words.",
-            "What is the significance of {key_term}?",
-            "How does {key_term} relate to other concepts in the text?",
-            "Describe the process of {key_term}.",
-            "What are the main characteristics of {key_term}?",
-            "Compare and contrast {key_term} with similar concepts.",
-            "What would happen if {key_term} was absent?",
-            "How is {key_term} applied in real-world scenarios?"
-        ]
-        
-        key_terms = self._extract_key_terms(text)
-        
-        for _ in range(num_questions):
-            if key_terms:
-                term = random.choice(key_terms)
-                template = random.choice(question_templates)
-                question = template.format(key_term=term)
-                questions.append(question)
-            else:
-                # Fallback: use sentence-based questions
-                if sentences:
-                    sentence = random.choice(sentences)
-                    question = f"Explain: {sentence}"
-                    questions.append(question)
-        
-        return list(set(questions))[:num_questions]
+    # Draws allowed per requested question before settling for fewer
+    attempts_per_item = 20
     
-    def generate_mcqs(self, text, num_questions=5):
-        """Generate multiple choice questions"""
-        key_terms = self._extract_key_terms(text)
+    def __init__(self, embedding_service=None, memo_entries=128, keyphrase_extractor=None, map_reduce=None):
+        self.embedder = embedding_service or get_embedding_service()
+        if keyphrase_extractor is None:
+            keyphrase_extractor = KeyphraseExtractor(map_reduce=map_reduce) if map_reduce is not None else get_keyphrase_extractor()
+        self.keyphrases = keyphrase_extractor
+        # Pool workers load the default model, so only use the pool by default with the default service;
+        # map_reduce=False turns it off
+        if map_reduce is None and self.embedder is get_embedding_service():
+            map_reduce = get_map_reduce()
+        self.summarizer = ExtractiveSummarizer(self.embedder, map_reduce=map_reduce or None)
+        self._term_lookups = OrderedDict()
+        self._results = MemoCache(memo_entries)
+        
+    @tracing.traced('question_generator.generate_questions')
+    def generate_questions(self, text, num_questions=10, seed=0, progress_callback=None):
+        """Generate various types of questions from text
+        
+        The output depends only on the document, ``num_questions`` and
+        ``seed``; repeated requests are served from the memo cache.
+        ``progress_callback(done, total)`` is called after each step.
+        """
+        document = TokenizedDocument.of(text)
+        key = (document.digest, 'questions', num_questions, seed)
+        return self._results.get_or_compute(
+            key, lambda: self._generate_questions(document, num_questions, make_rng(*key), progress_callback)
+        )
+    
+    def _generate_questions(self, document, num_questions, rng, progress_callback=None):
+        """Sample distinct questions until ``num_questions`` or the attempt budget is reached"""
+        key_terms = self._extract_key_terms(document)
+        if progress_callback:
+            progress_callback(1, 2)
+        
+        if key_terms:
+            def draw():
+                return rng.choice(QUESTION_TEMPLATES).format(key_term=rng.choice(key_terms))
+            available = len(key_terms) * len(QUESTION_TEMPLATES)
+        else:
+            # Fallback: use sentence-based questions
+            sentences = self._extract_important_sentences(document)
+            if not sentences:
+                return []
+            
+            def draw():
+                return f"Explain: {rng.choice(sentences)}"
+            available = len(set(sentences))
+        
+        questions = sample_unique(draw, min(num_questions, available), num_questions * self.attempts_per_item)
+        if progress_callback:
+            progress_callback(2, 2)
+        return questions
+    
+    @tracing.traced('question_generator.generate_mcqs')
+    def generate_mcqs(self, text, num_questions=5, seed=0, progress_callback=None):
+        """Generate multiple choice questions
+        
+        Each question blanks a key term out of a sentence that uses it; the
+        distractors are other key terms of the document that are semantically
+        close to the answer, found in a per-document term index. Option order
+        is seeded like ``generate_questions``. ``progress_callback(done, total)``
+        is called once the term index is ready and after each question.
+        """
+        document = TokenizedDocument.of(text)
+        key = (document.digest, 'mcqs', num_questions, seed)
+        return self._results.get_or_compute(
+            key, lambda: self._generate_mcqs(document, num_questions, make_rng(*key), progress_callback)
+        )
+    
+    def _generate_mcqs(self, document, num_questions, rng, progress_callback=None):
+        """Build one cloze question per top key term"""
+        key_terms = self._extract_key_terms(document, top_n=max(20, num_questions * 4))
+        if not key_terms:
+            return []
+        
+        terms = key_terms[:num_questions]
+        index, contexts = self._get_term_lookup(document, key_terms)
+        distractor_lists = index.all_distractors(3, terms)
+        total = len(terms) + 1
+        if progress_callback:
+            progress_callback(1, total)
         mcqs = []
         
-        for term in key_terms[:num_questions]:
-            question = f"What is {term}?"
-            
-            # Generate options (simplified - in production, use more sophisticated methods)
-            correct = f"The main concept discussed in the text"
-            incorrect_options = [
-                "An unrelated concept",
-                "A secondary topic mentioned briefly",
-                "Not covered in the material",
-                "A historical reference"
-            ]
+        for term, distractors in zip(terms, distractor_lists):
+            context = contexts.get(term)
+            if context and len(distractors) == 3:
+                question = f"Which term best completes the statement: \"{context}\"?"
+                correct = term
+                options = [correct] + distractors
+            else:
+                question = f"What is {term}?"
+                correct = f"The main concept discussed in the text"
+                incorrect_options = [
+                    "An unrelated concept",
+                    "A secondary topic mentioned briefly",
+                    "Not covered in the material",
+                    "A historical reference"
+                ]
+                options = [correct] + rng.sample(incorrect_options, 3)
             
-            options = [correct] + random.sample(incorrect_options, 3)
-            random.shuffle(options)
+            rng.shuffle(options)
             
             mcq = {
                 'question': question,
@@ -69,62 +136,96 @@ class QuestionGenerator:
                 'correct': chr(97 + options.index(correct))  # 'a', 'b', etc.
             }
             mcqs.append(mcq)
+            if progress_callback:
+                progress_callback(len(mcqs) + 1, total)
         
         return mcqs
     
-    def generate_summary(self, text, num_sentences=5):
-        """Generate text summary"""
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-        
-        if len(sentences) <= num_sentences:
-            return " ".join(sentences)
-        
-        # Simple extraction-based summary (in production, use abstractive methods)
-        embeddings = self.model.encode(sentences)
-        doc_embedding = self.model.encode([text])
-        
-        similarities = []
-        for sent_embedding in embeddings:
-            similarity = np.dot(sent_embedding, doc_embedding[0]) / (
-                np.linalg.norm(sent_embedding) * np.linalg.norm(doc_embedding[0])
+    def clear_cache(self):
+        """Forget memoized results, term lookups and analyzed key phrases"""
+        self._results.clear()
+        self._term_lookups.clear()
+        self.keyphrases.clear_cache()
+    
+    def _get_term_lookup(self, document, key_terms):
+        """Term similarity index and term contexts of a document, built once and kept in an LRU"""
+        key = (document.digest, tuple(key_terms))
+        lookup = self._term_lookups.get(key)
+        if lookup is None:
+            lookup = (
+                TermIndex.build(key_terms, self.embedder),
+                find_term_contexts(document.long_sentences, key_terms)
             )
-            similarities.append(similarity)
-        
-        top_indices = np.argsort(similarities)[-num_sentences:]
-        top_sentences = [sentences[i] for i in sorted(top_indices)]
+            self._term_lookups[key] = lookup
+            while len(self._term_lookups) > 16:
+                self._term_lookups.popitem(last=False)
+        else:
+            self._term_lookups.move_to_end(key)
+        return lookup
+    
+    @tracing.traced('question_generator.generate_summary')
+    def generate_summary(self, text, num_sentences=5, diversity=0.0, progress_callback=None):
+        """Generate text summary
+        
+        ``diversity`` between 0 and 1 trades centroid relevance for less
+        redundant sentences (MMR). ``progress_callback(done, total)`` is called
+        once the sentences are split and once they are selected.
+        """
+        document = TokenizedDocument.of(text)
+        sentences = document.long_sentences
+        if progress_callback:
+            progress_callback(1, 2)
         
-        return " ".join(top_sentences)
+        if len(sentences) <= num_sentences:
+            summary = " ".join(sentences)
+        else:
+            # Simple extraction-based summary (in production, use abstractive methods)
+            summary = " ".join(self.summarizer.summarize(sentences, num_sentences, diversity))
+        if progress_callback:
+            progress_callback(2, 2)
+        return summary
     
+    @tracing.traced('question_generator.extract_important_sentences')
     def _extract_important_sentences(self, text):
         """Extract important sentences using embedding similarity"""
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
+        document = TokenizedDocument.of(text)
+        sentences = document.long_sentences
         
         if len(sentences) <= 10:
             return sentences
         
-        embeddings = self.model.encode(sentences)
-        doc_embedding = self.model.encode([text])
-        
-        similarities = []
-        for sent_embedding in embeddings:
-            similarity = np.dot(sent_embedding, doc_embedding[0]) / (
-                np.linalg.norm(sent_embedding) * np.linalg.norm(doc_embedding[0])
-            )
-            similarities.append(similarity)
-        
-        top_indices = np.argsort(similarities)[-10:]
-        return [sentences[i] for i in top_indices]
+        return [sentences[i] for i in self.summarizer.select(sentences, 10)]
     
-    def _extract_key_terms(self, text):
-        """Extract key terms from text"""
-        words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
-        
-        # Simple frequency-based approach
-        from collections import Counter
-        common_words = set(['which', 'what', 'when', 'where', 'why', 'how', 'this', 'that', 'with', 'from'])
-        filtered_words = [word for word in words if word not in common_words and len(word) > 3]
-        
-        term_freq = Counter(filtered_words)
-        return [term for term, freq in term_freq.most_common(20)]
\ No newline at end of file
+    @tracing.traced('question_generator.extract_key_terms')
+    def _extract_key_terms(self, text, top_n=20):
+        """Extract key terms and phrases from text with the shared TF-IDF phrase extractor"""
+        return self.keyphrases.extract(text, top_n)
+
+
+def find_term_contexts(sentences, terms):
+    """First sentence using each term, with the term blanked out
+    
+    Terms are indexed by their first word, so each sentence is split into
+    words once and only the terms whose first word it contains are matched
+    against it with their (whole phrase, case-insensitive) regex.
+    """
+    patterns = {}
+    by_first_word = {}
+    for term in dict.fromkeys(terms):
+        words = WORD.findall(term.lower())
+        if words:
+            patterns[term] = re.compile(r'\b' + r'\s+'.join(map(re.escape, term.split())) + r'\b', re.IGNORECASE)
+            by_first_word.setdefault(words[0], []).append(term)
+    
+    contexts = {}
+    for sentence in sentences:
+        if len(contexts) == len(patterns):
+            break
+        for word in by_first_word.keys() & WORD.findall(sentence.lower()):
+            for term in by_first_word[word]:
+                if term in contexts:
+                    continue
+                blanked, found = patterns[term].subn('_____', sentence)
+                if found:
+                    contexts[term] = blanked
+    return contexts
@@ -0,0 +1,47 @@
+import numpy as np
+from modules.patterns import split_points
+
+
+class Rubric:
+    """Key points of a model answer with their unit-length embeddings
+
+    A key point counts as covered when some sentence of the student answer
+    has cosine similarity of at least ``threshold`` with it.
+    """
+
+    def __init__(self, key_points, embeddings, threshold=0.55):
+        self.key_points = list(key_points)
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.threshold = threshold
+
+    @classmethod
+    def build(cls, model_answer, embedding_service, threshold=0.55):
+        """Split a model answer into key points and embed them once"""
+        key_points = split_points(model_answer) or [model_answer.strip()]
+        embeddings = embedding_service.encode(key_points)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return cls(key_points, embeddings / np.maximum(norms, 1e-12), threshold)
+
+    def __len__(self):
+        return len(self.key_points)
+
+    def coverage(self, similarity, sentences):
+        """Per-key-point coverage from a (sentences x key points) similarity matrix
+
+        Returns the key point reports and the answer's credit: the mean over
+        key points of best similarity relative to the threshold, capped at 1.
+        """
+        best_rows = similarity.argmax(axis=0)
+        best_scores = similarity[best_rows, np.arange(len(self.key_points))]
+        credit = float(np.clip(best_scores / self.threshold, 0.0, 1.0).mean())
+
+        key_points = [
+            {
+                'key_point': key_point,
+                'similarity': round(float(score), 3),
+                'covered': bool(score >= self.threshold),
+                'best_sentence': sentences[row]
+            }
+            for key_point, score, row in zip(self.key_points, best_scores, best_rows)
+        ]
+        return key_points, credit
@@ -0,0 +1,94 @@
+import numpy as np
+from modules.embedding_service import get_embedding_service
+
+
+class ExtractiveSummarizer:
+    """Rank sentences by similarity to the document centroid
+
+    The centroid is the mean of the normalized sentence embeddings, so long
+    documents are represented in full rather than truncated to the encoder's
+    input length. Top-k selection uses ``np.argpartition``; with ``diversity``
+    > 0 sentences are picked by maximal marginal relevance (MMR) from the best
+    ``mmr_candidates`` sentences, which keeps selection cost independent of
+    document length. Documents with more than ``max_sentences`` sentences are
+    sampled evenly before encoding so that very large inputs stay bounded.
+    With a ``map_reduce`` pool, the sentences of a large document are encoded
+    batch by batch by the pool's workers, which must load the same model,
+    and the centroid and ranking are computed over all of them.
+    """
+
+    def __init__(self, embedding_service=None, mmr_candidates=200, max_sentences=20000, map_reduce=None):
+        self.embedder = embedding_service or get_embedding_service()
+        self.mmr_candidates = mmr_candidates
+        self.max_sentences = max_sentences
+        self.map_reduce = map_reduce
+
+    def embed(self, sentences):
+        """Unit-length sentence embeddings"""
+        if self.map_reduce is not None and self.map_reduce.should_split(sum(map(len, sentences))):
+            embeddings = self.map_reduce.encode(sentences)
+        else:
+            embeddings = self.embedder.encode(sentences)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def score(self, embeddings):
+        """Cosine similarity of each sentence to the document centroid"""
+        centroid = embeddings.mean(axis=0)
+        centroid /= max(np.linalg.norm(centroid), 1e-12)
+        return embeddings @ centroid
+
+    def select(self, sentences, k, diversity=0.0):
+        """Indices of the ``k`` best sentences, best first"""
+        if k <= 0 or not sentences:
+            return []
+
+        positions = np.arange(len(sentences))
+        if self.max_sentences and len(sentences) > self.max_sentences:
+            positions = np.unique(np.linspace(0, len(sentences) - 1, self.max_sentences).astype(np.int64))
+            sentences = [sentences[i] for i in positions]
+
+        embeddings = self.embed(sentences)
+        scores = self.score(embeddings)
+
+        if diversity > 0:
+            selected = self._select_mmr(embeddings, scores, k, diversity)
+        else:
+            selected = top_k(scores, k)
+        return positions[selected].tolist()
+
+    def _select_mmr(self, embeddings, scores, k, diversity):
+        """Greedy MMR: trade centroid similarity against redundancy"""
+        candidates = top_k(scores, min(len(scores), max(k, self.mmr_candidates)))
+        candidate_embeddings = embeddings[candidates]
+        relevance = scores[candidates]
+        redundancy = np.full(len(candidates), -np.inf)
+        available = np.ones(len(candidates), dtype=bool)
+        selected = []
+
+        for _ in range(min(k, len(candidates))):
+            penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+            mmr = (1 - diversity) * relevance - diversity * penalty
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(candidates[best])
+            available[best] = False
+            redundancy = np.maximum(redundancy, candidate_embeddings @ candidate_embeddings[best])
+
+        return np.array(selected, dtype=np.int64)
+
+    def summarize(self, sentences, k, diversity=0.0):
+        """The selected sentences in document order"""
+        return [sentences[i] for i in sorted(self.select(sentences, k, diversity))]
+
+
+def top_k(scores, k):
+    """Indices of the ``k`` largest scores, largest first, without a full sort"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        indices = np.argpartition(-scores, k - 1)[:k]
+    else:
+        indices = np.arange(len(scores))
+    return indices[np.argsort(-scores[indices], kind='stable')]
@@ -0,0 +1,141 @@
+import itertools
+import numpy as np
+
+
+class Vocabulary:
+    """Interns terms to dense integer ids in first-seen order
+
+    Because ids follow first occurrence, ordering ties by id is the same as
+    ``Counter.most_common`` ordering ties by insertion.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.terms = []
+
+    def __len__(self):
+        return len(self.terms)
+
+    def encode(self, tokens):
+        """Intern a token stream and return its ids as an int32 array"""
+        ids = self.ids
+        encoded = np.fromiter((ids.setdefault(token, len(ids)) for token in tokens), dtype=np.int32)
+        self.terms.extend(itertools.islice(ids, len(self.terms), None))
+        return encoded
+
+    def mask(self, terms):
+        """Boolean array over ids, True for the given terms that are in the vocabulary"""
+        mask = np.zeros(len(self.terms), dtype=bool)
+        known = [self.ids[term] for term in terms if term in self.ids]
+        mask[known] = True
+        return mask
+
+
+class TermStats:
+    """Token stream stored as vocabulary ids with ``np.bincount`` frequencies
+
+    Holding one int32 per token plus one entry per distinct term keeps memory
+    linear in the document with a small constant, and n-gram counts are
+    computed from the same id array without building token tuples.
+    """
+
+    def __init__(self, ids, vocabulary):
+        self.ids = ids
+        self.vocabulary = vocabulary
+        self.counts = np.bincount(ids, minlength=len(vocabulary)) if len(vocabulary) else np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_tokens(cls, tokens, vocabulary=None):
+        vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        return cls(vocabulary.encode(tokens), vocabulary)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def max_count(self):
+        """Frequency of the most common term (0 for an empty stream)"""
+        return int(self.counts.max()) if len(self.counts) else 0
+
+    def most_common(self, n, exclude=()):
+        """(term, count) pairs of the ``n`` most frequent terms, ties in first-seen order"""
+        counts = self.counts
+        if exclude:
+            counts = np.where(self.vocabulary.mask(exclude), 0, counts)
+        terms = self.vocabulary.terms
+        return [(terms[i], int(counts[i])) for i in most_common_ids(counts, n)]
+
+    def top_terms(self, n, exclude=()):
+        return [term for term, _ in self.most_common(n, exclude)]
+
+    def ngram_counts(self, n, exclude=()):
+        """Counts of every run of ``n`` consecutive tokens
+
+        Runs containing a term from ``exclude`` are skipped, so excluded terms
+        (e.g. stopwords) act as phrase boundaries. Returns an ``(m, n)`` array
+        of ids, their counts and the stream position of each first occurrence.
+        """
+        grams, counts, first, _, _ = self.ngram_occurrences(n, exclude)
+        return grams, counts, first
+
+    def ngram_occurrences(self, n, exclude=()):
+        """``ngram_counts`` plus, for every kept run, its start position and n-gram row"""
+        size = len(self.ids) - n + 1
+        if size <= 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return np.zeros((0, n), dtype=np.int64), empty, empty, empty, empty
+
+        windows = np.lib.stride_tricks.sliding_window_view(self.ids.astype(np.int64), n)
+        positions = np.arange(size)
+        if exclude:
+            blocked = self.vocabulary.mask(exclude)[self.ids]
+            keep = ~np.lib.stride_tricks.sliding_window_view(blocked, n).any(axis=1)
+            windows = windows[keep]
+            positions = positions[keep]
+
+        base = max(len(self.vocabulary), 1)
+        if base ** n < 2 ** 63:
+            # Pack each window into one int64 so np.unique works on a flat array
+            keys = np.zeros(len(windows), dtype=np.int64)
+            for column in range(n):
+                keys = keys * base + windows[:, column]
+            unique, first, inverse, counts = np.unique(
+                keys, return_index=True, return_inverse=True, return_counts=True
+            )
+            grams = np.stack([(unique // base ** (n - 1 - column)) % base for column in range(n)], axis=1)
+        else:
+            grams, first, inverse, counts = np.unique(
+                windows, axis=0, return_index=True, return_inverse=True, return_counts=True
+            )
+        return grams, counts, positions[first], inverse.reshape(-1), positions
+
+    def most_common_ngrams(self, n, top, exclude=()):
+        """(term tuple, count) pairs of the ``top`` most frequent n-grams, ties in first-seen order"""
+        grams, counts, first = self.ngram_counts(n, exclude)
+        terms = self.vocabulary.terms
+        return [
+            (tuple(terms[i] for i in grams[row]), int(counts[row]))
+            for row in most_common_ids(counts, top, first)
+        ]
+
+
+def most_common_ids(counts, k, order=None):
+    """Indices of the ``k`` largest non-zero counts, largest first
+
+    Ties are broken by ``order`` (default: the index itself), smallest first.
+    Selection uses ``np.argpartition`` so only the top ``k`` are sorted.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    candidates = np.flatnonzero(counts)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    rank = candidates if order is None else np.asarray(order, dtype=np.int64)[candidates]
+    # One key orders by count, then by earliest rank; rank < span keeps keys distinct
+    span = int(rank.max()) + 1
+    keys = counts[candidates] * span + (span - 1 - rank)
+    if k < len(keys):
+        top = np.argpartition(-keys, k - 1)[:k]
+    else:
+        top = np.arange(len(keys))
+    return candidates[top[np.argsort(-keys[top])]]
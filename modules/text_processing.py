@@ -1,128 +1,205 @@
-import nltk
-import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
 import numpy as np
 import logging
+import sys
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from utils.lazy_import import lazy_import
+from utils import tracing
+from modules.keyphrases import KeyphraseExtractor, get_keyphrase_extractor
+from modules.mapreduce import get_map_reduce
+from modules.tokenized_document import TokenizedDocument
+from modules.term_stats import TermStats, Vocabulary, most_common_ids
+from modules.patterns import NON_BASIC_CHARS, WHITESPACE
+from modules.topic_model import get_topic_model, submit_update
+
+nltk = lazy_import('nltk')
+nltk_corpus = lazy_import('nltk.corpus')
+sklearn_text = lazy_import('sklearn.feature_extraction.text')
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Required NLTK resources and the data paths that satisfy each of them
+NLTK_RESOURCES = {
+    'punkt': ['tokenizers/punkt_tab', 'tokenizers/punkt'],
+    'stopwords': ['corpora/stopwords']
+}
+
+# Seconds identify_topics waits for a topic model update before using TF-IDF terms
+TOPIC_UPDATE_TIME_BUDGET = 2.0
+# Characters of a streamed document kept for key phrases, topics and generation
+STREAM_EXCERPT_CHARS = 4 * 1024 * 1024
+
+_nltk_checked = False
+
+
+def _has_nltk_resource(paths):
+    for path in paths:
+        try:
+            nltk.data.find(path)
+            return True
+        except LookupError:
+            continue
+    return False
+
+
+def check_nltk_data():
+    """Return missing NLTK resources without attempting any downloads"""
+    global _nltk_checked
+    missing = [name for name, paths in NLTK_RESOURCES.items() if not _has_nltk_resource(paths)]
+    if missing and not _nltk_checked:
+        logger.warning(
+            f"Missing NLTK resources {missing}; install them with "
+            f"'exam-prep-setup' or 'python -m modules.text_processing'"
+        )
+    _nltk_checked = True
+    return missing
+
+
 # Download required NLTK data with error handling
 def download_nltk_data():
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt')
-    
-    try:
-        nltk.data.find('corpora/stopwords')
-    except LookupError:
-        nltk.download('stopwords')
+    """Download missing NLTK resources (needs network access; run once at setup)"""
+    for paths in NLTK_RESOURCES.values():
+        # Newer NLTK releases need punkt_tab where older ones used punkt
+        for path in paths:
+            if _has_nltk_resource(paths):
+                break
+            nltk.download(path.rsplit('/', 1)[-1])
 
-download_nltk_data()
 
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
-from nltk.probability import FreqDist
+def main():
+    """Install the NLTK data the pipeline needs (the ``exam-prep-setup`` command)"""
+    download_nltk_data()
+    missing = check_nltk_data()
+    if missing:
+        print(f"Could not install NLTK resources: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    print("NLTK data is installed")
+    return 0
+
 
 class TextProcessor:
-    def __init__(self):
+    def __init__(self, topic_model=None, keyphrase_extractor=None, map_reduce=None):
+        self._topic_model = topic_model
+        if keyphrase_extractor is None:
+            keyphrase_extractor = KeyphraseExtractor(map_reduce=map_reduce) if map_reduce is not None else get_keyphrase_extractor()
+        self.keyphrases = keyphrase_extractor
+        self.map_reduce = (map_reduce if map_reduce is not None else get_map_reduce()) or None
+        if not _nltk_checked:
+            check_nltk_data()
         try:
-            self.stop_words = set(stopwords.words('english'))
+            self.stop_words = set(nltk_corpus.stopwords.words('english'))
         except Exception as e:
             logger.warning(f"Could not load stopwords: {e}")
             self.stop_words = set()
+    
+    @property
+    def topic_model(self):
+        """Topic model shared by the course, created on first use"""
+        if self._topic_model is None:
+            self._topic_model = get_topic_model()
+        return self._topic_model
+    
+    def tokenize(self, text):
+        """Tokenize text once so that the methods below can share the result
         
+        With a map-reduce pool, the sentences of a large text are split chunk
+        by chunk in the pool.
+        """
+        if self.map_reduce is not None:
+            return self.map_reduce.tokenize(text, self.stop_words)
+        return TokenizedDocument.of(text, self.stop_words)
+        
+    @tracing.traced('text_processor.clean_text')
     def clean_text(self, text):
         """Clean and preprocess text"""
+        if isinstance(text, TokenizedDocument):
+            text = text.text
         if not text or not isinstance(text, str):
             return ""
         
         try:
             # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text)
+            text = WHITESPACE.sub(' ', text)
             # Remove special characters but keep basic punctuation
-            text = re.sub(r'[^\w\s.,!?;:]', '', text)
+            text = NON_BASIC_CHARS.sub('', text)
             return text.strip()
         except Exception as e:
             logger.error(f"Error cleaning text: {e}")
             return text if text else ""
     
+    @tracing.traced('text_processor.segment_text')
     def segment_text(self, text, segment_length=500):
         """Segment text into chunks"""
         if not text:
             return []
             
+        document = self.tokenize(text)
         try:
-            sentences = sent_tokenize(text)
-            segments = []
-            current_segment = ""
-            
-            for sentence in sentences:
-                if len(current_segment + " " + sentence) <= segment_length:
-                    current_segment += " " + sentence
-                else:
-                    if current_segment:
-                        segments.append(current_segment.strip())
-                    current_segment = sentence
-            
-            if current_segment:
-                segments.append(current_segment.strip())
-                
-            return segments
+            return document.segments(segment_length)
         except Exception as e:
             logger.error(f"Error segmenting text: {e}")
-            return [text] if text else []
+            return [document.text] if document.text else []
     
+    @tracing.traced('text_processor.extract_key_phrases')
     def extract_key_phrases(self, text, top_n=15):
-        """Extract key phrases using TF-IDF"""
+        """Extract 1-3 word key phrases using TF-IDF over the text's segments"""
         if not text:
             return []
             
         try:
-            words = word_tokenize(text.lower())
-            words = [word for word in words if word.isalnum() and word not in self.stop_words]
-            
-            freq_dist = FreqDist(words)
-            return [word for word, freq in freq_dist.most_common(top_n)]
+            return self.keyphrases.extract(self.tokenize(text), top_n)
         except Exception as e:
             logger.error(f"Error extracting key phrases: {e}")
             return []
     
-    def identify_topics(self, text, num_topics=5):
-        """Identify main topics using LDA"""
+    @tracing.traced('text_processor.identify_topics')
+    def identify_topics(self, text, num_topics=5, time_budget=TOPIC_UPDATE_TIME_BUDGET):
+        """Identify main topics with the course's online LDA model
+        
+        A new document's segments are folded into the persistent topic model and
+        then described with a cheap ``transform``; documents the model has seen
+        are only described. If the update does not finish within ``time_budget``
+        seconds (``None`` waits for it) it keeps running in the background and
+        the top TF-IDF terms of the document are returned instead.
+        """
         if not text:
             return ["No text available for topic modeling"]
             
         try:
-            segments = self.segment_text(text)
+            document = self.tokenize(text)
+            segments = self.segment_text(document)
             
             if len(segments) < 2:
                 return ["Insufficient text for topic modeling"]
             
-            vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
-            tfidf_matrix = vectorizer.fit_transform(segments)
-            
-            lda = LatentDirichletAllocation(
-                n_components=min(num_topics, len(segments)), 
-                random_state=42
-            )
-            lda.fit(tfidf_matrix)
+            num_topics = min(num_topics, len(segments))
+            if not self.topic_model.has_seen(document.digest):
+                update = submit_update(self.topic_model, segments, document.digest)
+                try:
+                    update.result(timeout=time_budget)
+                except FutureTimeoutError:
+                    logger.info("Topic model update exceeded its time budget, using TF-IDF terms")
+                    return self._tfidf_topics(segments, num_topics)
             
-            feature_names = vectorizer.get_feature_names_out()
-            topics = []
-            
-            for topic_idx, topic in enumerate(lda.components_):
-                top_features = [feature_names[i] for i in topic.argsort()[:-6:-1]]
-                topics.append(" ".join(top_features))
-                
-            return topics
+            return self.topic_model.describe(segments, num_topics)
         except Exception as e:
             logger.error(f"Error in topic modeling: {e}")
             return ["Error in topic identification"]
     
+    def _tfidf_topics(self, segments, num_topics, terms_per_topic=5):
+        """Group the document's top TF-IDF terms into pseudo-topics"""
+        vectorizer = sklearn_text.TfidfVectorizer(max_features=100, stop_words='english')
+        tfidf_matrix = vectorizer.fit_transform(segments)
+        
+        scores = np.asarray(tfidf_matrix.sum(axis=0)).ravel()
+        feature_names = vectorizer.get_feature_names_out()
+        top_terms = [feature_names[i] for i in np.argsort(scores)[::-1][:num_topics * terms_per_topic]]
+        
+        return [
+            " ".join(top_terms[i:i + terms_per_topic])
+            for i in range(0, len(top_terms), terms_per_topic)
+        ]
+    
+    @tracing.traced('text_processor.process_text')
     def process_text(self, text):
         """Main text processing pipeline"""
         if not text:
@@ -134,18 +211,23 @@ class TextProcessor:
             }
             
         try:
-            cleaned_text = self.clean_text(text)
-            key_phrases = self.extract_key_phrases(cleaned_text)
-            topics = self.identify_topics(cleaned_text)
+            document = self.tokenize(text)
+            cleaned_text = self.clean_text(document)
+            # Cleaning usually leaves the text as it is; keep its tokenization then
+            cleaned_document = document if cleaned_text == document.text else self.tokenize(cleaned_text)
+            key_phrases = self.extract_key_phrases(cleaned_document)
+            topics = self.identify_topics(cleaned_document)
             
             return {
                 'cleaned_text': cleaned_text,
                 'key_phrases': key_phrases,
                 'topics': topics,
-                'segments': self.segment_text(cleaned_text)
+                'segments': self.segment_text(cleaned_document)
             }
         except Exception as e:
             logger.error(f"Error processing text: {e}")
+            if isinstance(text, TokenizedDocument):
+                text = text.text
             return {
                 'cleaned_text': text[:1000] if text else "",
                 'key_phrases': [],
@@ -153,6 +235,7 @@ class TextProcessor:
                 'segments': []
             }
     
+    @tracing.traced('text_processor.get_document_stats')
     def get_document_stats(self, text):
         """Get document statistics"""
         if not text:
@@ -163,13 +246,12 @@ class TextProcessor:
             }
             
         try:
-            sentences = sent_tokenize(text)
-            words = word_tokenize(text)
+            document = self.tokenize(text)
             
             return {
-                'word_count': len(words),
-                'sentence_count': len(sentences),
-                'key_topics': self.extract_key_phrases(text, 10)
+                'word_count': len(document.words),
+                'sentence_count': len(document.sentences),
+                'key_topics': self.extract_key_phrases(document, 10)
             }
         except Exception as e:
             logger.error(f"Error getting document stats: {e}")
@@ -178,3 +260,71 @@ class TextProcessor:
                 'sentence_count': 0,
                 'key_topics': []
             }
+    
+    def read_stream(self, segments, top_n=10, excerpt_chars=STREAM_EXCERPT_CHARS):
+        """Statistics of a streamed document with an excerpt of its text
+        
+        Statistics cover every segment and are merged as the text arrives (see
+        ``get_document_stats_stream``). Only an excerpt of about
+        ``excerpt_chars`` characters is kept, made of segments spread evenly
+        over the document in their original order: whenever the kept segments
+        grow past the limit, every other one is dropped and only every
+        ``stride``-th segment is kept from then on. Memory therefore stays
+        bounded however long the document is. Returns ``(excerpt, stats)``;
+        the excerpt is the whole text when it fits.
+        """
+        kept = []
+        kept_chars = 0
+        stride = 1
+        
+        def collect():
+            nonlocal kept, kept_chars, stride
+            for index, segment in enumerate(segments):
+                if index % stride == 0:
+                    kept.append((index, segment))
+                    kept_chars += len(segment)
+                    while kept_chars > excerpt_chars and len(kept) > 1:
+                        stride *= 2
+                        kept = [(i, s) for i, s in kept if i % stride == 0]
+                        kept_chars = sum(len(s) for _, s in kept)
+                yield segment
+        
+        stats = self.get_document_stats_stream(collect(), top_n)
+        return "".join(segment for _, segment in kept), stats
+    
+    def get_document_stats_stream(self, segments, top_n=10):
+        """Get document statistics from an iterator of text segments
+        
+        Segments share one vocabulary and their term counts are summed into a
+        single array, so memory stays bounded by the vocabulary rather than the
+        document size.
+        """
+        word_count = 0
+        sentence_count = 0
+        vocabulary = Vocabulary()
+        counts = np.zeros(0, dtype=np.int64)
+        
+        try:
+            for segment in segments:
+                document = self.tokenize(segment)
+                word_count += len(document.words)
+                sentence_count += len(document.sentences)
+                segment_counts = TermStats.from_tokens(document.content_words, vocabulary).counts
+                counts = np.pad(counts, (0, len(segment_counts) - len(counts))) + segment_counts
+            
+            return {
+                'word_count': word_count,
+                'sentence_count': sentence_count,
+                'key_topics': [vocabulary.terms[i] for i in most_common_ids(counts, top_n)]
+            }
+        except Exception as e:
+            logger.error(f"Error getting streamed document stats: {e}")
+            return {
+                'word_count': 0,
+                'sentence_count': 0,
+                'key_topics': []
+            }
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,10 @@
-import random
-import re
+import hashlib
+from modules.patterns import simplify_words, split_sentences
+from utils.memo import MemoCache, make_rng
 
 class TextRewriter:
-    def __init__(self):
+    def __init__(self, memo_entries=128):
+        self._results = MemoCache(memo_entries)
         self.improvement_suggestions = [
             "Vary sentence structure",
             "Use more active voice",
@@ -14,9 +16,22 @@ class TextRewriter:
             "Add real-world applications"
         ]
         
-    def rewrite_text(self, text):
-        """Improve text by making it more human-like"""
-        sentences = re.split(r'[.!?]+', text)
+    def rewrite_text(self, text, seed=0):
+        """Improve text by making it more human-like
+        
+        The same text and ``seed`` always give the same rewrite, served from
+        the memo cache after the first call.
+        """
+        digest = hashlib.sha1(text.encode('utf-8', errors='surrogatepass')).hexdigest()
+        key = (digest, 'rewrite', seed)
+        return self._results.get_or_compute(key, lambda: self._rewrite_text(text, make_rng(*key)))
+    
+    def clear_cache(self):
+        """Forget memoized rewrites"""
+        self._results.clear()
+    
+    def _rewrite_text(self, text, rng):
+        sentences = split_sentences(text)
         improved_sentences = []
         changes_made = []
         
@@ -24,7 +39,7 @@ class TextRewriter:
             if not sentence.strip():
                 continue
                 
-            improved_sentence = self._improve_sentence(sentence.strip())
+            improved_sentence = self._improve_sentence(sentence.strip(), rng)
             if improved_sentence != sentence:
                 changes_made.append(f"Improved sentence structure: '{sentence[:50]}...'")
             improved_sentences.append(improved_sentence)
@@ -40,14 +55,14 @@ class TextRewriter:
             'changes': changes_made[:3]  # Limit to top 3 changes
         }
     
-    def _improve_sentence(self, sentence):
+    def _improve_sentence(self, sentence, rng):
         """Apply various improvements to a single sentence"""
         words = sentence.split()
         
         if len(words) < 5:
             return sentence
             
-        # Apply random improvements (simplified - in production, use NLP)
+        # Apply seeded random improvements (simplified - in production, use NLP)
         improvements = [
             self._add_transition,
             self._vary_start,
@@ -55,19 +70,19 @@ class TextRewriter:
         ]
         
         improved = sentence
-        for improvement in random.sample(improvements, min(2, len(improvements))):
-            improved = improvement(improved)
+        for improvement in rng.sample(improvements, min(2, len(improvements))):
+            improved = improvement(improved, rng)
             
         return improved
     
-    def _add_transition(self, sentence):
+    def _add_transition(self, sentence, rng):
         """Add transition words"""
         transitions = ['Additionally,', 'Furthermore,', 'Moreover,', 'However,', 'Therefore,']
         if not any(sentence.startswith(t.replace(',', '')) for t in transitions):
-            return random.choice(transitions) + ' ' + sentence[0].lower() + sentence[1:]
+            return rng.choice(transitions) + ' ' + sentence[0].lower() + sentence[1:]
         return sentence
     
-    def _vary_start(self, sentence):
+    def _vary_start(self, sentence, rng):
         """Vary sentence starting"""
         if sentence.lower().startswith('the ') or sentence.lower().startswith('this '):
             variations = [
@@ -75,21 +90,10 @@ class TextRewriter:
                 f"Specifically, {sentence[0].lower() + sentence[1:]}",
                 f"In this context, {sentence[0].lower() + sentence[1:]}"
             ]
-            return random.choice(variations)
+            return rng.choice(variations)
         return sentence
     
-    def _simplify_language(self, sentence):
+    def _simplify_language(self, sentence, rng=None):
         """Simplify complex language"""
-        replacements = {
-            'utilize': 'use',
-            'facilitate': 'help',
-            'implement': 'use',
-            'numerous': 'many',
-            'terminate': 'end'
-        }
-        
-        improved = sentence
-        for complex_word, simple_word in replacements.items():
-            improved = re.sub(r'\b' + complex_word + r'\b', simple_word, improved, flags=re.IGNORECASE)
-            
+        improved, _ = simplify_words(sentence)
         return improved
\ No newline at end of file
@@ -0,0 +1,132 @@
+import hashlib
+from functools import cached_property
+from utils.lazy_import import lazy_import
+from modules.patterns import split_sentences
+from modules.term_stats import TermStats
+from utils import tracing
+
+nltk_tokenize = lazy_import('nltk.tokenize')
+
+# Bytes held per character of text once every tokenization is cached,
+# measured on the generated benchmark corpus
+CACHED_BYTES_PER_CHAR = 44
+
+
+class TokenizedDocument:
+    """Text with its tokenizations computed once and cached
+
+    Every analysis module splits text in one of a few ways (NLTK sentences and
+    words, regex sentences, whitespace words). Passing a TokenizedDocument
+    instead of a string lets them share those results instead of re-tokenizing.
+    """
+
+    def __init__(self, text, stop_words=None):
+        self.text = text or ""
+        self.stop_words = stop_words if stop_words is not None else set()
+        self._segments = {}
+
+    @classmethod
+    def of(cls, text, stop_words=None):
+        """Return ``text`` if it is already a document, otherwise wrap it"""
+        if isinstance(text, cls):
+            if stop_words and not text.stop_words:
+                # Adopt the caller's stopwords and drop results that depend on them
+                text.stop_words = stop_words
+                text.__dict__.pop('content_words', None)
+            return text
+        return cls(text, stop_words)
+
+    def __len__(self):
+        return len(self.text)
+
+    @property
+    def nbytes(self):
+        """Estimated bytes of the tokenization caches, from the text length alone
+
+        The text itself is not included; it is usually stored next to the document.
+        """
+        return len(self.text) * CACHED_BYTES_PER_CHAR
+
+    @cached_property
+    def digest(self):
+        """SHA-1 of the text, for keying per-document caches"""
+        return hashlib.sha1(self.text.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+    @cached_property
+    def lower_text(self):
+        return self.text.lower()
+
+    @cached_property
+    def sentences(self):
+        """NLTK sentence tokens"""
+        with tracing.span('tokenize.sentences', input_size=len(self.text)):
+            return nltk_tokenize.sent_tokenize(self.text)
+
+    def ensure_sentences(self, tokenize):
+        """Fill the sentence cache with ``tokenize(text)`` unless it is already filled
+
+        Lets a caller split a large text another way, e.g. chunk by chunk in a
+        process pool, while every reader still uses ``sentences``.
+        """
+        if 'sentences' not in self.__dict__:
+            self.__dict__['sentences'] = tokenize(self.text)
+        return self.sentences
+
+    @cached_property
+    def words(self):
+        """NLTK word tokens"""
+        with tracing.span('tokenize.words', input_size=len(self.text)):
+            return nltk_tokenize.word_tokenize(self.text)
+
+    @cached_property
+    def lower_words(self):
+        return [word.lower() for word in self.words]
+
+    @cached_property
+    def content_words(self):
+        """Lowercased alphanumeric tokens that are not stopwords"""
+        return [word for word in self.lower_words if word.isalnum() and word not in self.stop_words]
+
+    @cached_property
+    def split_sentences(self):
+        """Raw pieces between sentence punctuation, as split by ``[.!?]+``"""
+        return split_sentences(self.text)
+
+    @cached_property
+    def long_sentences(self):
+        """Stripped regex sentences longer than 20 characters"""
+        return [s.strip() for s in self.split_sentences if len(s.strip()) > 20]
+
+    @cached_property
+    def whitespace_words(self):
+        """Lowercased whitespace-separated words"""
+        return self.lower_text.split()
+
+    @cached_property
+    def whitespace_stats(self):
+        """Interned term statistics of the whitespace-separated words"""
+        return TermStats.from_tokens(self.whitespace_words)
+
+    def segments(self, segment_length=500):
+        """Group sentences into chunks of at most ``segment_length`` characters"""
+        if segment_length not in self._segments:
+            self._segments[segment_length] = pack_segments(self.sentences, segment_length)
+        return self._segments[segment_length]
+
+
+def pack_segments(sentences, segment_length=500):
+    """Greedily join consecutive sentences into chunks of at most ``segment_length`` characters"""
+    segments = []
+    current_segment = ""
+
+    for sentence in sentences:
+        if len(current_segment + " " + sentence) <= segment_length:
+            current_segment += " " + sentence
+        else:
+            if current_segment:
+                segments.append(current_segment.strip())
+            current_segment = sentence
+
+    if current_segment:
+        segments.append(current_segment.strip())
+    return segments
@@ -0,0 +1,243 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves stay atomic but concurrent updates are not merged
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Model updates run here so that a time-boxed caller can return before they finish
+_update_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='topic-model')
+
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive advisory lock on ``path`` across processes"""
+    with open(path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CourseTopicModel:
+    """Online LDA topic model for a course, updated as documents arrive
+
+    Segments are vectorized with a stateless hashing vectorizer and weighted by
+    a running document-frequency IDF, so new documents can be folded in with
+    ``partial_fit`` instead of refitting from scratch. Each document is folded
+    in once, by digest. When ``model_dir`` is set the model is loaded lazily on
+    first use and saved after each update under a file lock; if another process
+    saved in the meantime, its model is loaded and this update replayed on it.
+    """
+
+    def __init__(self, course_id='default', num_topics=5, model_dir=None, n_features=2 ** 15):
+        self.course_id = course_id
+        self.num_topics = num_topics
+        self.model_dir = model_dir
+        self.n_features = n_features
+        self._lock = threading.RLock()
+        self._state = None
+        self._vectorizer = None
+        self._saved_mtime = None
+
+    @property
+    def path(self):
+        if not self.model_dir:
+            return None
+        return os.path.join(self.model_dir, f"{self.course_id}.joblib")
+
+    @property
+    def state(self):
+        """Model state, loaded from disk or created on first use"""
+        if self._state is None:
+            with self._lock:
+                if self._state is None:
+                    self._state = self._load() or self._new_state()
+        return self._state
+
+    def reset(self):
+        """Forget everything learned in this process; a saved model is left on disk"""
+        with self._lock:
+            self._state = self._new_state()
+
+    @property
+    def is_fitted(self):
+        return self.state['documents'] > 0
+
+    def _new_state(self):
+        from sklearn.decomposition import LatentDirichletAllocation
+
+        return {
+            'lda': LatentDirichletAllocation(
+                n_components=self.num_topics,
+                learning_method='online',
+                random_state=42
+            ),
+            'document_frequency': np.zeros(self.n_features, dtype=np.int64),
+            'documents': 0,
+            'terms': {},
+            'digests': set()
+        }
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            import joblib
+            mtime = os.stat(self.path).st_mtime_ns
+            state = joblib.load(self.path)
+            state.setdefault('digests', set())
+            self._saved_mtime = mtime
+            logger.info(f"Loaded topic model for course {self.course_id}")
+            return state
+        except Exception as e:
+            logger.warning(f"Could not load topic model {self.path}: {e}")
+            return None
+
+    def save(self, pending=()):
+        """Write the model to ``model_dir``
+
+        ``pending`` holds the ``(segments, digest)`` updates made since the last
+        save. If another process has saved the model since then, they are
+        replayed on its model so that neither process's updates are lost.
+        """
+        if not self.path:
+            return
+        try:
+            import joblib
+            os.makedirs(self.model_dir, exist_ok=True)
+            with self._lock, _file_lock(self.path + '.lock'):
+                if os.path.exists(self.path) and os.stat(self.path).st_mtime_ns != self._saved_mtime:
+                    state = self._load()
+                    if state is not None:
+                        for segments, digest in pending:
+                            self._fold(state, segments, digest)
+                        self._state = state
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                joblib.dump(self.state, tmp_path)
+                os.replace(tmp_path, self.path)
+                self._saved_mtime = os.stat(self.path).st_mtime_ns
+        except Exception as e:
+            logger.error(f"Error saving topic model {self.path}: {e}")
+
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            self._vectorizer = HashingVectorizer(
+                n_features=self.n_features,
+                stop_words='english',
+                alternate_sign=False,
+                norm=None
+            )
+        return self._vectorizer
+
+    def _vectorize(self, segments, state=None):
+        """Hash segments into term counts and weight them by the running IDF"""
+        state = state or self.state
+        counts = self.vectorizer.transform(segments)
+        idf = np.log((1 + state['documents']) / (1 + state['document_frequency'])) + 1
+        weighted = counts.multiply(idf).tocsr()
+
+        # L2-normalize rows as TfidfVectorizer does
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1))).ravel()
+        norms[norms == 0] = 1
+        return weighted.multiply(1 / norms[:, None]).tocsr()
+
+    def has_seen(self, digest):
+        """Whether the document with this digest has been folded into the model"""
+        with self._lock:
+            return digest in self.state['digests']
+
+    def update(self, segments, digest=None):
+        """Fold a new document's segments into the model with one online LDA step
+
+        Returns False without changing the model if the document's ``digest``
+        has been folded in before.
+        """
+        if not segments:
+            return False
+        with self._lock:
+            if not self._fold(self.state, segments, digest):
+                return False
+            self.save(pending=[(segments, digest)])
+        return True
+
+    def _fold(self, state, segments, digest):
+        """Apply one update to ``state`` unless its digest is already there"""
+        if digest is not None:
+            if digest in state['digests']:
+                return False
+            state['digests'].add(digest)
+        counts = self.vectorizer.transform(segments)
+        state['document_frequency'] += np.bincount(
+            counts.indices, minlength=self.n_features
+        )
+        state['documents'] += len(segments)
+        self._remember_terms(state, segments)
+        state['lda'].partial_fit(self._vectorize(segments, state))
+        return True
+
+    def _remember_terms(self, state, segments):
+        """Map hashed feature indices back to readable terms"""
+        from sklearn.utils import murmurhash3_32
+
+        analyzer = self.vectorizer.build_analyzer()
+        terms = state['terms']
+        seen = set()
+        for segment in segments:
+            seen.update(analyzer(segment))
+        for term in seen:
+            index = abs(murmurhash3_32(term, seed=0)) % self.n_features
+            terms[index] = term
+
+    def transform(self, segments):
+        """Topic distribution of each segment"""
+        with self._lock:
+            return self.state['lda'].transform(self._vectorize(segments))
+
+    def top_terms(self, topic_idx, n=5):
+        """Most heavily weighted known terms of a topic"""
+        with self._lock:
+            topic = self.state['lda'].components_[topic_idx]
+            terms = self.state['terms']
+            known = np.fromiter(terms.keys(), dtype=np.int64, count=len(terms))
+            if known.size == 0:
+                return []
+            order = known[np.argsort(topic[known])[::-1][:n]]
+            return [terms[i] for i in order]
+
+    def describe(self, segments, num_topics=5):
+        """Describe the topics most present in the given segments"""
+        weights = self.transform(segments).mean(axis=0)
+        ranked = np.argsort(weights)[::-1][:min(num_topics, self.num_topics)]
+        return [" ".join(self.top_terms(topic_idx)) for topic_idx in ranked]
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_topic_model(course_id='default', num_topics=5, model_dir=None):
+    """Get the process-wide topic model for a course"""
+    model_dir = model_dir or os.environ.get('EXAM_PREP_TOPIC_MODEL_DIR') or None
+    with _models_lock:
+        if course_id not in _models:
+            _models[course_id] = CourseTopicModel(course_id, num_topics, model_dir)
+        return _models[course_id]
+
+
+def submit_update(model, segments, digest=None):
+    """Run a model update on the background update thread"""
+    return _update_executor.submit(model.update, segments, digest)
@@ -20,5 +20,17 @@ setup(
     ],
     author="AI Exam Preparation Team",
     description="AI-Powered Exam Preparation and Assessment System",
+    extras_require={
+        # Parquet output for batch_generate.py
+        'parquet': ['pyarrow>=14.0.0'],
+        # EXAM_PREP_EMBEDDING_BACKEND=onnx; the int8 backend only needs torch
+        'onnx': ['sentence-transformers>=3.2.0', 'optimum[onnxruntime]>=1.23.0'],
+    },
     python_requires='>=3.8',
+    entry_points={
+        'console_scripts': [
+            # Run once after installing to download the NLTK data
+            'exam-prep-setup=modules.text_processing:main',
+        ],
+    },
 )
\ No newline at end of file
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The repository root is itself a package, so put it on the path for absolute imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_encoder import StubEncoder  # noqa: E402
+from modules.embedding_service import EmbeddingService  # noqa: E402
+
+
+@pytest.fixture
+def embedder():
+    """Embedding service backed by the deterministic offline stub encoder"""
+    return EmbeddingService(model=StubEncoder())
@@ -0,0 +1,75 @@
+import pytest
+import textstat
+
+from benchmarks.corpus import generate_text
+from modules.ai_detector import AIContentDetector, PhraseMatcher, pooled_reading_ease, readability_counts
+
+# Meets every other heuristic, so only the punctuated "Moreover," decides the verdict
+PLAIN_TEXT = (
+    "The cat sat on the mat and the dog ran to the park to play with the ball all day. "
+    "The sun was warm and the kids went out to the lake to swim and fish with the dad. "
+    "Moreover, the mom made a big lunch and the kids ate it by the lake in the warm sun."
+)
+
+
+@pytest.fixture
+def detector():
+    return AIContentDetector(map_reduce=False)
+
+
+def test_matcher_prefers_the_longest_phrase_and_never_overlaps():
+    matcher = PhraseMatcher(['in conclusion', 'conclusion', 'it is important to note', 'important'])
+
+    assert matcher.count("in conclusion it is important to note".split()) == 2
+    # A partial long phrase falls back to the shorter phrase inside it
+    assert matcher.count("it is important that".split()) == 1
+    assert matcher.count("conclusion conclusion".split()) == 2
+
+
+def test_matcher_lowercases_phrases_and_strips_punctuation_at_word_edges():
+    matcher = PhraseMatcher(['In Conclusion', 'however', 'realm'])
+
+    assert matcher.count(['in', 'conclusion,']) == 1
+    assert matcher.count(['(however)', 'realm.']) == 2
+    # Only whole words match; the detector passes lowercased words
+    assert matcher.count(['realms', 'whomever', 'inconclusion', 'In', 'Conclusion']) == 0
+
+
+def test_indicator_phrases_count_through_case_and_punctuation(detector):
+    text = "Moreover, the cell divides. In conclusion, it is important to note that cells grow. FURTHERMORE the realm of biology is vast."
+    features = detector.analyze_text(text)['features']
+
+    # moreover, in conclusion, it is important to note, furthermore and realm out of 21 words
+    assert features['word_count'] == 21
+    assert features['ai_word_ratio'] == pytest.approx(5 / 21)
+
+
+def test_punctuated_indicator_changes_the_verdict(detector):
+    result = detector.analyze_text(PLAIN_TEXT)
+    assert result['features']['ai_word_ratio'] == pytest.approx(1 / 58)
+    assert result['verdict'] == 'AI-generated'
+
+    # Without the indicator, as when "moreover," did not match, the text is only mixed
+    assert detector.analyze_text(PLAIN_TEXT.replace("Moreover,", "Then"))['verdict'] == 'Mixed'
+
+
+def test_batch_results_equal_single_results(detector):
+    texts = [
+        PLAIN_TEXT,
+        "Short text.",
+        "",
+        "Furthermore, researchers delve into the tapestry of genetics. However, results vary widely."
+    ]
+    assert detector.analyze_batch(texts) == [detector.analyze_text(text) for text in texts]
+
+
+@pytest.mark.parametrize('text', [PLAIN_TEXT] + [generate_text(size, seed=seed) for size, seed in [(500, 1), (5000, 2), (20000, 3)]])
+def test_pooled_reading_ease_matches_textstat(text):
+    assert pooled_reading_ease(*readability_counts(text)) == textstat.flesch_reading_ease(text)
+
+
+def test_readability_counts_sum_over_sentence_chunks():
+    text = generate_text(5000, seed=4)
+    cut = text.index('. ', len(text) // 2) + 2
+    head, tail = readability_counts(text[:cut]), readability_counts(text[cut:])
+    assert tuple(a + b for a, b in zip(head, tail)) == readability_counts(text)
@@ -0,0 +1,70 @@
+import sys
+
+from modules.tokenized_document import TokenizedDocument
+from utils.analysis_store import AnalysisStore, payload_bytes
+
+TEXT = "Photosynthesis converts light into chemical energy. Plants store it as sugar. " * 50
+
+
+def test_document_is_sized_from_its_text_length():
+    document = TokenizedDocument(TEXT)
+    store = AnalysisStore()
+    bare = store.put('a', TEXT)['size']
+
+    document.whitespace_words
+    document.whitespace_stats
+    entry = store.put('b', TEXT, document=document)
+    # The text is counted once, and the estimate covers the fully tokenized document
+    assert entry['size'] == bare + document.nbytes
+    assert document.nbytes > payload_bytes(document.whitespace_words) + payload_bytes(document.split_sentences)
+    assert store.get_stats()['bytes'] == bare + entry['size']
+
+
+def test_artifact_adds_only_its_own_size():
+    store = AnalysisStore()
+    before = store.put('k', TEXT, document=TokenizedDocument(TEXT))['size']
+
+    store.set_artifact('k', 'summary', TEXT)
+    assert store.get('k')['size'] == before + payload_bytes(TEXT)
+    store.set_artifact('k', 'summary', "short")
+    assert store.get('k')['size'] == before + payload_bytes("short")
+
+
+def test_long_containers_are_sampled():
+    words = TEXT.split() * 20
+    exact = sys.getsizeof(words) + sum(payload_bytes(word) for word in words)
+    assert abs(payload_bytes(words) - exact) < exact * 0.05
+
+
+def test_artifacts_grow_the_entry_and_evict_over_budget():
+    store = AnalysisStore(max_bytes=payload_bytes(TEXT) * 4)
+    store.put('old', TEXT)
+    store.put('new', TEXT)
+    assert store.get('old') is not None
+
+    store.set_artifact('new', 'summary', TEXT * 2)
+    assert store.get_artifact('new', 'summary') == TEXT * 2
+    assert store.get('old') is None
+    assert store.get_stats()['bytes'] == store.get('new')['size']
+
+
+def test_get_or_compute_runs_once_and_skips_failures():
+    store = AnalysisStore()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'text': TEXT}
+
+    assert store.get_or_compute('k', compute)['text'] == TEXT
+    store.get_or_compute('k', compute)
+    assert len(calls) == 1
+    assert store.get_or_compute('missing', lambda: None) is None
+    assert store.get('missing') is None
+
+
+def test_expired_entries_are_dropped():
+    store = AnalysisStore(ttl_seconds=0)
+    store.put('k', TEXT)
+    assert store.get('k') is None
+    assert store.get_artifact('k', 'summary', 'default') == 'default'
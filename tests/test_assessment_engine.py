@@ -0,0 +1,35 @@
+from modules.assessment_engine import AssessmentEngine
+
+MODEL_ANSWER = """Key points:
+- Mitochondria produce ATP through cellular respiration.
+- Ribosomes build proteins from amino acids."""
+
+QUESTION = "Describe three organelles and their roles."
+BATCH = [
+    (QUESTION, "Mitochondria produce ATP through cellular respiration.", MODEL_ANSWER),
+    (QUESTION, "For example, chloroplasts capture light. Ribosomes build proteins, first and then."),
+    ("What is osmosis?", "Osmosis moves water across a membrane.", None),
+    (QUESTION, "   "),
+    (QUESTION, "Ribosomes build proteins from amino acids.", MODEL_ANSWER),
+    ("What is osmosis?", "Water diffuses through a semipermeable membrane.\nIt follows the gradient."),
+]
+
+
+def test_batched_grading_matches_single_answers(embedder):
+    engine = AssessmentEngine(embedder)
+    batched = engine.evaluate_answers(BATCH, batch_size=2)
+    single = [engine.evaluate_answer(*item) for item in BATCH]
+
+    assert [result['score'] for result in batched] == [result['score'] for result in single]
+    assert [result['feedback'] for result in batched] == [result['feedback'] for result in single]
+    assert [result.get('rubric') for result in batched] == [result.get('rubric') for result in single]
+
+
+def test_progress_callback_reports_every_chunk(embedder):
+    calls = []
+    AssessmentEngine(embedder).evaluate_answers(
+        BATCH, batch_size=2, progress_callback=lambda done, total: calls.append((done, total))
+    )
+
+    # The empty answer is scored up front and is not part of the progress total
+    assert calls == [(2, 5), (4, 5), (5, 5)]
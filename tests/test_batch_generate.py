@@ -0,0 +1,19 @@
+import pytest
+
+import batch_generate
+
+
+def test_parquet_output_without_an_engine_fails_before_processing(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_generate.importlib.util, 'find_spec', lambda name: None)
+    monkeypatch.setattr(batch_generate, 'find_course_files', lambda directory: pytest.fail("files were processed"))
+
+    with pytest.raises(SystemExit) as exit_info:
+        batch_generate.main([str(tmp_path), '--output', str(tmp_path / 'bank.parquet')])
+    assert exit_info.value.code == 2
+
+
+def test_jsonl_writer_returns_written_records(tmp_path):
+    writer = batch_generate.JsonlWriter(str(tmp_path / 'bank.jsonl'))
+    assert writer.write({'file_hash': 'a', 'path': 'a.txt'}) == [{'file_hash': 'a', 'path': 'a.txt'}]
+    assert writer.close() == []
+    assert (tmp_path / 'bank.jsonl').read_text().count("\n") == 1
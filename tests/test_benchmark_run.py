@@ -0,0 +1,13 @@
+from benchmarks.corpus import generate_text
+from benchmarks.run import measure
+from modules.question_generator import QuestionGenerator
+from modules.keyphrases import KeyphraseExtractor
+
+
+def test_setup_clears_memoized_results_before_every_run(embedder):
+    generator = QuestionGenerator(embedder, keyphrase_extractor=KeyphraseExtractor(), map_reduce=False)
+    text = generate_text(4096, seed=3)
+
+    measure(lambda: generator.generate_questions(text), repeat=3, setup=generator.clear_cache)
+    assert generator._results.get_stats()['hits'] == 0
+    assert generator._results.get_stats()['misses'] == 3
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from benchmarks.corpus import generate_text
+from modules.corpus_index import CorpusIndex
+from modules.embedding_service import EmbeddingService
+
+BIOLOGY = [
+    "Mitochondria produce energy for the cell through respiration.",
+    "Chloroplasts capture light to make sugar during photosynthesis.",
+    "Ribosomes assemble proteins from amino acids."
+]
+HISTORY = [
+    "The printing press spread books across Europe.",
+    "Trade routes connected distant empires and markets."
+]
+
+
+def corpus_segments(count, seed=0):
+    text = generate_text(count * 200, seed=seed)
+    return [text[i:i + 200] for i in range(0, len(text), 200)][:count]
+
+
+def test_search_finds_the_matching_chunk_with_metadata(tmp_path, embedder):
+    index = CorpusIndex(str(tmp_path), embedder)
+    assert index.add_document('bio', BIOLOGY, source='bio.pdf') == 3
+    assert index.add_document('history', HISTORY, source='history.txt') == 2
+    assert index.add_document('bio', BIOLOGY) == 0
+
+    top = index.search(BIOLOGY[1], k=2)[0]
+    assert top['text'] == BIOLOGY[1]
+    assert (top['doc_id'], top['source'], top['position']) == ('bio', 'bio.pdf', 1)
+    assert top['score'] == pytest.approx(1.0, abs=1e-2)
+    assert index.get_stats()['documents'] == 2
+
+
+def test_reload_drops_an_interrupted_append(tmp_path, embedder):
+    index = CorpusIndex(str(tmp_path), embedder)
+    index.add_document('bio', BIOLOGY)
+
+    # Rows written after the last committed meta.json, as by a crash mid-append
+    with open(tmp_path / 'vectors.f16', 'ab') as f:
+        f.write(np.ones((2, index.dim), dtype=np.float16).tobytes())
+    with open(tmp_path / 'chunks.jsonl', 'ab') as f:
+        f.write(b'{"id": 3, "doc_id": "partial", "text": "half written"}\n{"id": 4')
+
+    reloaded = CorpusIndex(str(tmp_path), embedder)
+    assert len(reloaded) == 3
+    assert 'partial' not in reloaded
+    assert (tmp_path / 'vectors.f16').stat().st_size == 3 * index.dim * 2
+    assert reloaded.add_document('history', HISTORY) == 2
+    assert [chunk['text'] for chunk in reloaded.get_chunks([3, 4])] == HISTORY
+
+
+def test_full_probe_ivf_search_matches_brute_force(tmp_path, embedder):
+    index = CorpusIndex(str(tmp_path), embedder)
+    index.add_document('a', corpus_segments(120, seed=1))
+    index.build_ivf(n_lists=6)
+    # Appends after building are assigned to lists incrementally
+    index.add_document('b', corpus_segments(30, seed=2))
+    assert len(index._assign) == len(index) == 150
+
+    queries = embedder.encode(corpus_segments(5, seed=3))
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    brute = index.search_vectors(queries, k=5, nprobe=0)
+    ivf = index.search_vectors(queries, k=5, nprobe=6)
+    for expected, actual in zip(brute, ivf):
+        assert [chunk_id for chunk_id, _ in actual] == [chunk_id for chunk_id, _ in expected]
+
+    reloaded = CorpusIndex(str(tmp_path), embedder)
+    assert reloaded.get_stats()['ivf_lists'] == 6
+    assert reloaded.search_vectors(queries, k=5, nprobe=6) == ivf
+
+
+def test_refuses_embeddings_from_another_model(tmp_path, embedder):
+    CorpusIndex(str(tmp_path), embedder).add_document('bio', BIOLOGY)
+    other = EmbeddingService(model_name='other-model', model=embedder.model)
+    with pytest.raises(ValueError):
+        CorpusIndex(str(tmp_path), other).search("energy")
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+
+from benchmarks.stub_encoder import StubEncoder
+from modules.embedding_cache import EmbeddingCache
+from modules.embedding_service import EmbeddingService
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = EmbeddingCache(max_bytes=3 * 16)
+    for key in 'abc':
+        cache.put(key, np.zeros(4))
+    cache.get('a')
+    cache.put('d', np.zeros(4))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get_stats()['memory_bytes'] <= 3 * 16
+
+
+def test_flush_and_reload(tmp_path):
+    cache = EmbeddingCache(cache_dir=str(tmp_path), flush_every=1000)
+    cache.put('k1', np.arange(4))
+    assert cache.get_stats()['pending_entries'] == 1
+    cache.flush()
+
+    reloaded = EmbeddingCache(cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(reloaded.get('k1'), np.arange(4, dtype=np.float32))
+    assert reloaded.disk_hits == 1
+
+
+def test_caches_sharing_a_directory_keep_their_own_segments(tmp_path):
+    first = EmbeddingCache(cache_dir=str(tmp_path))
+    second = EmbeddingCache(cache_dir=str(tmp_path))
+    first.put('a', np.ones(4))
+    second.put('b', np.full(4, 2.0))
+    first.flush()
+    second.flush()
+    # Each process still reads its own vectors from its mapped segment
+    first.clear()
+    second.clear()
+    np.testing.assert_array_equal(first.get('a'), np.ones(4))
+    np.testing.assert_array_equal(second.get('b'), np.full(4, 2.0))
+
+    reloaded = EmbeddingCache(cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(reloaded.get('a'), np.ones(4))
+    np.testing.assert_array_equal(reloaded.get('b'), np.full(4, 2.0))
+
+
+def test_incomplete_segments_are_skipped(tmp_path):
+    cache = EmbeddingCache(cache_dir=str(tmp_path))
+    cache.put('a', np.ones(4))
+    cache.flush()
+    # A segment whose key list was never written is still being flushed
+    np.save(os.path.join(tmp_path, 'segment_1_partial.npy'), np.zeros((1, 4), dtype=np.float32))
+
+    reloaded = EmbeddingCache(cache_dir=str(tmp_path))
+    assert reloaded.get_stats()['disk_entries'] == 1
+
+
+def test_service_encodes_each_missing_text_once():
+    service = EmbeddingService(model=StubEncoder(), cache=EmbeddingCache())
+    first = service.encode(["alpha beta", "gamma", "alpha beta"])
+    assert service.get_stats()['encoded_texts'] == 2
+
+    second = service.encode(["gamma", "alpha beta"])
+    assert service.get_stats()['encode_calls'] == 1
+    np.testing.assert_array_equal(second, first[[1, 0]])
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from benchmarks.stub_encoder import StubEncoder
+from modules.embedding_service import EmbeddingService, score_parity
+
+
+class FakeTensor:
+    def __init__(self, count, size):
+        self.count = count
+        self.size = size
+
+    def numel(self):
+        return self.count
+
+    def element_size(self):
+        return self.size
+
+
+class FakeModel(StubEncoder):
+    """Stub encoder with a state dict shaped like a dynamically quantized model"""
+
+    def state_dict(self):
+        return {
+            'embeddings.weight': FakeTensor(1000, 4),
+            'linear._packed_params._packed_params': (FakeTensor(100, 1), FakeTensor(10, 4)),
+            'linear.scale': 0.1
+        }
+
+
+def test_memory_counts_packed_int8_weights():
+    service = EmbeddingService(model=FakeModel(), backend='int8')
+    assert service.get_stats()['memory_bytes'] == 4000 + 100 + 40
+
+
+def test_onnx_memory_is_the_graph_and_its_external_data(tmp_path):
+    (tmp_path / 'model.onnx').write_bytes(b'x' * 300)
+    (tmp_path / 'model.onnx_data').write_bytes(b'x' * 700)
+    (tmp_path / 'tokenizer.json').write_bytes(b'x' * 50)
+    model = [SimpleNamespace(auto_model=SimpleNamespace(model_path=tmp_path / 'model.onnx'))]
+
+    service = EmbeddingService(model=model, backend='onnx')
+    assert service.get_stats()['memory_bytes'] == 1000
+
+
+def test_int8_quantized_linear_is_smaller_than_full_precision():
+    torch = pytest.importorskip('torch')
+    full = torch.nn.Sequential(torch.nn.Linear(256, 256))
+    quantized = torch.quantization.quantize_dynamic(full, {torch.nn.Linear}, dtype=torch.qint8)
+
+    full_bytes = EmbeddingService(model=full).get_stats()['memory_bytes']
+    int8_bytes = EmbeddingService(model=quantized, backend='int8').get_stats()['memory_bytes']
+    assert full_bytes == (256 * 256 + 256) * 4
+    # int8 weights plus the float bias and quantization scale
+    assert 256 * 256 < int8_bytes < full_bytes / 3
+
+
+def test_identical_embeddings_pass_score_parity(embedder):
+    texts = ["Cells divide by mitosis.", "Plants make sugar from light.", "Rivers erode valleys."]
+    vectors = embedder.encode(texts)
+    assert score_parity(vectors, vectors)['passed']
+    noisy = vectors + np.random.default_rng(0).normal(0, 1, vectors.shape)
+    assert not score_parity(vectors, noisy)['passed']
@@ -0,0 +1,125 @@
+import time
+
+import PyPDF2
+
+from modules.text_processing import TextProcessor
+from utils import file_handlers
+from utils.chunked_reader import ChunkedTextReader
+from utils.file_handlers import FileHandler
+
+SENTENCE = "The mitochondria produce energy for the cell. "
+# A valid UTF-8 prefix longer than the detection sample, then a Latin-1 byte
+LATE_LATIN1 = (SENTENCE * 2000).encode('utf-8') + "Café au lait. ".encode('latin-1')
+
+
+def test_txt_falls_back_to_the_next_encoding(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(LATE_LATIN1)
+
+    text = FileHandler().extract_text(str(path))
+    assert text == LATE_LATIN1.decode('latin-1')
+    assert "�" not in text
+
+
+def test_chunked_reader_switches_encoding_instead_of_replacing(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(LATE_LATIN1)
+
+    reader = ChunkedTextReader(str(path), block_size=4096)
+    assert reader.encoding == 'utf-8'
+    text = "".join(reader.iter_blocks())
+    assert "�" not in text
+    assert text.endswith("Café au lait. ")
+
+
+def test_segments_rejoin_to_the_text(tmp_path):
+    text = "".join(f"Sentence number {i} is here. " for i in range(500))
+    path = tmp_path / "notes.txt"
+    path.write_text(text, encoding='utf-8')
+
+    segments = list(ChunkedTextReader(str(path), block_size=1000).iter_segments())
+    assert len(segments) > 1
+    assert all(len(segment) <= 1000 for segment in segments)
+    assert all(segment.endswith(". ") for segment in segments)
+    assert "".join(segments) == text
+
+
+def test_utf8_character_split_across_blocks(tmp_path):
+    text = "é" * 5000
+    path = tmp_path / "notes.txt"
+    path.write_text(text, encoding='utf-8')
+
+    assert "".join(ChunkedTextReader(str(path), block_size=1001).iter_blocks()) == text
+
+
+def test_read_stream_keeps_text_and_counts_segments(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text(SENTENCE * 300, encoding='utf-8')
+    handler = FileHandler()
+
+    text, stats = TextProcessor().read_stream(handler.iter_text_segments(str(path), block_size=2048))
+    assert text == SENTENCE * 300
+    assert stats['sentence_count'] == 300
+    assert 'mitochondria' in stats['key_topics']
+
+
+def test_read_stream_keeps_an_evenly_spread_excerpt(tmp_path):
+    text = "".join(f"Sentence number {i} is here. " for i in range(2000))
+    path = tmp_path / "notes.txt"
+    path.write_text(text, encoding='utf-8')
+    segments = list(ChunkedTextReader(str(path), block_size=1000).iter_segments())
+
+    excerpt, stats = TextProcessor().read_stream(iter(segments), excerpt_chars=10000)
+    assert len(excerpt) <= 10000
+    assert stats['sentence_count'] == 2000
+    # The excerpt is whole segments in document order, spread from the start to the end
+    kept = [index for index, segment in enumerate(segments) if segment in excerpt]
+    assert excerpt == "".join(segments[index] for index in kept)
+    assert kept[0] == 0
+    assert kept[-1] > len(segments) // 2
+
+
+def test_streaming_limit_applies_only_when_streaming(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"a" * (11 * 1024 * 1024))
+    handler = FileHandler()
+
+    assert handler.should_stream(str(path))
+    assert not handler.validate_file(str(path))[0]
+    assert handler.validate_file(str(path), streaming=True)[0]
+
+
+def blank_pdf(path, pages):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(100, 100)
+    with open(path, 'wb') as file:
+        writer.write(file)
+    return str(path)
+
+
+def test_time_budget_stops_pdf_extraction_part_way(tmp_path, monkeypatch):
+    path = blank_pdf(tmp_path / "pack.pdf", 10)
+
+    def slow_page(reader, page_num):
+        time.sleep(0.02)
+        return f"Page {page_num}."
+    monkeypatch.setattr(file_handlers, '_extract_page_text', slow_page)
+    handler = FileHandler()
+
+    first = handler.extract_pdf_pages(path, time_budget=0.05)
+    assert 0 < first['next_page'] < 10
+    assert not first['complete']
+    assert first['total_pages'] == 10
+
+    rest = handler.extract_pdf_pages(path, first['next_page'])
+    assert rest['complete'] and rest['next_page'] == 10
+    assert first['text'] + rest['text'] == "".join(f"Page {i}.\n" for i in range(10))
+
+
+def test_time_budget_always_extracts_one_page(tmp_path):
+    path = blank_pdf(tmp_path / "pack.pdf", 3)
+
+    chunk = FileHandler().extract_pdf_pages(path, start_page=1, time_budget=0)
+    assert chunk['next_page'] == 2
+    assert not chunk['complete']
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import Future
+
+from utils.job_queue import JobQueue
+
+
+class ImmediateExecutor:
+    """Executor whose futures have already finished when ``submit`` returns"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def test_identical_jobs_share_one_computation():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    calls = []
+
+    def job(value):
+        release.wait(5)
+        calls.append(value)
+        return value * 2
+
+    first = queue.submit('key', job, 21)
+    second = queue.submit('key', job, 21)
+    release.set()
+    assert first is second
+    assert first.wait(5) == 42
+    assert calls == [21]
+    queue.shutdown()
+
+
+def test_failed_jobs_are_resubmitted():
+    queue = JobQueue(max_workers=1)
+    failed = queue.submit('key', lambda: 1 / 0)
+    failed.wait(5)
+    assert failed.status == 'failed'
+    assert isinstance(failed.error, ZeroDivisionError)
+
+    retried = queue.submit('key', lambda: 'ok')
+    assert retried is not failed
+    assert retried.wait(5) == 'ok'
+    queue.shutdown()
+
+
+def test_oldest_finished_jobs_are_pruned():
+    queue = JobQueue(max_workers=1, max_finished=2)
+    for i in range(4):
+        queue.submit(f'job{i}', lambda i=i: i).wait(5)
+    assert queue.get('job0') is None
+    assert queue.get('job1') is None
+    assert queue.get('job3').result == 3
+    assert queue.get_stats()['done'] == 2
+    queue.shutdown()
+
+
+def test_process_mode_job_finished_before_callback_registration():
+    queue = JobQueue(max_workers=1, use_processes=True)
+    queue._executor.shutdown()
+    queue._executor = ImmediateExecutor()
+
+    done = threading.Event()
+    worker = threading.Thread(target=lambda: (queue.submit('key', len, 'abc'), done.set()), daemon=True)
+    worker.start()
+    assert done.wait(5), "submit deadlocked on an already finished future"
+    assert queue.get('key').status == 'done'
+    assert queue.get('key').result == 3
+
+
+def test_progress_and_partial_results_reach_the_handle():
+    queue = JobQueue(max_workers=1)
+    halfway = threading.Event()
+    release = threading.Event()
+
+    def job(items, progress_callback):
+        for done, item in enumerate(items, 1):
+            progress_callback(done, len(items), partial=item * 2)
+            if done == 2:
+                halfway.set()
+                release.wait(5)
+        return len(items)
+
+    handle = queue.submit('key', job, [1, 2, 3, 4], report_progress=True)
+    assert halfway.wait(5)
+    assert handle.progress == 0.5
+    assert handle.partial_results == [2, 4]
+    release.set()
+    assert handle.wait(5) == 4
+    assert handle.progress == 1.0
+    assert handle.to_dict()['progress'] == 1.0
+    queue.shutdown()
+
@@ -0,0 +1,57 @@
+import numpy as np
+
+from benchmarks.corpus import generate_text
+from modules.keyphrases import DocumentPhrases, KeyphraseExtractor, count_phrases, merge_phrase_counts
+
+
+def corpus_segments(count=12, seed=5):
+    text = generate_text(count * 400, seed=seed)
+    return [text[i:i + 400] for i in range(0, len(text), 400)][:count]
+
+
+def test_merged_batch_counts_equal_counting_all_segments():
+    segments = corpus_segments()
+    expected = count_phrases(segments)
+    parts = [count_phrases(batch) for batch in (segments[:3], segments[3:4], segments[4:9], segments[9:])]
+    phrases, lengths, counts = merge_phrase_counts(parts)
+
+    assert phrases == expected[0]
+    assert np.array_equal(lengths, expected[1])
+    assert np.array_equal(counts.toarray(), expected[2].toarray())
+
+
+def test_merged_counts_score_like_the_whole_document():
+    segments = corpus_segments()
+    extractor = KeyphraseExtractor(map_reduce=False)
+    expected = extractor.score(*count_phrases(segments)).top(10)
+    merged = extractor.score(*merge_phrase_counts([count_phrases(segments[:5]), count_phrases(segments[5:])]))
+    assert merged.top(10) == expected
+
+
+def test_phrases_stop_at_stopwords_and_punctuation():
+    phrases, lengths, counts = count_phrases(["The cell membrane, the cell wall."])
+    assert "cell membrane" in phrases
+    assert "cell wall" in phrases
+    assert "membrane cell" not in phrases
+    assert counts.toarray()[0][phrases.index("cell")] == 2
+    assert set(lengths) <= {1, 2, 3}
+
+
+def test_top_skips_phrases_overlapping_a_better_one():
+    text = " ".join(["Cell membrane transport moves ions. Cell membrane proteins pump ions."] * 20)
+    top = KeyphraseExtractor(map_reduce=False).extract(text, 5)
+    assert len(top) == len(set(top))
+    for phrase in top:
+        others = [f" {other} " for other in top if other != phrase]
+        assert not any(f" {phrase} " in other for other in others)
+
+
+def test_top_skips_phrases_overlapping_a_better_one_as_whole_words():
+    phrases = ['cell division', 'cell', 'division rate', 'mitotic cell division', 'cells', 'rate', 'cell wall']
+    scores = np.array([7.0, 6.0, 5.0, 4.0, 3.0, 2.0, 1.0])
+    document = DocumentPhrases(phrases, np.array([len(p.split()) for p in phrases]), None, scores)
+
+    # 'cell' is inside 'cell division', which is inside 'mitotic cell division';
+    # 'division rate' only shares a word, and 'cells' is a different word
+    assert document.top(10) == ['cell division', 'division rate', 'cells', 'cell wall']
+    assert document.top(2) == ['cell division', 'division rate']
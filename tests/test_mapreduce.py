@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from nltk.tokenize import sent_tokenize
+
+from benchmarks.corpus import generate_text
+from benchmarks.stub_encoder import stub_embedding_service
+from modules import mapreduce
+from modules.ai_detector import AIContentDetector
+from modules.keyphrases import KeyphraseExtractor
+from modules.mapreduce import MapReduce
+from modules.question_generator import QuestionGenerator
+
+TRICKY = (
+    "Dr. Smith met Mr. Jones at 3 p.m. on the U.S. coast. \"Hello!\" he said... "
+    "Then e.g. they left (quietly.) Was it late?! Yes.  Numbers like 3.14 stay whole. "
+)
+
+
+@pytest.fixture(scope='module')
+def map_reduce():
+    pool = MapReduce(workers=2, min_size=0, min_chunk_size=512, embedding_factory=stub_embedding_service)
+    yield pool
+    pool.shutdown()
+
+
+def test_sentences_match_sent_tokenize_across_chunk_cuts(map_reduce):
+    text = TRICKY * 40 + generate_text(8000, seed=7)
+    expected = sent_tokenize(text)
+    for chunks_per_worker in range(1, 12):
+        map_reduce.chunks_per_worker = chunks_per_worker
+        assert len(map_reduce.split(text)) > 1
+        assert map_reduce.sentences(text) == expected
+    map_reduce.chunks_per_worker = 4
+
+
+def test_stitch_keeps_chunk_results_when_the_window_has_no_sentences(monkeypatch):
+    monkeypatch.setattr(mapreduce, '_sentence_spans', lambda text: [])
+    spans = [(0, 5), (6, 11)]
+    part = [(12, 17), (18, 23)]
+    assert MapReduce(workers=2)._stitch("x" * 30, spans, part) == part
+    assert spans == [(0, 5), (6, 11)]
+
+
+def test_stitch_stops_widening_when_the_window_never_settles(monkeypatch):
+    # Every re-tokenization disagrees with the chunk results at both ends
+    monkeypatch.setattr(mapreduce, '_sentence_spans', lambda text: [(1, len(text) - 1)])
+    spans = [(i * 10, i * 10 + 9) for i in range(5)]
+    part = [(i * 10, i * 10 + 9) for i in range(5, 12)]
+    assert MapReduce(workers=2)._stitch("x" * 200, spans, part) == []
+    assert spans == [(1, 118)]
+
+
+def test_pooled_analysis_matches_single_process(map_reduce, embedder):
+    text = generate_text(40000, seed=11)
+
+    pooled = KeyphraseExtractor(map_reduce=map_reduce).extract(text, 15)
+    assert pooled == KeyphraseExtractor(map_reduce=False).extract(text, 15)
+
+    assert AIContentDetector(map_reduce=map_reduce).analyze_text(text) == AIContentDetector().analyze_text(text)
+
+    pooled_sentences = QuestionGenerator(embedder, map_reduce=map_reduce)._extract_important_sentences(text)
+    assert pooled_sentences == QuestionGenerator(embedder, map_reduce=False)._extract_important_sentences(text)
+
+
+def test_pooled_encode_matches_the_service(map_reduce, embedder):
+    texts = [f"sentence number {i} about cells" for i in range(50)]
+    assert np.array_equal(map_reduce.encode(texts), embedder.encode(texts))
+    assert map_reduce.encode([]).shape == (0, 0)
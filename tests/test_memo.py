@@ -0,0 +1,46 @@
+import itertools
+
+from modules.text_rewriter import TextRewriter
+from utils.memo import MemoCache, make_rng, sample_unique
+
+TEXT = (
+    "The cell membrane controls what enters the cell. This process utilizes numerous proteins. "
+    "The nucleus stores genetic information for the organism. Mitochondria facilitate energy production in cells."
+)
+
+
+def test_same_parts_give_the_same_sequence():
+    assert [make_rng('doc', 3).random() for _ in range(2)] == [make_rng('doc', 3).random() for _ in range(2)]
+    assert make_rng('doc', 3).random() != make_rng('doc', 4).random()
+
+
+def test_sample_unique_collects_the_requested_number_of_distinct_items():
+    rng = make_rng('sample')
+    items = sample_unique(lambda: rng.randrange(10), 6, max_attempts=1000)
+    assert len(items) == 6
+    assert len(set(items)) == 6
+
+
+def test_sample_unique_stops_after_the_attempt_budget():
+    counter = itertools.count()
+    assert sample_unique(lambda: next(counter) % 3, 5, max_attempts=20) == [0, 1, 2]
+    assert next(counter) == 20
+
+
+def test_memo_cache_returns_copies_and_counts_hits():
+    cache = MemoCache(max_entries=1)
+    first = cache.get_or_compute('a', lambda: [1])
+    first.append(2)
+    assert cache.get_or_compute('a', lambda: [3]) == [1]
+    cache.get_or_compute('b', lambda: [4])
+    assert cache.get_or_compute('a', lambda: [5]) == [5]
+    assert cache.get_stats() == {'entries': 1, 'hits': 1, 'misses': 3}
+
+
+def test_same_seed_gives_the_same_rewrite():
+    first = TextRewriter().rewrite_text(TEXT, seed=1)
+    rewriter = TextRewriter()
+    assert rewriter.rewrite_text(TEXT, seed=1) == first
+    rewriter.clear_cache()
+    assert rewriter.rewrite_text(TEXT, seed=1) == first
+    assert any(rewriter.rewrite_text(TEXT, seed=seed) != first for seed in range(2, 10))
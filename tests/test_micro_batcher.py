@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.micro_batcher import Histogram, MicroBatcher, QueueFullError
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_requests_share_a_batch():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    assert run(main()) == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+
+
+def test_full_batches_are_dispatched_without_waiting():
+    batches = []
+
+    def process(items):
+        batches.append(len(items))
+        return items
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=10000)
+        started = time.perf_counter()
+        await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+        await batcher.stop()
+        return time.perf_counter() - started
+
+    assert run(main()) < 5
+    assert batches == [2, 2]
+
+
+def test_a_lone_request_is_dispatched_after_the_wait():
+    async def main():
+        batcher = MicroBatcher(lambda items: items, max_batch_size=64, max_wait_ms=20)
+        result = await asyncio.wait_for(batcher.submit('only'), 5)
+        await batcher.stop()
+        return result
+
+    assert run(main()) == 'only'
+
+
+def test_a_failing_item_only_fails_its_own_request():
+    def process(items):
+        if 'bad' in items:
+            raise ValueError("cannot encode 'bad'")
+        return [item.upper() for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(
+            batcher.submit('a'), batcher.submit('bad'), batcher.submit('c'), return_exceptions=True
+        )
+        await batcher.stop()
+        return results
+
+    first, bad, last = run(main())
+    assert (first, last) == ('A', 'C')
+    assert isinstance(bad, ValueError)
+
+
+def test_full_queue_rejects_new_requests():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=1, max_queue=1)
+        running = asyncio.ensure_future(batcher.submit('running'))
+        while batcher.batch_sizes.count == 0:
+            await asyncio.sleep(0.001)
+        waiting = asyncio.ensure_future(batcher.submit('waiting'))
+        await asyncio.sleep(0.01)
+        with pytest.raises(QueueFullError):
+            await batcher.submit('rejected')
+        release.set()
+        results = await asyncio.gather(running, waiting)
+        await batcher.stop()
+        return results, batcher.rejected
+
+    assert run(main()) == (['running', 'waiting'], 1)
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = Histogram((1, 2, 4))
+    for value in (0.5, 1.5, 3, 10):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 2
+    assert histogram.quantile(1.0) == float('inf')
+
+
+def test_cancelling_a_request_while_it_is_retried_keeps_the_batcher_running():
+    in_flight = threading.Event()
+    release = threading.Event()
+
+    def process(items):
+        if 'bad' in items:
+            if len(items) == 1:
+                in_flight.set()
+                release.wait(5)
+            raise ValueError("cannot encode 'bad'")
+        return [item.upper() for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+        good = asyncio.ensure_future(batcher.submit('a'))
+        bad = asyncio.ensure_future(batcher.submit('bad'))
+        while not in_flight.is_set():
+            await asyncio.sleep(0.001)
+        bad.cancel()
+        release.set()
+        result = await asyncio.wait_for(batcher.submit('after'), 5)
+        alive = not batcher._worker.done()
+        await batcher.stop()
+        return await good, bad.cancelled(), result, alive
+
+    assert run(main()) == ('A', True, 'AFTER', True)
+
+
+def test_restarted_collector_serves_requests_already_queued():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(5)
+        return [item.upper() for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch_size=1)
+        first = asyncio.ensure_future(batcher.submit('first'))
+        while batcher.batch_sizes.count == 0:
+            await asyncio.sleep(0.001)
+        queued = asyncio.ensure_future(batcher.submit('queued'))
+        await asyncio.sleep(0.01)
+        # The collector dies while 'queued' waits in the queue
+        batcher._worker.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.wait_for(asyncio.gather(batcher.submit('next'), queued), 5)
+        first.cancel()
+        await batcher.stop()
+        return results
+
+    assert run(main()) == ['NEXT', 'QUEUED']
@@ -0,0 +1,33 @@
+from modules import text_processing
+
+
+def test_setup_downloads_only_missing_resources(monkeypatch):
+    installed = {'corpora/stopwords'}
+    downloads = []
+
+    def find(path):
+        if path not in installed:
+            raise LookupError(path)
+
+    def download(name):
+        downloads.append(name)
+        installed.add(f"tokenizers/{name}")
+
+    monkeypatch.setattr(text_processing.nltk.data, 'find', find)
+    monkeypatch.setattr(text_processing.nltk, 'download', download)
+
+    assert text_processing.check_nltk_data() == ['punkt']
+    assert text_processing.main() == 0
+    assert downloads == ['punkt_tab']
+    assert text_processing.check_nltk_data() == []
+
+
+def test_setup_reports_resources_it_could_not_install(monkeypatch, capsys):
+    def find(path):
+        raise LookupError(path)
+
+    monkeypatch.setattr(text_processing.nltk.data, 'find', find)
+    monkeypatch.setattr(text_processing.nltk, 'download', lambda name: False)
+
+    assert text_processing.main() == 1
+    assert "punkt, stopwords" in capsys.readouterr().err
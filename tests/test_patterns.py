@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from benchmarks.bench_patterns import legacy_structure, scanned_structure
+from benchmarks.corpus import generate_sentence
+from modules.patterns import scan_structure
+
+EDGE_CASES = [
+    "",
+    "First, cells divide. Then they grow.",
+    "Firstly the counterexample holds",
+    "FOR INSTANCE, a, b, c",
+    "However\nmoreover",
+    "Finally; such as. Therefore",
+    "Examples abound... second-hand, third.party"
+]
+
+
+@pytest.mark.parametrize('answer', EDGE_CASES)
+def test_scanned_structure_matches_the_per_pattern_checks(answer):
+    assert scanned_structure(answer) == legacy_structure(answer)
+
+
+def test_scanned_structure_matches_on_generated_answers():
+    rng = random.Random(0)
+    sentences = [generate_sentence(rng) for _ in range(500)]
+    for start in range(0, len(sentences), 5):
+        answer = "\n".join(sentences[start:start + 2]) + " " + " ".join(sentences[start + 2:start + 5])
+        assert scanned_structure(answer) == legacy_structure(answer)
+
+
+def test_scan_structure_counts():
+    structure = scan_structure("First, an example. However, such as this; finally\nsecond, for instance.")
+    assert structure == {
+        'sequence': 3,
+        'connective': 1,
+        'example': 3,
+        'period': 2,
+        'comma': 3,
+        'newline': 1
+    }
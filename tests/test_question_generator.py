@@ -0,0 +1,77 @@
+import pytest
+
+from benchmarks.corpus import generate_text
+from modules import question_generator
+from modules.embedding_service import EmbeddingService
+from modules.keyphrases import KeyphraseExtractor
+from modules.question_generator import QuestionGenerator
+
+TEXT = generate_text(4000, seed=7)
+
+
+@pytest.fixture
+def generator(embedder):
+    return QuestionGenerator(embedder, keyphrase_extractor=KeyphraseExtractor(map_reduce=False), map_reduce=False)
+
+
+@pytest.mark.parametrize('kind, total', [('questions', 2), ('mcqs', 6), ('summary', 2)])
+def test_generators_report_each_step(generator, kind, total):
+    calls = []
+    getattr(generator, f'generate_{kind}')(TEXT, progress_callback=lambda done, total: calls.append((done, total)))
+    assert calls == [(done, total) for done in range(1, total + 1)]
+
+
+def test_term_contexts_are_built_once_per_document(generator, monkeypatch):
+    calls = []
+    build = question_generator.find_term_contexts
+    monkeypatch.setattr(question_generator, 'find_term_contexts', lambda *args: calls.append(1) or build(*args))
+
+    first = generator.generate_mcqs(TEXT, seed=0)
+    generator.generate_mcqs(TEXT, seed=1)
+    generator.generate_mcqs(TEXT, num_questions=3, seed=2)
+    assert len(calls) == 1
+    assert any('_____' in mcq['question'] for mcq in first)
+
+
+def test_term_contexts_match_whole_phrases_in_the_first_sentence_using_them():
+    sentences = [
+        "Cell division starts here.",
+        "A cell-based assay is used.",
+        "The  cell   division rate and cells grow.",
+        "Nothing about membranes."
+    ]
+    contexts = question_generator.find_term_contexts(sentences, ['cell', 'division', 'cell division', 'cells', 'membrane'])
+
+    assert contexts == {
+        'cell': "_____ division starts here.",
+        'division': "Cell _____ starts here.",
+        'cell division': "_____ starts here.",
+        'cells': "The  cell   division rate and _____ grow."
+    }
+
+
+def test_same_seed_gives_the_same_questions(embedder):
+    def fresh_generator():
+        return QuestionGenerator(embedder, keyphrase_extractor=KeyphraseExtractor(map_reduce=False), map_reduce=False)
+
+    questions = fresh_generator().generate_questions(TEXT, 8, seed=4)
+    mcqs = fresh_generator().generate_mcqs(TEXT, 4, seed=4)
+    generator = fresh_generator()
+    assert generator.generate_questions(TEXT, 8, seed=4) == questions
+    assert generator.generate_mcqs(TEXT, 4, seed=4) == mcqs
+    assert len(questions) == len(set(questions)) == 8
+    assert generator.generate_questions(TEXT, 8, seed=5) != questions
+
+
+def test_map_reduce_defaults_on_only_with_the_default_embedding_service(embedder, monkeypatch):
+    pool = object()
+    monkeypatch.setattr(question_generator, 'get_embedding_service', lambda: embedder)
+    monkeypatch.setattr(question_generator, 'get_map_reduce', lambda: pool)
+    keyphrases = KeyphraseExtractor(map_reduce=False)
+
+    assert QuestionGenerator(keyphrase_extractor=keyphrases).summarizer.map_reduce is pool
+    assert QuestionGenerator(embedder, keyphrase_extractor=keyphrases).summarizer.map_reduce is pool
+    assert QuestionGenerator(embedder, keyphrase_extractor=keyphrases, map_reduce=False).summarizer.map_reduce is None
+
+    other = QuestionGenerator(EmbeddingService(model=embedder.model), keyphrase_extractor=keyphrases)
+    assert other.summarizer.map_reduce is None
@@ -0,0 +1,48 @@
+import numpy as np
+
+from modules.assessment_engine import AssessmentEngine
+from modules.rubric import Rubric
+
+MODEL_ANSWER = """Key points:
+- Mitochondria produce ATP through cellular respiration.
+- Chloroplasts convert light into chemical energy.
+- Ribosomes build proteins from amino acids."""
+
+
+def test_coverage_credits_best_sentence_per_key_point():
+    rubric = Rubric(['first', 'second'], np.eye(2), threshold=0.5)
+    similarity = np.array([[0.9, 0.1], [0.2, 0.25]])
+
+    key_points, credit = rubric.coverage(similarity, ['sentence a', 'sentence b'])
+    assert [point['covered'] for point in key_points] == [True, False]
+    assert [point['best_sentence'] for point in key_points] == ['sentence a', 'sentence b']
+    # Capped at 1 for the first point, half way to the threshold for the second
+    assert credit == 0.75
+
+
+def test_build_skips_headings_and_normalizes(embedder):
+    rubric = Rubric.build(MODEL_ANSWER, embedder)
+    assert len(rubric) == 3
+    assert rubric.key_points[0] == "Mitochondria produce ATP through cellular respiration"
+    assert np.allclose(np.linalg.norm(rubric.embeddings, axis=1), 1.0)
+
+
+def test_answer_covering_every_key_point_outscores_a_partial_one(embedder):
+    engine = AssessmentEngine(embedder)
+    question = "Describe three organelles and their roles."
+    full = engine.evaluate_answer(question, MODEL_ANSWER.split(":", 1)[1], MODEL_ANSWER)
+    partial = engine.evaluate_answer(
+        question, "Mitochondria produce ATP through cellular respiration.", MODEL_ANSWER
+    )
+
+    assert full['rubric']['coverage'] == 1.0
+    assert [point['covered'] for point in partial['rubric']['key_points']] == [True, False, False]
+    assert full['score'] > partial['score']
+
+
+def test_rubrics_are_embedded_once_per_model_answer(embedder):
+    engine = AssessmentEngine(embedder)
+    question = "Describe three organelles and their roles."
+    first = engine.get_rubric(question, MODEL_ANSWER)
+    assert engine.get_rubric(question, MODEL_ANSWER) is first
+    assert engine.get_rubric(question, MODEL_ANSWER + " Vacuoles store water.") is not first
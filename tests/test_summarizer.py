@@ -0,0 +1,54 @@
+import numpy as np
+
+from modules.summarizer import ExtractiveSummarizer, top_k
+
+
+class FixedEncoder:
+    """Embedding service that looks sentences up in a table of vectors"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def encode(self, sentences, **kwargs):
+        return np.array([self.vectors[sentence] for sentence in sentences], dtype=np.float64)
+
+
+VECTORS = {
+    'cells divide': [1.0, 0.0],
+    'cells divide again': [1.0, 0.0],
+    'plants grow': [0.6, 0.8]
+}
+
+
+def test_top_k_returns_largest_first_and_keeps_ties_in_order():
+    scores = np.array([0.2, 0.9, 0.5, 0.9, 0.1])
+
+    assert top_k(scores, 3).tolist() == [1, 3, 2]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 0, 4]
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_diversity_skips_redundant_sentences():
+    summarizer = ExtractiveSummarizer(FixedEncoder(VECTORS))
+    sentences = list(VECTORS)
+
+    assert summarizer.select(sentences, 2) == [0, 1]
+    assert summarizer.select(sentences, 2, diversity=0.5) == [0, 2]
+
+
+def test_fewer_sentences_than_k_returns_all_in_document_order():
+    summarizer = ExtractiveSummarizer(FixedEncoder(VECTORS))
+    sentences = ['plants grow', 'cells divide']
+
+    assert sorted(summarizer.select(sentences, 5)) == [0, 1]
+    assert summarizer.summarize(sentences, 5, diversity=0.5) == sentences
+    assert summarizer.select([], 3) == []
+
+
+def test_long_documents_are_sampled_evenly():
+    vectors = {f's{i}': [1.0, i / 100] for i in range(100)}
+    summarizer = ExtractiveSummarizer(FixedEncoder(vectors), max_sentences=10)
+
+    selected = summarizer.select(list(vectors), 3)
+    assert len(selected) == 3
+    assert set(selected) <= set(np.linspace(0, 99, 10).astype(np.int64).tolist())
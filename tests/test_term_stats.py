@@ -0,0 +1,56 @@
+from collections import Counter
+
+import numpy as np
+
+from modules.term_stats import TermStats, Vocabulary, most_common_ids
+
+TOKENS = "the cell and the membrane and the cell wall of a plant cell wall".split()
+
+
+def test_most_common_matches_counter_including_ties():
+    stats = TermStats.from_tokens(TOKENS)
+    assert stats.most_common(20) == Counter(TOKENS).most_common(20)
+    assert stats.most_common(3) == Counter(TOKENS).most_common(3)
+    assert stats.max_count() == 3
+
+
+def test_excluded_terms_are_left_out():
+    stats = TermStats.from_tokens(TOKENS)
+    stop_words = {'the', 'and', 'of', 'a'}
+    expected = Counter(token for token in TOKENS if token not in stop_words).most_common(3)
+    assert stats.most_common(3, exclude=stop_words) == expected
+
+
+def test_ngrams_match_counter_and_break_at_excluded_terms():
+    stats = TermStats.from_tokens(TOKENS)
+    bigrams = Counter(zip(TOKENS, TOKENS[1:]))
+    assert stats.most_common_ngrams(2, 50) == bigrams.most_common(50)
+
+    stop_words = {'the', 'and', 'of', 'a'}
+    kept = Counter(
+        gram for gram in zip(TOKENS, TOKENS[1:]) if not stop_words.intersection(gram)
+    )
+    assert stats.most_common_ngrams(2, 50, exclude=stop_words) == kept.most_common(50)
+    assert stats.most_common_ngrams(2, 1, exclude=stop_words) == [(('cell', 'wall'), 2)]
+
+
+def test_shared_vocabulary_sums_segment_counts():
+    vocabulary = Vocabulary()
+    first = TermStats.from_tokens("cell wall cell".split(), vocabulary)
+    second = TermStats.from_tokens("membrane cell".split(), vocabulary)
+    counts = np.pad(first.counts, (0, len(second.counts) - len(first.counts))) + second.counts
+    assert [vocabulary.terms[i] for i in most_common_ids(counts, 3)] == ['cell', 'wall', 'membrane']
+
+
+def test_most_common_ids_orders_ties_and_skips_zeros():
+    counts = [0, 2, 5, 2, 0, 5]
+    assert list(most_common_ids(counts, 10)) == [2, 5, 1, 3]
+    assert list(most_common_ids(counts, 10, order=[0, 9, 8, 1, 0, 7])) == [5, 2, 3, 1]
+    assert list(most_common_ids([0, 0], 3)) == []
+
+
+def test_empty_and_short_streams():
+    stats = TermStats.from_tokens([])
+    assert stats.most_common(5) == []
+    assert stats.max_count() == 0
+    assert TermStats.from_tokens(['one']).most_common_ngrams(3, 5) == []
@@ -0,0 +1,65 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import nltk.tokenize
+
+from benchmarks.corpus import generate_text
+from modules import tokenized_document
+from modules.keyphrases import KeyphraseExtractor
+from modules.question_generator import QuestionGenerator
+from modules.text_processing import TextProcessor
+from modules.topic_model import CourseTopicModel
+
+
+def counting_tokenizer(calls):
+    """Stand-in for the NLTK tokenizers that counts the documents passed to them"""
+    def counted(name):
+        def tokenize(text):
+            calls[(name, text)] += 1
+            return getattr(nltk.tokenize, name)(text)
+        return tokenize
+
+    return SimpleNamespace(sent_tokenize=counted('sent_tokenize'), word_tokenize=counted('word_tokenize'))
+
+
+def test_one_document_is_tokenized_once_across_modules(monkeypatch, tmp_path, embedder):
+    calls = Counter()
+    monkeypatch.setattr(tokenized_document, 'nltk_tokenize', counting_tokenizer(calls))
+    keyphrases = KeyphraseExtractor(map_reduce=False)
+    processor = TextProcessor(
+        topic_model=CourseTopicModel(num_topics=2, model_dir=str(tmp_path)),
+        keyphrase_extractor=keyphrases,
+        map_reduce=False
+    )
+    generator = QuestionGenerator(embedder, keyphrase_extractor=keyphrases, map_reduce=False)
+
+    document = processor.tokenize(generate_text(6000, seed=3).strip())
+    processor.get_document_stats(document)
+    processor.process_text(document)
+    generator.generate_questions(document)
+    generator.generate_mcqs(document)
+    generator.generate_summary(document)
+
+    # process_text segments the cleaned text, which is a different document
+    cleaned = processor.clean_text(document)
+    assert cleaned != document.text
+    assert calls == {
+        ('sent_tokenize', document.text): 1,
+        ('word_tokenize', document.text): 1,
+        ('sent_tokenize', cleaned): 1
+    }
+
+
+def test_process_text_keeps_the_document_when_cleaning_changes_nothing(monkeypatch, tmp_path):
+    calls = Counter()
+    monkeypatch.setattr(tokenized_document, 'nltk_tokenize', counting_tokenizer(calls))
+    processor = TextProcessor(
+        topic_model=CourseTopicModel(num_topics=2, model_dir=str(tmp_path)),
+        keyphrase_extractor=KeyphraseExtractor(map_reduce=False),
+        map_reduce=False
+    )
+    text = "Plants convert light into energy. Animals eat plants for energy. " * 20
+
+    document = processor.tokenize(text.strip())
+    processor.process_text(document)
+    assert calls == {('sent_tokenize', document.text): 1}
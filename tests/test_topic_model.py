@@ -0,0 +1,64 @@
+from concurrent.futures import Future
+
+from modules.text_processing import TextProcessor
+from modules.topic_model import CourseTopicModel
+
+SEGMENTS = [
+    "Photosynthesis converts light energy into chemical energy in chloroplasts.",
+    "Cellular respiration releases energy from glucose in the mitochondria.",
+    "Enzymes lower the activation energy of chemical reactions in cells."
+]
+OTHER_SEGMENTS = [
+    "The French revolution overthrew the monarchy and reshaped European politics.",
+    "Napoleon rose to power after the revolution and crowned himself emperor."
+]
+
+
+def test_documents_are_folded_in_once(tmp_path):
+    model = CourseTopicModel(num_topics=2, model_dir=str(tmp_path))
+    assert model.update(SEGMENTS, 'doc')
+    assert not model.update(SEGMENTS, 'doc')
+    assert model.state['documents'] == len(SEGMENTS)
+    assert model.has_seen('doc')
+
+
+def test_saves_from_two_processes_are_merged(tmp_path):
+    first = CourseTopicModel(num_topics=2, model_dir=str(tmp_path))
+    second = CourseTopicModel(num_topics=2, model_dir=str(tmp_path))
+    first.state
+    second.state
+
+    first.update(SEGMENTS, 'biology')
+    second.update(OTHER_SEGMENTS, 'history')
+
+    reloaded = CourseTopicModel(num_topics=2, model_dir=str(tmp_path))
+    assert reloaded.state['digests'] == {'biology', 'history'}
+    assert reloaded.state['documents'] == len(SEGMENTS) + len(OTHER_SEGMENTS)
+    assert list(tmp_path.glob('*.tmp')) == []
+
+
+def test_identify_topics_updates_only_unseen_documents(monkeypatch):
+    model = CourseTopicModel(num_topics=2)
+    processor = TextProcessor(topic_model=model)
+    text = " ".join(SEGMENTS * 40)
+    calls = []
+
+    def fake_submit(topic_model, segments, digest=None):
+        calls.append(digest)
+        future = Future()
+        future.set_result(topic_model.update(segments, digest))
+        return future
+
+    monkeypatch.setattr('modules.text_processing.submit_update', fake_submit)
+    first = processor.identify_topics(text)
+    second = processor.identify_topics(text)
+    assert len(calls) == 1
+    assert first == second
+
+
+def test_slow_update_falls_back_to_tfidf_terms(monkeypatch):
+    processor = TextProcessor(topic_model=CourseTopicModel(num_topics=2))
+    monkeypatch.setattr('modules.text_processing.submit_update', lambda *args: Future())
+    topics = processor.identify_topics(" ".join(SEGMENTS * 40), time_budget=0.01)
+    assert topics and all(isinstance(topic, str) for topic in topics)
+    assert "Error in topic identification" not in topics
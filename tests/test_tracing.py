@@ -0,0 +1,25 @@
+import threading
+
+from utils import tracing
+
+
+def test_thread_enabled_traces_only_the_current_thread():
+    tracing.reset()
+    assert not tracing.is_enabled()
+
+    def other_thread():
+        with tracing.span('other'):
+            pass
+
+    with tracing.thread_enabled():
+        with tracing.span('session'):
+            pass
+        worker = threading.Thread(target=other_thread)
+        worker.start()
+        worker.join()
+
+    with tracing.span('after'):
+        pass
+    assert not tracing.is_enabled()
+    assert set(tracing.get_stage_stats()) == {'session'}
+    tracing.reset()
@@ -0,0 +1,206 @@
+import hashlib
+import itertools
+import logging
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisStore:
+    """Process-level store of document analysis results keyed by content hash
+
+    Each entry holds the extracted text, processed data, document stats and any
+    generated artifacts (questions, MCQs, summaries). Entries expire after
+    ``ttl_seconds`` and the least recently used ones are evicted once the store
+    exceeds ``max_entries`` or an estimated ``max_bytes``. The estimate is
+    made once when the entry is stored, with a stored ``TokenizedDocument``
+    sized from its text length, and grows by each artifact's size as it is
+    attached.
+    """
+
+    def __init__(self, ttl_seconds=3600, max_entries=32, max_bytes=256 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def hash_content(data):
+        """Hash uploaded bytes into a store key"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key):
+        """Return the entry for a key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                tracing.count('analysis_store.misses')
+                return None
+
+            if time.monotonic() - entry['created_at'] > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                tracing.count('analysis_store.misses')
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            tracing.count('analysis_store.hits')
+            return entry
+
+    def put(self, key, text, processed=None, stats=None, **extra):
+        """Store the analysis of a document and return its entry"""
+        entry = {
+            'text': text,
+            'processed': processed,
+            'stats': stats,
+            'artifacts': {},
+            'created_at': time.monotonic()
+        }
+        entry.update(extra)
+        entry['size'] = self._estimate_size(entry)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._total_bytes += entry['size']
+            self._evict()
+        return entry
+
+    def get_or_compute(self, key, compute):
+        """Return a stored entry or build one with ``compute()``
+
+        ``compute`` returns a dict of ``put`` keyword arguments, or None when the
+        document could not be analyzed (nothing is stored in that case).
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+
+        result = compute()
+        if result is None:
+            return None
+        return self.put(key, **result)
+
+    def set_artifact(self, key, name, value):
+        """Attach a generated artifact to a stored document"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                artifacts = entry['artifacts']
+                size = payload_bytes(value) - (payload_bytes(artifacts[name]) if name in artifacts else 0)
+                artifacts[name] = value
+                self._entries.move_to_end(key)
+                entry['size'] += size
+                self._total_bytes += size
+                self._evict()
+
+    def get_artifact(self, key, name, default=None):
+        """Get a generated artifact for a stored document"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            return entry['artifacts'].get(name, default)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry['size']
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones over budget"""
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if now - e['created_at'] > self.ttl_seconds]:
+            self._remove(key)
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            key = next(iter(self._entries))
+            logger.info(f"Evicting analysis for document {key[:12]}")
+            self._remove(key)
+
+    @staticmethod
+    def _estimate_size(entry):
+        """Approximate the memory held by an entry's payloads"""
+        return sum(payload_bytes(value) for name, value in entry.items() if name not in ('created_at', 'size'))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def get_stats(self):
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+SAMPLE_ITEMS = 64
+
+
+def payload_bytes(value):
+    """Approximate bytes held by a payload of strings, containers, arrays and plain objects
+
+    Objects with an ``nbytes`` attribute (arrays, ``TokenizedDocument``) report
+    their own size; other objects are measured through their attributes.
+    Containers longer than ``SAMPLE_ITEMS`` are measured from an evenly spaced
+    sample of their items.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return 0
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + _sampled_bytes(
+            value.items(), len(value), lambda item: payload_bytes(item[0]) + payload_bytes(item[1])
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + _sampled_bytes(value, len(value), payload_bytes)
+    if hasattr(value, '__dict__'):
+        return payload_bytes(vars(value))
+    return sys.getsizeof(value)
+
+
+def _sampled_bytes(items, count, measure):
+    """Sum ``measure`` over at most SAMPLE_ITEMS evenly spaced items, scaled up to ``count``"""
+    if count <= SAMPLE_ITEMS:
+        return sum(measure(item) for item in items)
+    step = math.ceil(count / SAMPLE_ITEMS)
+    sample = [measure(item) for item in itertools.islice(items, 0, None, step)]
+    return int(sum(sample) * count / len(sample))
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_analysis_store():
+    """Get the process-wide analysis store"""
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = AnalysisStore()
+    return _default_store
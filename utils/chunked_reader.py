@@ -0,0 +1,108 @@
+import codecs
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ['utf-8', 'latin-1', 'iso-8859-1', 'windows-1252']
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*\s+')
+
+
+def detect_encoding(file_path, sample_size=64 * 1024):
+    """Detect a text file's encoding from a prefix sample read once"""
+    with open(file_path, 'rb') as file:
+        sample = file.read(sample_size)
+
+    for encoding in ENCODINGS:
+        try:
+            # A multi-byte character may be cut at the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+class ChunkedTextReader:
+    """Read a large text file in fixed-size blocks with bounded memory"""
+
+    def __init__(self, file_path, block_size=1024 * 1024, encoding=None):
+        self.file_path = file_path
+        self.block_size = block_size
+        self.encoding = encoding or detect_encoding(file_path) or 'utf-8'
+
+    def iter_blocks(self):
+        """Yield decoded text blocks of about ``block_size`` bytes
+
+        The encoding was detected from a prefix, so a later block may not
+        decode with it. That block and the rest of the file are then decoded
+        with the next encoding in ``ENCODINGS`` instead of replacing characters.
+        """
+        encoding = self.encoding
+        decoder = codecs.getincrementaldecoder(encoding)()
+        with open(self.file_path, 'rb') as file:
+            while True:
+                raw = file.read(self.block_size)
+                if not raw:
+                    break
+                pending = decoder.getstate()[0]
+                try:
+                    text = decoder.decode(raw)
+                except UnicodeDecodeError:
+                    encoding = self._fallback_encoding(encoding, pending + raw)
+                    decoder = codecs.getincrementaldecoder(encoding)()
+                    text = decoder.decode(pending + raw)
+                if text:
+                    yield text
+        try:
+            tail = decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            pending = decoder.getstate()[0]
+            tail = pending.decode(self._fallback_encoding(encoding, pending))
+        if tail:
+            yield tail
+
+    def _fallback_encoding(self, encoding, raw):
+        """The first encoding after ``encoding`` in ``ENCODINGS`` that decodes ``raw``"""
+        start = ENCODINGS.index(encoding) + 1 if encoding in ENCODINGS else 0
+        for candidate in ENCODINGS[start:]:
+            try:
+                codecs.getincrementaldecoder(candidate)().decode(raw)
+            except UnicodeDecodeError:
+                continue
+            logger.warning(f"{self.file_path} is not valid {encoding}, decoding the rest as {candidate}")
+            return candidate
+        raise UnicodeDecodeError(encoding, raw, 0, len(raw), "no fallback encoding decodes the file")
+
+    def iter_segments(self, max_chars=None):
+        """Yield text segments that end on sentence boundaries where possible
+
+        Segments are at most ``max_chars`` long (the block size by default); a
+        segment is only cut mid-sentence when no boundary is found in it.
+        """
+        max_chars = max_chars or self.block_size
+        buffer = ""
+
+        for block in self.iter_blocks():
+            buffer += block
+            while len(buffer) >= max_chars:
+                cut = self._find_cut(buffer, max_chars)
+                segment, buffer = buffer[:cut], buffer[cut:]
+                if segment.strip():
+                    yield segment
+
+        if buffer.strip():
+            yield buffer
+
+    @staticmethod
+    def _find_cut(buffer, max_chars):
+        """Find the last sentence (or whitespace) boundary before ``max_chars``"""
+        window = buffer[:max_chars]
+        last = None
+        for match in SENTENCE_END.finditer(window):
+            last = match.end()
+        if last:
+            return last
+
+        space = window.rfind(' ')
+        return space + 1 if space > 0 else max_chars
@@ -1,13 +1,70 @@
-import PyPDF2
-import docx
-import re
+import os
+import time
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from utils.chunked_reader import ChunkedTextReader
+from utils.lazy_import import lazy_import
+from utils import tracing
+
+PyPDF2 = lazy_import('PyPDF2')
+docx = lazy_import('docx')
 
 logger = logging.getLogger(__name__)
 
+IN_MEMORY_MAX_SIZE_MB = 10
+STREAMING_MAX_SIZE_MB = 1024
+PARALLEL_MIN_PAGES = 64
+
+
+def _open_pdf_reader(file):
+    """Open a PDF reader, trying an empty password on encrypted files"""
+    reader = PyPDF2.PdfReader(file)
+    
+    # Check if PDF is encrypted
+    if reader.is_encrypted:
+        logger.warning("PDF is encrypted, trying to decrypt")
+        try:
+            reader.decrypt('')  # Try empty password
+        except:
+            logger.error("Could not decrypt PDF")
+            return None
+    return reader
+
+
+def _extract_page_text(reader, page_num):
+    """Extract one page's text, returning an empty string on failure"""
+    try:
+        page_text = reader.pages[page_num].extract_text()
+        if not page_text:
+            logger.warning(f"No text found on page {page_num + 1}")
+        return page_text or ""
+    except Exception as e:
+        logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
+        return ""
+
+
+def _extract_pdf_range(file_path, start_page, end_page):
+    """Extract pages [start_page, end_page) in a worker process"""
+    with open(file_path, 'rb') as file:
+        reader = _open_pdf_reader(file)
+        if reader is None:
+            return []
+        return [_extract_page_text(reader, page_num) for page_num in range(start_page, end_page)]
+
+
 class FileHandler:
+    def __init__(self, pdf_workers=1, parallel_min_pages=PARALLEL_MIN_PAGES):
+        self.pdf_workers = pdf_workers
+        self.parallel_min_pages = parallel_min_pages
+    
     def extract_text(self, file_path):
         """Extract text from various file formats with enhanced error handling"""
+        with tracing.span('file_handler.extract_text') as trace:
+            text = self._extract_text(file_path)
+            trace.set(input_size=len(text) if text else 0)
+        return text
+    
+    def _extract_text(self, file_path):
         try:
             if file_path.endswith('.pdf'):
                 return self._extract_from_pdf(file_path)
@@ -22,42 +79,99 @@ class FileHandler:
             logger.error(f"Error extracting text from {file_path}: {e}")
             return None
     
+    @tracing.traced('file_handler.extract_pdf', size=False)
     def _extract_from_pdf(self, file_path):
         """Extract text from PDF file with enhanced error handling"""
         try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                
-                # Check if PDF is encrypted
-                if reader.is_encrypted:
-                    logger.warning("PDF is encrypted, trying to decrypt")
-                    try:
-                        reader.decrypt('')  # Try empty password
-                    except:
-                        logger.error("Could not decrypt PDF")
-                        return None
-                
-                text = ""
-                for page_num, page in enumerate(reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                        else:
-                            logger.warning(f"No text found on page {page_num + 1}")
-                    except Exception as e:
-                        logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
-                        continue
+            text = "".join(page_text + "\n" for page_text in self.iter_pdf_texts(file_path) if page_text)
+            
+            if not text.strip():
+                logger.error("No text could be extracted from PDF")
+                return None
                 
-                if not text.strip():
-                    logger.error("No text could be extracted from PDF")
-                    return None
-                    
-                return text
+            return text
         except Exception as e:
             logger.error(f"Error reading PDF {file_path}: {e}")
             return None
     
+    def iter_pdf_texts(self, file_path):
+        """Yield a PDF's page texts in order, extracted in a process pool for long PDFs"""
+        total_pages = self.count_pdf_pages(file_path)
+        if self.pdf_workers > 1 and total_pages >= self.parallel_min_pages:
+            yield from self._extract_pdf_parallel(file_path, total_pages, self.pdf_workers)
+        else:
+            for _, page_text in self.iter_pdf_pages(file_path):
+                yield page_text
+    
+    def iter_pdf_pages(self, file_path, start_page=0, end_page=None, time_budget=None):
+        """Yield (page_number, text) for each page of a PDF as it is extracted
+        
+        Pages without text yield an empty string. When ``time_budget`` seconds
+        elapse the generator stops early, so callers can show the first pages
+        and resume later from the next page number.
+        """
+        started = time.perf_counter()
+        with open(file_path, 'rb') as file:
+            reader = _open_pdf_reader(file)
+            if reader is None:
+                return
+            
+            end_page = len(reader.pages) if end_page is None else min(end_page, len(reader.pages))
+            for page_num in range(start_page, end_page):
+                # Always extract at least one page so that callers make progress
+                if (time_budget is not None and page_num > start_page
+                        and time.perf_counter() - started > time_budget):
+                    return
+                yield page_num, _extract_page_text(reader, page_num)
+    
+    def extract_pdf_pages(self, file_path, start_page=0, end_page=None, time_budget=None):
+        """Extract a page range of a PDF, optionally within a time budget
+        
+        Returns the text together with the page to resume from and whether the
+        requested range was fully extracted.
+        """
+        total_pages = self.count_pdf_pages(file_path)
+        end_page = total_pages if end_page is None else min(end_page, total_pages)
+        
+        page_texts = []
+        next_page = start_page
+        for page_num, page_text in self.iter_pdf_pages(file_path, start_page, end_page, time_budget):
+            if page_text:
+                page_texts.append(page_text + "\n")
+            next_page = page_num + 1
+        
+        return {
+            'text': "".join(page_texts),
+            'next_page': next_page,
+            'total_pages': total_pages,
+            'complete': next_page >= end_page
+        }
+    
+    def count_pdf_pages(self, file_path):
+        """Get the number of pages in a PDF"""
+        with open(file_path, 'rb') as file:
+            reader = _open_pdf_reader(file)
+            return len(reader.pages) if reader is not None else 0
+    
+    def _extract_pdf_parallel(self, file_path, total_pages, workers):
+        """Extract page ranges in a process pool, yielding page texts in order"""
+        pages_per_task = max(1, -(-total_pages // (workers * 4)))
+        ranges = [
+            (start, min(start + pages_per_task, total_pages))
+            for start in range(0, total_pages, pages_per_task)
+        ]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = executor.map(
+                _extract_pdf_range,
+                [file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges]
+            )
+            for chunk in chunks:
+                yield from chunk
+    
+    @tracing.traced('file_handler.extract_docx', size=False)
     def _extract_from_docx(self, file_path):
         """Extract text from DOCX file with enhanced error handling"""
         try:
@@ -76,28 +190,63 @@ class FileHandler:
             logger.error(f"Error reading DOCX {file_path}: {e}")
             return None
     
+    @tracing.traced('file_handler.extract_txt', size=False)
     def _extract_from_txt(self, file_path):
-        """Extract text from TXT file with enhanced error handling"""
-        encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'windows-1252']
+        """Extract text from TXT file with enhanced error handling
+        
+        The file is decoded block by block in one pass; blocks that do not
+        decode with the detected encoding fall back to the next one.
+        """
+        try:
+            text = "".join(ChunkedTextReader(file_path).iter_blocks())
+        except UnicodeDecodeError:
+            logger.error(f"Could not read TXT file with any encoding: {file_path}")
+            return None
+        except Exception as e:
+            logger.error(f"Error reading TXT {file_path}: {e}")
+            return None
         
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as file:
-                    text = file.read()
-                    if text.strip():
-                        return text
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                logger.error(f"Error reading TXT with encoding {encoding}: {e}")
-                continue
+        if not text.strip():
+            logger.error(f"No text found in TXT file: {file_path}")
+            return None
+        return text
+    
+    def iter_text_segments(self, file_path, block_size=1024 * 1024):
+        """Yield a file's text as a stream of segments with bounded memory
         
-        logger.error(f"Could not read TXT file with any encoding: {file_path}")
-        return None
+        Text files are read in ``block_size`` blocks and cut on sentence
+        boundaries, PDFs yield one segment per page and DOCX files one per
+        paragraph.
+        """
+        try:
+            if file_path.endswith('.txt'):
+                yield from ChunkedTextReader(file_path, block_size).iter_segments()
+            elif file_path.endswith('.pdf'):
+                for page_text in self.iter_pdf_texts(file_path):
+                    if page_text:
+                        yield page_text + "\n"
+            elif file_path.endswith('.docx'):
+                for paragraph in docx.Document(file_path).paragraphs:
+                    if paragraph.text:
+                        yield paragraph.text + "\n"
+            else:
+                logger.error(f"Unsupported file format: {file_path}")
+        except Exception as e:
+            logger.error(f"Error streaming text from {file_path}: {e}")
     
-    def validate_file(self, file_path, max_size_mb=10):
-        """Validate file before processing"""
-        import os
+    def should_stream(self, file_path):
+        """Whether a file is too large to extract into memory at once"""
+        return os.path.getsize(file_path) > IN_MEMORY_MAX_SIZE_MB * 1024 * 1024
+    
+    def validate_file(self, file_path, max_size_mb=IN_MEMORY_MAX_SIZE_MB, streaming=False):
+        """Validate file before processing
+        
+        ``max_size_mb`` limits files that are extracted into memory at once; when
+        the file will be read with ``iter_text_segments`` pass ``streaming=True``
+        to apply the much larger streaming limit instead.
+        """
+        if streaming:
+            max_size_mb = max(max_size_mb, STREAMING_MAX_SIZE_MB)
         
         try:
             # Check file size
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class JobHandle:
+    """Pollable state of a background job"""
+
+    def __init__(self, key):
+        self.key = key
+        self.status = 'pending'
+        self.progress = 0.0
+        self.partial_results = []
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self._future = None
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    def report(self, done=None, total=None, partial=None):
+        """Progress callback for jobs: ``report(done, total, partial=...)``"""
+        if done is not None and total:
+            self.progress = min(done / total, 1.0)
+        if partial is not None:
+            self.partial_results.append(partial)
+
+    def wait(self, timeout=None):
+        """Block until the job finishes and return its result"""
+        if self._future is not None:
+            self._future.exception(timeout=timeout)
+        return self.result
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'status': self.status,
+            'progress': self.progress,
+            'error': str(self.error) if self.error else None,
+            'submitted_at': self.submitted_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """Background executor for generation and analysis jobs
+
+    Jobs are keyed (usually by document hash and options). Submitting a key that
+    is already queued, running or finished returns the existing handle, so
+    identical requests from concurrent sessions share one computation. Finished
+    jobs are kept for polling until ``max_finished`` newer ones complete.
+    """
+
+    def __init__(self, max_workers=2, use_processes=False, max_finished=128):
+        self.use_processes = use_processes
+        self.max_finished = max_finished
+        if use_processes:
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(document_key, kind, **options):
+        """Build a job key from a document hash, job kind and options"""
+        encoded = json.dumps(options, sort_keys=True, default=str)
+        digest = hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:16]
+        return f"{document_key}:{kind}:{digest}"
+
+    def submit(self, key, fn, *args, report_progress=False, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the background, deduplicated by ``key``
+
+        With ``report_progress`` the job receives the handle's ``report`` method
+        as ``progress_callback`` (thread mode only).
+        """
+        with self._lock:
+            handle = self._jobs.get(key)
+            if handle is not None and handle.status != 'failed':
+                return handle
+
+            handle = JobHandle(key)
+            self._jobs[key] = handle
+            if report_progress and not self.use_processes:
+                kwargs['progress_callback'] = handle.report
+
+            if self.use_processes:
+                handle.status = 'running'
+                handle._future = self._executor.submit(fn, *args, **kwargs)
+            else:
+                handle._future = self._executor.submit(self._run, handle, fn, args, kwargs)
+
+        # A job that has already finished runs the callback at once, and _finish takes the lock
+        if self.use_processes:
+            handle._future.add_done_callback(lambda future: self._finish(handle, future))
+        return handle
+
+    def _run(self, handle, fn, args, kwargs):
+        handle.status = 'running'
+        try:
+            handle.result = fn(*args, **kwargs)
+            handle.status = 'done'
+            handle.progress = 1.0
+        except Exception as e:
+            logger.error(f"Job {handle.key} failed: {e}")
+            handle.error = e
+            handle.status = 'failed'
+        finally:
+            handle.finished_at = time.time()
+            self._prune()
+
+    def _finish(self, handle, future):
+        """Completion callback for process-pool jobs"""
+        error = future.exception()
+        if error is None:
+            handle.result = future.result()
+            handle.status = 'done'
+            handle.progress = 1.0
+        else:
+            logger.error(f"Job {handle.key} failed: {error}")
+            handle.error = error
+            handle.status = 'failed'
+        handle.finished_at = time.time()
+        self._prune()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond ``max_finished``"""
+        with self._lock:
+            finished = [key for key, handle in self._jobs.items() if handle.done]
+            for key in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[key]
+
+    def get(self, key):
+        """Get the handle for a job key, or None"""
+        with self._lock:
+            return self._jobs.get(key)
+
+    def get_stats(self):
+        with self._lock:
+            statuses = [handle.status for handle in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('pending', 'running', 'done', 'failed')}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Get the process-wide job queue"""
+    global _default_queue
+    if _default_queue is None:
+        with _default_lock:
+            if _default_queue is None:
+                _default_queue = JobQueue()
+    return _default_queue
@@ -0,0 +1,58 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+import types
+
+logger = logging.getLogger(__name__)
+
+_import_times = {}
+_import_lock = threading.Lock()
+
+
+def timed_import(name):
+    """Import a module and record how long the first import took"""
+    if name in sys.modules:
+        return sys.modules[name]
+
+    with _import_lock:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        if name not in _import_times:
+            _import_times[name] = time.perf_counter() - start
+            logger.debug(f"Imported {name} in {_import_times[name]:.3f}s")
+        return module
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that performs the real import on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = timed_import(self.__name__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Return a module proxy that defers importing ``name`` until it is used"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def get_import_report():
+    """Recorded import costs as (module, seconds), slowest first"""
+    return sorted(_import_times.items(), key=lambda item: item[1], reverse=True)
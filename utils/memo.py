@@ -0,0 +1,73 @@
+import copy
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+
+
+def make_rng(*parts):
+    """Random generator seeded from a tuple of strings and numbers
+
+    The seed is a hash of ``repr(parts)``, so the same parts give the same
+    sequence in every process, unlike ``hash()`` which is salted per run.
+    """
+    digest = hashlib.sha256(repr(parts).encode('utf-8', errors='surrogatepass')).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+def sample_unique(draw, count, max_attempts):
+    """Call ``draw()`` until ``count`` distinct items are collected
+
+    Gives up after ``max_attempts`` draws and returns what it has, in the
+    order the items were first drawn.
+    """
+    items = {}
+    attempts = 0
+    while len(items) < count and attempts < max_attempts:
+        items.setdefault(draw(), None)
+        attempts += 1
+    return list(items)
+
+
+class MemoCache:
+    """Thread-safe LRU of computed results
+
+    Results are deep-copied on the way in and out so callers can mutate what
+    they get back without corrupting the cached value.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for ``key`` or store ``compute()``"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key])
+            self.misses += 1
+
+        result = compute()
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
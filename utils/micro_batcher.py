@@ -0,0 +1,208 @@
+"""Dynamic micro-batching of concurrent async requests
+
+Requests submitted while a batch is being collected are grouped and handed to
+one blocking ``process_batch(items)`` call, which runs in a dedicated worker
+thread so the event loop stays responsive. The queue is bounded: once
+``max_queue`` items are waiting, ``submit`` raises ``QueueFullError`` so
+callers can shed load instead of piling up latency.
+"""
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class QueueFullError(Exception):
+    """Raised when a batcher already has ``max_queue`` requests waiting"""
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.total += value
+            self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound containing the ``q`` quantile (inf if past the last bucket)"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = q * self.count
+            seen = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), self.counts):
+                seen += bucket_count
+                if seen >= target:
+                    return bound
+        return float('inf')
+
+    def prometheus_lines(self, name, labels=''):
+        """Bucket, sum and count samples for one labelled series"""
+        separator = ',' if labels else ''
+        lines = []
+        with self._lock:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, self.counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}')
+            lines.append(f'{name}_sum{{{labels}}} {self.total}')
+            lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class MicroBatcher:
+    """Collect concurrent requests for up to ``max_wait_ms`` and run them as one batch
+
+    A batch is dispatched as soon as it holds ``max_batch_size`` items or the
+    first item has waited ``max_wait_ms``. Only one batch runs at a time, so
+    while the model is busy new requests accumulate into the next batch. If a
+    batch fails, its items are retried one by one so that a single bad item
+    only fails its own request.
+    """
+
+    def __init__(self, process_batch, max_batch_size=64, max_wait_ms=5, max_queue=1024, name='batch'):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.name = name
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait = Histogram()
+        self.batch_seconds = Histogram()
+        self.rejected = 0
+        self._queue = None
+        self._loop = None
+        self._worker = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'batcher-{name}')
+
+    @property
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the collector task on the running event loop
+
+        A collector restarted on the same loop keeps the existing queue, so
+        requests that were waiting in it are still served.
+        """
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._loop = loop
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the collector task; queued requests fail with CancelledError"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"{self.name} queue is full ({self.max_queue} waiting)")
+        return await future
+
+    async def _collect(self):
+        """Wait for one item, then gather more until the batch is full or the wait expires"""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.queue_wait.observe(started - queued_at)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.process_batch, [item for item, _, _ in batch]
+                )
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed: {e}")
+                if len(batch) == 1:
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(e)
+                else:
+                    await self._run_singly(loop, batch)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                self.batch_seconds.observe(time.perf_counter() - started)
+
+    async def _run_singly(self, loop, batch):
+        """Retry a failed batch one item at a time so only the failing requests get the error"""
+        for item, future, _ in batch:
+            if future.done():
+                continue
+            try:
+                result = await loop.run_in_executor(self._executor, self.process_batch, [item])
+            except Exception as e:
+                # The request may have been cancelled while its item was running
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result[0])
+
+    def get_stats(self):
+        return {
+            'depth': self.depth,
+            'max_queue': self.max_queue,
+            'max_batch_size': self.max_batch_size,
+            'batches': self.batch_sizes.count,
+            'items': int(self.batch_sizes.total),
+            'rejected': self.rejected
+        }
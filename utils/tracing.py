@@ -0,0 +1,199 @@
+"""Lightweight per-stage tracing for the analysis pipeline
+
+Tracing is off unless ``EXAM_PREP_TRACE=1`` is set or ``enable()`` is called,
+or only for the current thread inside a ``thread_enabled()`` block. While
+disabled, ``traced`` wrappers and ``span`` blocks only check two flags.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_enabled = os.environ.get('EXAM_PREP_TRACE', '') not in ('', '0')
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+_recent = deque(maxlen=500)
+_thread = threading.local()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled or getattr(_thread, 'enabled', False)
+
+
+@contextmanager
+def thread_enabled():
+    """Trace work done by this thread inside the block, whatever the global flag"""
+    previous = getattr(_thread, 'enabled', False)
+    _thread.enabled = True
+    try:
+        yield
+    finally:
+        _thread.enabled = previous
+
+
+def reset():
+    """Clear all recorded stages and counters"""
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _recent.clear()
+
+
+def _input_size(value):
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+class Span:
+    """Timing of one stage run; extra attributes can be attached with ``set``"""
+
+    def __init__(self, stage, attrs):
+        self.stage = stage
+        self.attrs = attrs
+        self.start = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _record_span(self.stage, duration, self.attrs, error=exc_type is not None)
+        return False
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage, **attrs):
+    """Context manager timing a block as ``stage``"""
+    if not is_enabled():
+        return _NOOP_SPAN
+    return Span(stage, attrs)
+
+
+def traced(stage, size=True):
+    """Decorator timing a method as ``stage`` and recording its input size
+
+    The input size is the ``len`` of the first argument after ``self`` when it
+    has one (text, documents, batches); pass ``size=False`` to skip it.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            attrs = {}
+            if size and len(args) > 1:
+                input_size = _input_size(args[1])
+                if input_size is not None:
+                    attrs['input_size'] = input_size
+            with Span(stage, attrs):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Add to a named counter such as cache hits"""
+    if not is_enabled():
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def _record_span(stage, duration, attrs, error=False):
+    record = {'stage': stage, 'seconds': duration, 'error': error}
+    record.update(attrs)
+
+    with _lock:
+        stats = _stages.get(stage)
+        if stats is None:
+            stats = _stages[stage] = {
+                'calls': 0, 'errors': 0, 'seconds_total': 0.0, 'seconds_max': 0.0, 'input_size_total': 0
+            }
+        stats['calls'] += 1
+        stats['errors'] += int(error)
+        stats['seconds_total'] += duration
+        stats['seconds_max'] = max(stats['seconds_max'], duration)
+        stats['input_size_total'] += attrs.get('input_size', 0)
+        _recent.append(record)
+
+    logger.debug(json.dumps(record, default=str))
+
+
+def get_stage_stats():
+    """Aggregated stats per stage"""
+    with _lock:
+        return {stage: dict(stats) for stage, stats in _stages.items()}
+
+
+def get_counters():
+    with _lock:
+        return dict(_counters)
+
+
+def get_recent_spans():
+    """Most recent span records, oldest first"""
+    with _lock:
+        return list(_recent)
+
+
+def prometheus_text(prefix='exam_prep'):
+    """Export stage stats and counters in the Prometheus text format"""
+    stages = get_stage_stats()
+    counters = get_counters()
+    lines = []
+
+    metrics = [
+        ('stage_calls_total', 'counter', 'Number of stage runs', 'calls'),
+        ('stage_errors_total', 'counter', 'Number of stage runs that raised', 'errors'),
+        ('stage_seconds_total', 'counter', 'Total time spent in a stage', 'seconds_total'),
+        ('stage_seconds_max', 'gauge', 'Slowest run of a stage', 'seconds_max'),
+        ('stage_input_size_total', 'counter', 'Total input size passed to a stage', 'input_size_total')
+    ]
+    for name, metric_type, help_text, field in metrics:
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+        for stage, stats in sorted(stages.items()):
+            lines.append(f'{prefix}_{name}{{stage="{stage}"}} {stats[field]}')
+
+    lines.append(f"# HELP {prefix}_events_total Pipeline event counters")
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for name, value in sorted(counters.items()):
+        lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,8 @@
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+from utils.lazy_import import lazy_import
+
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
+pd = lazy_import('pandas')
 
 class Visualization:
     def create_score_chart(self, scores):